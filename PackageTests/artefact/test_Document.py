@@ -91,6 +91,28 @@ class Test_Document(unittest.TestCase):
         for sentence, target in zip(document.sentences(), sentences):
             self.assertEqual(sentence, target)
 
+    def test_documentIndexedSentences(self):
+
+        content = (
+            "The document content is long and erratic. There are a few sentences in the first section.\n\nSection "
+            "two was separated from section one by two new line characters."
+        )
+
+        document = Document(content)
+        self.assertEqual([sentence for _, _, sentence in document.indexedSentences()], list(document.sentences()))
+
+        document.split("\n\n")
+        self.assertEqual([sentence for _, _, sentence in document.indexedSentences()], list(document.sentences()))
+
+        for container, offset, sentence in document.indexedSentences():
+            self.assertIn(container, document._sub_documents)
+            self.assertEqual(container.content[offset: offset + len(sentence)], sentence)
+
+        # Entities can be added with the index of the sentence without the document's cursors
+        container, offset, sentence = list(document.indexedSentences())[2]
+        container.entities.add(Entity("Section", "Section"), offset + sentence.index("Section"))
+        self.assertEqual(len(document.entities), 1)
+
     def test_documentWords(self):
         document = Document(content="A small document so smaller test.")
 
@@ -0,0 +1,88 @@
+import os, pickle, tempfile, unittest
+
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document
+from infogain.extraction import ExtractionEngine
+from infogain.extraction.aliases import AliasMatcher
+from infogain.extraction.embedder import Embedder, Corpus
+
+from infogain.resources.ontologies import language
+
+class Test_AliasMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.aliases = {"paracetamol": ["Drug"], "ibuprofen": ["Drug"], "New York": ["City"], "UK": ["Country"]}
+
+    def test_distance(self):
+
+        self.assertEqual(AliasMatcher.distance("kitten", "sitting"), 3)
+        self.assertEqual(AliasMatcher.distance("paracetamol", "paracetamol"), 0)
+        self.assertEqual(AliasMatcher.distance("paracetamol", "paracetmaol"), 1)  # Transposition
+        self.assertEqual(AliasMatcher.distance("paracetamol", "paracetmol"), 1)  # Deletion
+        self.assertEqual(AliasMatcher.distance("", "abc"), 3)
+        self.assertIsNone(AliasMatcher.distance("kitten", "sitting", 2))
+        self.assertIsNone(AliasMatcher.distance("a", "abcd", 2))
+
+    def test_exact(self):
+
+        matcher = AliasMatcher(self.aliases)
+        entities, confidences = matcher.search("He took paracetmol in the UK.")
+
+        self.assertEqual(dict(entities), {(26, 28): {"Country"}})
+        self.assertEqual(confidences, {})
+        self.assertEqual(matcher.find("He took paracetmol in the UK."), entities)
+
+    def test_approximate(self):
+
+        matcher = AliasMatcher(self.aliases, max_distance=2)
+        sentence = "He took paracetmol and ibuprofen in New Yrok, UK and Ukk."
+        entities, confidences = matcher.search(sentence)
+
+        found = {sentence[start: end]: concepts for (start, end), concepts in entities.items()}
+        self.assertEqual(
+            found,
+            {"paracetmol": {"Drug"}, "ibuprofen": {"Drug"}, "New Yrok": {"City"}, "UK": {"Country"}}
+        )
+
+        # Only the approximate matches are given a confidence, reduced by their distance
+        scores = {sentence[start: end]: concepts for (start, end), concepts in confidences.items()}
+        self.assertEqual(scores, {"paracetmol": {"Drug": 1 - 1/11}, "New Yrok": {"City": 1 - 1/8}})
+
+        # Words further than the distance are not matched, short aliases are only matched exactly
+        self.assertEqual(dict(matcher.find("He took paraxxtmxl in Ukk")), {})
+
+        # The index holds the deletions of the aliases long enough to be matched approximately
+        deletions, lengths = matcher.index()
+        self.assertEqual(lengths, [1, 2])
+        self.assertIn("paracetaml", deletions)
+        self.assertNotIn("U", deletions)
+
+        # The parameters of the matcher are kept when pickled
+        matcher = pickle.loads(pickle.dumps(matcher))
+        self.assertEqual(matcher.max_distance, 2)
+        self.assertEqual(matcher.search(sentence), (entities, confidences))
+
+    def test_engine(self):
+
+        training = language.training()
+        engine = ExtractionEngine(
+            ontology=language.ontology(),
+            embedder=Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1)),
+            classifier="logistic",
+            alias_distance=1
+        )
+        engine.fit(training)
+
+        document = engine.predict(Document("Kieran can speak Englsh rather well."))
+        entities = {entity.surfaceForm: entity for entity in document.entities}
+
+        self.assertEqual(entities["Englsh"].classType, "English")
+        self.assertAlmostEqual(entities["Englsh"].confidence, 1 - 1/len("English"))
+        self.assertEqual(entities["Kieran"].confidence, 1.)
+
+        # The distance is kept by saved bundles
+        with tempfile.TemporaryDirectory() as directory:
+            engine.save(directory)
+            loaded = ExtractionEngine.load(directory)
+            self.assertEqual(loaded.aliasMatcher().max_distance, 1)
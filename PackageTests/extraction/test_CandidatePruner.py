@@ -0,0 +1,86 @@
+import unittest
+
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document
+from infogain.knowledge import Concept, Relation
+from infogain.extraction import ExtractionEngine, CandidatePruner
+from infogain.extraction.embedder import Embedder, Corpus
+
+from infogain.resources.ontologies import language
+
+class Test_CandidatePruner(unittest.TestCase):
+
+    def setUp(self):
+        self.sentence = "Kieran met Luke and Amy in France before they flew to Germany"
+        self.spans = [
+            (self.sentence.index(word), self.sentence.index(word) + len(word))
+            for word in ("Kieran", "Luke", "Amy", "France", "Germany")
+        ]
+
+    def test_near(self):
+
+        pruner = CandidatePruner(max_distance=3)
+        layout = pruner.layout(self.sentence, self.spans)
+
+        self.assertIsNone(pruner.near(layout, 0, 1))  # One word between
+        self.assertIsNone(pruner.near(layout, 1, 0))
+        self.assertIsNone(pruner.near(layout, 0, 2))  # Three words between
+        self.assertEqual(pruner.near(layout, 0, 3), "distance")
+        self.assertEqual(pruner.near(layout, 4, 0), "distance")
+
+        pruner = CandidatePruner(max_entities=1)
+        self.assertIsNone(pruner.near(layout, 0, 2))  # Luke is between
+        self.assertEqual(pruner.near(layout, 0, 3), "entities")
+        self.assertIsNone(pruner.near(layout, 3, 4))
+
+    def test_ordered(self):
+
+        pruner = CandidatePruner(orderings={
+            "bornIn": CandidatePruner.FORWARD,
+            "birthplaceOf": CandidatePruner.BACKWARD
+        })
+        bornIn = Relation({Concept("Person")}, "bornIn", {Concept("Country")})
+        birthplaceOf = Relation({Concept("Country")}, "birthplaceOf", {Concept("Person")})
+        friends = Relation({Concept("Person")}, "friends", {Concept("Person")})
+
+        self.assertTrue(pruner.ordered(bornIn, True))
+        self.assertFalse(pruner.ordered(bornIn, False))
+        self.assertFalse(pruner.ordered(birthplaceOf, True))
+        self.assertTrue(pruner.ordered(birthplaceOf, False))
+        self.assertTrue(pruner.ordered(friends, True))
+        self.assertTrue(pruner.ordered(friends, False))
+
+        with self.assertRaises(ValueError):
+            CandidatePruner(orderings={"bornIn": "sideways"})
+
+    def test_predict(self):
+
+        training = language.training()
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+        content = "Kieran can speak English rather well, though Luke who lives in France mostly speaks French."
+
+        def fitted(pruner: CandidatePruner):
+            engine = ExtractionEngine(
+                ontology=language.ontology(), embedder=embedder, classifier="logistic", pruner=pruner
+            )
+            engine.fit(training)
+            return engine
+
+        unbounded = CandidatePruner()
+        fitted(unbounded).predict(Document(content))
+
+        stats = unbounded.stats()
+        self.assertGreater(stats["kept"], 0)
+        self.assertEqual(stats["pruned"], 0)
+
+        pruner = CandidatePruner(max_distance=2)
+        fitted(pruner).predict(Document(content))
+
+        stats = pruner.stats()
+        self.assertEqual(stats["kept"] + stats["pruned"], unbounded.stats()["kept"])
+        self.assertEqual(stats["pruned"], stats["pruned_distance"])
+        self.assertGreater(stats["pruned"], 0)
+
+        pruner.reset()
+        self.assertEqual(pruner.stats()["kept"], 0)
@@ -0,0 +1,95 @@
+import unittest
+
+from infogain.knowledge import Concept, Relation
+from infogain.extraction import ExtractionEngine, ConceptCollapser, HashingEmbedder
+
+class Test_ConceptCollapser(unittest.TestCase):
+
+    def setUp(self):
+        self.ancestry = {
+            "Person": frozenset(),
+            "Doctor": frozenset({"Person"}),
+            "Surgeon": frozenset({"Doctor", "Person"})
+        }
+        self.table = {("Person", "Language"): ("speaks",)}
+
+    def test_hierarchy(self):
+
+        entities = {(0, 6): {"Person", "Doctor", "Surgeon"}, (14, 21): {"Language"}}
+
+        specific = ConceptCollapser(ConceptCollapser.SPECIFIC, applicable=False)
+        self.assertEqual(
+            specific.collapse(entities, self.ancestry, self.table), {(0, 6): {"Surgeon"}, (14, 21): {"Language"}}
+        )
+
+        general = ConceptCollapser(ConceptCollapser.GENERAL, applicable=False)
+        self.assertEqual(
+            general.collapse(entities, self.ancestry, self.table), {(0, 6): {"Person"}, (14, 21): {"Language"}}
+        )
+
+        unchanged = ConceptCollapser(None, applicable=False)
+        self.assertEqual(unchanged.collapse(entities, self.ancestry, self.table), entities)
+
+        stats = specific.stats()
+        self.assertEqual(stats["spans"], 2)
+        self.assertEqual(stats["removed_hierarchy"], 2)
+        self.assertEqual((stats["scenarios_before"], stats["scenarios_after"]), (3, 1))
+
+        specific.reset()
+        self.assertEqual(specific.stats()["spans"], 0)
+
+        with self.assertRaises(ValueError):
+            ConceptCollapser("middle")
+
+    def test_applicable(self):
+
+        collapser = ConceptCollapser(None)
+
+        # Place cannot form a relation with any of the other concepts of the sentence
+        entities = {(0, 6): {"Person", "Place"}, (14, 21): {"Language"}}
+        self.assertEqual(
+            collapser.collapse(entities, self.ancestry, self.table), {(0, 6): {"Person"}, (14, 21): {"Language"}}
+        )
+        self.assertEqual(collapser.stats()["removed_relations"], 1)
+
+        # Concepts are kept when none of them are applicable
+        entities = {(0, 6): {"Animal", "Place"}, (14, 21): {"Language"}}
+        self.assertEqual(collapser.collapse(entities, self.ancestry, self.table), entities)
+
+        # A single span has no relations to judge
+        entities = {(0, 6): {"Person", "Place"}}
+        self.assertEqual(collapser.collapse(entities, self.ancestry, self.table), entities)
+
+    def test_engine(self):
+
+        person, place, language = Concept("Person"), Concept("Place"), Concept("Language")
+        doctor = Concept("Doctor", parents={person})
+
+        engine = ExtractionEngine(embedder=HashingEmbedder(n_features=2**10), classifier="logistic")
+        for concept in (person, doctor, place, language): engine.concepts.add(concept)
+        engine.relations.add(Relation({person}, "speaks", {language}))
+
+        person.aliases.add("Kieran")  # Inherited by Doctor
+        place.aliases.add("Kieran")
+        language.aliases.add("English")
+
+        self.assertEqual(engine.ancestry()["Doctor"], {"Person"})
+
+        def scenarios(collapser):
+            engine.collapser = collapser
+            return engine._scenarios("Kieran speaks English", engine.aliasMatcher(), engine.relations.table())
+
+        self.assertEqual(len(scenarios(None)), 3)
+        self.assertEqual(
+            [candidates.concepts for candidates in scenarios(ConceptCollapser())],
+            [["Doctor", "Language"]]
+        )
+        self.assertEqual(
+            [candidates.concepts for candidates in scenarios(ConceptCollapser(ConceptCollapser.GENERAL))],
+            [["Person", "Language"]]
+        )
+
+        # The ancestry is recompiled once the hierarchy changes
+        surgeon = Concept("Surgeon", parents={doctor})
+        engine.concepts.add(surgeon)
+        self.assertEqual(engine.ancestry()["Surgeon"], {"Doctor", "Person"})
@@ -0,0 +1,181 @@
+import os, tempfile, unittest
+
+import numpy as np
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document
+from infogain.extraction import ExtractionEngine
+from infogain.extraction.embedder import Embedder, WordVectors, Corpus
+
+class Test_Embedder(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        sentences = [
+            "Kieran can speak English rather well".split(),
+            "Luke was born in France and lived there for a short while".split(),
+            "Kieran has visited Germany though he lives in England".split()
+        ]
+        cls.embedder = Embedder(Word2Vec(sentences, min_count=1, seed=1, workers=1))
+
+    def test_sentence_spans(self):
+
+        sentence = "Luke's friend Kieran-san can speak English rather well, unlike Luke."
+
+        spans = [
+            (0, 0), (0, 4), (0, 6), (2, 9), (7, 20), (14, 24), (20, 30), (26, 54), (40, len(sentence)),
+            (0, len(sentence))
+        ]
+
+        embeddings = self.embedder.sentence_spans(sentence, spans)
+
+        self.assertEqual(embeddings.shape, (len(spans), self.embedder.size()))
+        for (start, end), embedding in zip(spans, embeddings):
+            np.testing.assert_allclose(embedding, self.embedder.sentence(sentence[start: end].strip()), atol=1e-6)
+
+    def test_sentence_spans_empty(self):
+
+        embeddings = self.embedder.sentence_spans("", [(0, 0)])
+        np.testing.assert_array_equal(embeddings, np.zeros((1, self.embedder.size())))
+
+    def test_sentences(self):
+
+        sentences = ["Kieran can speak English", "", "Luke's friend, Kieran-san", "Unrecognised words only", "Luke"]
+
+        embeddings = self.embedder.sentences(sentences)
+
+        self.assertEqual(embeddings.shape, (len(sentences), self.embedder.size()))
+        for sentence, embedding in zip(sentences, embeddings):
+            np.testing.assert_allclose(embedding, self.embedder.sentence(sentence), atol=1e-6)
+
+    def test_words(self):
+
+        words = ["Kieran", "Unrecognised", "Luke"]
+        embeddings = self.embedder.words(words)
+
+        for word, embedding in zip(words, embeddings):
+            np.testing.assert_allclose(embedding, self.embedder.word(word))
+
+    def test_shared_lazy(self):
+
+        # The shared embedder is generated once per configuration
+        self.assertIs(Embedder.shared(), Embedder.shared())
+        self.assertIsNot(Embedder.shared(), Embedder.shared(embedding_size=50))
+
+        # Engines default to the shared embedder
+        self.assertIs(ExtractionEngine()._embedder, Embedder.shared())
+
+        # Creating an engine doesn't generate the model of its embedder
+        engine = ExtractionEngine(embedder=Embedder.shared(embedding_size=50))
+        self.assertIsNone(engine._embedder._model)
+
+    def test_export_load(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.embedder.export(directory)
+
+            embedder = Embedder.load(directory)
+
+            # The vectors are memory mapped and the embedder is read only
+            self.assertIsInstance(embedder._table.vectors, np.memmap)
+            self.assertFalse(embedder.trainable())
+            self.assertIsNone(embedder.model)
+            with self.assertRaises(RuntimeError):
+                embedder.train([["Kieran", "speaks", "English"]])
+
+            self.assertEqual(embedder.size(), self.embedder.size())
+
+            sentences = ["Kieran can speak English", "Luke's friend, Kieran-san", "Unrecognised words only"]
+            np.testing.assert_allclose(embedder.sentences(sentences), self.embedder.sentences(sentences))
+            for word in ["Kieran", "Luke", "Unrecognised", "Kier", "Kierans", "a"*100]:
+                np.testing.assert_allclose(embedder.word(word), self.embedder.word(word))
+
+    def test_quantise(self):
+
+        table = WordVectors.fromKeyedVectors(self.embedder.model.wv)
+        vectors = table.gather(np.arange(len(table)))
+        self.assertEqual(vectors.dtype, np.float32)
+
+        for precision, itemsize, tolerance in [("float16", 2, 1e-3), ("int8", 1, 1/127)]:
+            quantised = table.quantise(precision)
+            self.assertEqual(quantised.precision, precision)
+            self.assertEqual(quantised.vectors.itemsize, itemsize)
+
+            # Each element is within a step of the quantisation of its row
+            restored = quantised.gather(np.arange(len(table)))
+            self.assertEqual(restored.dtype, np.float32)
+            steps = np.abs(vectors).max(axis=1, keepdims=True)*tolerance
+            self.assertTrue(np.all(np.abs(restored - vectors) <= steps))
+
+            # The precision is kept when saved and loaded
+            with tempfile.TemporaryDirectory() as directory:
+                quantised.save(directory)
+                loaded = WordVectors.load(directory)
+                self.assertEqual(loaded.precision, precision)
+                np.testing.assert_array_equal(loaded.gather(np.arange(len(table))), restored)
+
+                # Saving a float table over a quantised table removes its scales
+                table.save(directory)
+                self.assertEqual(WordVectors.load(directory).precision, "float32")
+
+        with self.assertRaises(ValueError):
+            table.quantise("float64")
+
+        # Quantised embedders embed in float32 with a different digest
+        sentences = ["Kieran can speak English", "Luke was born in France"]
+        for precision in ("float16", "int8"):
+            embedder = self.embedder.quantise(precision)
+            self.assertEqual(embedder.precision(), precision)
+            self.assertFalse(embedder.trainable())
+            self.assertNotEqual(embedder.digest(), self.embedder.digest())
+
+            embeddings = embedder.sentences(sentences)
+            self.assertEqual(embeddings.dtype, np.float32)
+            np.testing.assert_allclose(embeddings, self.embedder.sentences(sentences), atol=1e-2)
+
+            with tempfile.TemporaryDirectory() as directory:
+                self.embedder.export(directory, precision=precision)
+                self.assertEqual(Embedder.load(directory).digest(), embedder.digest())
+
+    def test_WordVectors_rows(self):
+
+        table = WordVectors.fromKeyedVectors(self.embedder.model.wv)
+        rows = table.rows(["Kieran", "Unrecognised", "was", "a"*100, "Luk"])
+
+        wv = self.embedder.model.wv
+        self.assertTrue(np.array_equal(table.vectors[rows[0]], wv["Kieran"]))
+        self.assertTrue(np.array_equal(table.vectors[rows[2]], wv["was"]))
+        self.assertEqual(list(rows[[1, 3, 4]]), [-1, -1, -1])
+
+    def test_Corpus(self):
+
+        corpus = Corpus([Document("Charlie speaks German. Natasha speaks French 123 well."), Document("Hello")])
+
+        # The corpus can be iterated multiple times
+        for _ in range(2):
+            self.assertEqual(
+                list(corpus),
+                [["Charlie", "speaks", "German"], ["Natasha", "speaks", "French", "well"], ["Hello"]]
+            )
+
+        # Words with attached punctuation are taken as the embedder looks them up
+        corpus = Corpus([Document("Natasha, it seems, speaks \"French\" rather well")])
+        self.assertEqual(list(corpus), [["Natasha", "it", "seems", "speaks", "French", "rather", "well"]])
+
+    def test_train(self):
+
+        documents = [Document("Charlie speaks German. Natasha speaks French."), Document("Charlie lives in Germany.")]
+
+        embedder = Embedder(Word2Vec([["Kieran", "speaks", "English"]], min_count=1, workers=1))
+        embedder.train(Corpus(documents))
+
+        for word in ["Charlie", "Natasha", "Germany"]:
+            self.assertTrue(embedder.word(word).any())
+
+        # Train from a pre-tokenised corpus file
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.txt")
+            Corpus([Document("Dave speaks Spanish.")]).save(path)
+
+            embedder.train(corpus_file=path)
+            self.assertTrue(embedder.word("Dave").any())
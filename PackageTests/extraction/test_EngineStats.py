@@ -0,0 +1,99 @@
+import pickle
+import unittest
+
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document
+from infogain.extraction import ExtractionEngine, EngineStats
+from infogain.extraction.embedder import Embedder, Corpus
+from infogain.extraction.instrumentation import StageRecord, NULL_RECORD
+
+from infogain.resources.ontologies import language
+
+class Test_EngineStats(unittest.TestCase):
+
+    def test_record(self):
+
+        record = StageRecord("predict", ["example"])
+        with record.stage("matching"): pass
+        with record.stage("matching"): pass
+        record.count(sentences=2, matches=1)
+        record.count(matches=3)
+        record.finish()
+
+        self.assertEqual(set(record.stages), {"matching"})
+        self.assertGreaterEqual(record.stages["matching"], 0)
+        self.assertEqual(record.counts, {"sentences": 2, "matches": 4})
+        self.assertGreaterEqual(record.duration, record.stages["matching"])
+
+        summary = record.asdict()
+        self.assertEqual(summary["operation"], "predict")
+        self.assertEqual(summary["documents"], ["example"])
+
+        # The null record discards everything
+        with NULL_RECORD.stage("matching"): pass
+        NULL_RECORD.count(sentences=1)
+
+    def test_add(self):
+
+        records = []
+        stats = EngineStats(callback=records.append)
+
+        for _ in range(2):
+            record = stats.record("predict", [Document("Some content", name="example")])
+            record.count(sentences=1)
+            with record.stage("embedding"): pass
+            stats.add(record)
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].documents, ["example"])
+
+        summary = stats.stats()
+        self.assertEqual(summary["predict"]["calls"], 2)
+        self.assertEqual(summary["predict"]["counts"], {"sentences": 2})
+        self.assertIn("embedding", summary["predict"]["stages"])
+
+        restored = pickle.loads(pickle.dumps(EngineStats()))
+        restored.add(StageRecord("fit"))
+        self.assertEqual(restored.stats()["fit"]["calls"], 1)
+
+        stats.reset()
+        self.assertEqual(stats.stats(), {})
+
+    def test_engine(self):
+
+        training = language.training()
+        stats = EngineStats()
+
+        engine = ExtractionEngine(
+            ontology=language.ontology(),
+            embedder=Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1)),
+            classifier="logistic",
+            stats=stats
+        )
+        engine.fit(training)
+
+        fitting = stats.stats()["fit"]
+        self.assertEqual(fitting["counts"]["documents"], len(training))
+        self.assertGreater(fitting["counts"]["classifier_calls"], 0)
+        self.assertIn("training", fitting["stages"])
+
+        engine.predict_batch([
+            Document("Kieran can speak English rather well. Luke lives in France."),
+            Document("The weather was pleasant.")
+        ])
+
+        predicting = stats.stats()["predict"]
+        self.assertEqual(predicting["calls"], 1)
+        self.assertEqual(predicting["counts"]["documents"], 2)
+        self.assertEqual(predicting["counts"]["sentences"], 3)
+        self.assertGreater(predicting["counts"]["matches"], 0)
+        self.assertGreater(predicting["counts"]["candidates"], 0)
+        self.assertGreater(predicting["counts"]["classifier_calls"], 0)
+        for stage in ("matching", "scenarios", "embedding", "classification"):
+            self.assertIn(stage, predicting["stages"])
+
+        # Without instrumentation the engine predicts the same annotations
+        engine.stats = None
+        document = engine.predict(Document("Kieran can speak English rather well."))
+        self.assertTrue(len(document.annotations))
@@ -1,9 +1,13 @@
-import os, unittest, pytest
+import os, tempfile, threading, unittest, pytest
+import concurrent.futures
+
+import numpy as np
+from gensim.models import Word2Vec
 
 from infogain.artefact import Document, Entity, Annotation
 from infogain.knowledge import Concept, Relation
-from infogain.extraction import ExtractionEngine, ExtractionRelation
-from infogain.extraction.embedder import Embedder
+from infogain.extraction import ExtractionEngine, ExtractionRelation, HashingEmbedder
+from infogain.extraction.embedder import Embedder, Corpus
 
 from infogain.resources.ontologies import language
 
@@ -31,6 +35,38 @@ class Test_ExtractionEngine(unittest.TestCase):
         for ann in self.testing.annotations:
             self.assertAlmostEqual(ann.confidence, 0.9, delta=0.1)
 
+    def test_fit_stream_predict(self):
+
+        # Stream the training data in small batches - the embedder is trained on the data beforehand
+        self.extractor._embedder.train(Corpus(self.training))
+        losses = self.extractor.fit_stream(iter(self.training), batch_size=8)
+
+        self.assertTrue(losses)
+        for name, loss in losses.items():
+            self.assertTrue(self.extractor.relations[name].fitted)
+            self.assertEqual(self.extractor.relations[name].losses[-1], loss)
+
+        # Predict on the testing data
+        self.extractor.predict(self.testing)
+        self.assertTrue(len(self.testing.annotations) > 0)
+
+    def test_fit_then_fit_stream(self):
+
+        # A fitted engine is updated with further documents, the relations keep the classes they were fitted with
+        self.extractor.fit(self.training)
+        versions = {relation.name: relation.version for relation in self.extractor.relations() if relation.fitted}
+        classes = {name: list(self.extractor.relations[name].classifier.classes_) for name in versions}
+
+        losses = self.extractor.fit_stream(iter(self.training), batch_size=8)
+
+        self.assertEqual(set(losses), set(versions))
+        for name, version in versions.items():
+            self.assertGreater(self.extractor.relations[name].version, version)
+            self.assertEqual(list(self.extractor.relations[name].classifier.classes_), classes[name])
+
+        self.extractor.predict(self.testing)
+        self.assertTrue(len(self.testing.annotations) > 0)
+
     def test_addingConcept_fit_predict(self):
 
         # Train the extractor
@@ -92,3 +128,171 @@ class Test_ExtractionEngine(unittest.TestCase):
             # Test the consequences of the prediction on the document
             self.assertEqual(len(test.annotations), 4)  # 2 from inform, 2 from friendsWith
             self.assertEqual(sum(1 for ann in test.annotations if ann.name == 'friendsWith'), 2)
+
+class Test_ExtractionEngine_Bundle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        training = language.training()
+
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+        cls.engine = ExtractionEngine(
+            ontology=language.ontology(),
+            embedder=embedder,
+            classifier="small-mlp",
+            classifiers={"speaks": "logistic"}
+        )
+        cls.engine.fit(training)
+
+    def annotations(self, engine: ExtractionEngine) -> [tuple]:
+        document = engine.predict(Document(content="Kieran can speak English rather well. Luke lives in France."))
+        return sorted(
+            (ann.domain.surfaceForm, ann.name, ann.target.surfaceForm, ann.classification, round(ann.confidence, 5))
+            for ann in document.annotations
+        )
+
+    def test_predict_unfitted(self):
+
+        # The informs relation has no training annotations, the fitted relations are predicted regardless
+        self.assertFalse(self.engine.relations["informs"].fitted)
+
+        document = self.engine.predict(Document(content="Kieran told Luke that he speaks English."))
+        self.assertTrue(document.annotations)
+        self.assertNotIn("informs", {ann.name for ann in document.annotations})
+
+        # The restricted relation table is compiled once rather than for every prediction
+        table = self.engine._classifiable()
+        self.assertIs(self.engine._classifiable(), table)
+        self.assertNotIn("informs", {relation.name for relations in table.values() for relation in relations})
+
+    def test_save_load(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.engine.save(directory)
+            engine = ExtractionEngine.load(directory)
+
+            # The arrays of the bundle are memory mapped
+            self.assertIsInstance(engine._embedder._table.vectors, np.memmap)
+            self.assertIsInstance(engine.relations["lives_in"].compile().weights[0], np.memmap)
+
+            self.assertEqual(engine.name, self.engine.name)
+            self.assertEqual(
+                {relation.name for relation in engine.relations() if relation.fitted},
+                {relation.name for relation in self.engine.relations() if relation.fitted}
+            )
+            self.assertEqual(engine.aliasMatcher().aliases, self.engine.aliasMatcher().aliases)
+            self.assertEqual(
+                {concept.name: set(concept.aliases) for concept in engine.concepts()},
+                {concept.name: set(concept.aliases) for concept in self.engine.concepts()}
+            )
+
+            self.assertTrue(self.annotations(self.engine))
+            self.assertEqual(self.annotations(engine), self.annotations(self.engine))
+
+            # Relations restored from a kernel cannot be trained
+            with self.assertRaises(RuntimeError):
+                engine.relations["lives_in"].partial_fit(np.zeros((1, 3*engine._embedder.size())), np.array([1]))
+
+    def test_save_load_trainable(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.engine.save(directory, trainable=True)
+            engine = ExtractionEngine.load(directory)
+
+            self.assertEqual(self.annotations(engine), self.annotations(self.engine))
+
+            relation = engine.relations["lives_in"]
+            relation.partial_fit(np.zeros((1, 3*engine._embedder.size())), np.array([1]))
+            self.assertTrue(relation.fitted)
+
+class Test_ExtractionEngine_Threads(unittest.TestCase):
+
+    CONTENTS = [
+        "Kieran can speak English rather well. Luke lives in France.",
+        "Luke lives in France and speaks French.",
+        "Kieran has visited Germany though he lives in England.\n\nLuke was born in France.",
+        "The weather was pleasant for most of the week."
+    ]
+
+    @staticmethod
+    def annotations(document: Document) -> [tuple]:
+        return sorted(
+            (ann.domain.surfaceForm, ann.name, ann.target.surfaceForm, ann.classification, round(ann.probability, 5))
+            for ann in document.annotations
+        )
+
+    def test_predict_threads(self):
+
+        training = language.training()
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+        engine = ExtractionEngine(ontology=language.ontology(), embedder=embedder, classifier="small-mlp")
+        engine.fit(training)
+
+        def document(i: int) -> Document:
+            document = Document(self.CONTENTS[i % len(self.CONTENTS)])
+            if i % 2: document.split("\n\n")
+            return document
+
+        # Sequential predictions - the first call of each compiles the structures lazily that the threads then share
+        count = 64
+        expected = [self.annotations(engine.predict(document(i))) for i in range(count)]
+        self.assertTrue(any(expected))
+
+        # Reset the lazily compiled structures such that the threads race to compile them
+        engine._matcher = (None, None)
+        for relation in engine.relations(): relation._kernel = None
+
+        barrier = threading.Barrier(8)
+        def run(i: int) -> [tuple]:
+            if i < 8: barrier.wait()
+            return self.annotations(engine.predict(document(i)))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(run, range(count)))
+
+        self.assertEqual(results, expected)
+
+class Test_ExtractionEngine_Parallel(unittest.TestCase):
+
+    @staticmethod
+    def annotations(engine: ExtractionEngine) -> [tuple]:
+        document = engine.predict(Document(content="Kieran can speak English rather well. Luke lives in France."))
+        return sorted(
+            (ann.domain.surfaceForm, ann.name, ann.target.surfaceForm, ann.classification, round(ann.probability, 5))
+            for ann in document.annotations
+        )
+
+    def test_fit_workers(self):
+
+        training = language.training()
+
+        embedders = {
+            "dense": lambda: Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1)),
+            "sparse": lambda: HashingEmbedder(n_features=2**12)
+        }
+
+        for kind, embedder in embedders.items():
+            with self.subTest(embedder=kind):
+
+                def fit(workers: int) -> ExtractionEngine:
+                    engine = ExtractionEngine(ontology=language.ontology(), embedder=embedder(), classifier="small-mlp")
+                    engine.fit(training, workers=workers, seed=1)
+                    return engine
+
+                sequential, parallel = fit(1), fit(2)
+
+                # The fitted classifiers are installed into the relations of the engine
+                fitted = {relation.name for relation in sequential.relations() if relation.fitted}
+                self.assertTrue(len(fitted) > 1)
+                self.assertEqual({relation.name for relation in parallel.relations() if relation.fitted}, fitted)
+                for name in fitted:
+                    self.assertTrue(parallel.relations[name].version > 0)
+                    self.assertEqual(
+                        parallel.relations[name].classifier.random_state,
+                        sequential.relations[name].classifier.random_state
+                    )
+
+                # Seeded relations are trained identically wherever they are trained
+                expected = self.annotations(sequential)
+                self.assertTrue(expected)
+                self.assertEqual(self.annotations(parallel), expected)
@@ -0,0 +1,135 @@
+import unittest
+
+import numpy as np
+from gensim.models import Word2Vec
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.neural_network import MLPClassifier
+
+from infogain.artefact import Entity, Annotation
+from infogain.knowledge import Concept
+from infogain.extraction import ExtractionEngine, ExtractionRelation, Embedder
+
+from infogain.resources.ontologies import language
+
+class Test_ExtractionRelation(unittest.TestCase):
+
+    def setUp(self):
+        person, language = Concept("Person"), Concept("Language")
+        self.relation = ExtractionRelation({person}, "speaks", {language})
+
+        self.kieran, self.english = Entity("Person", "Kieran"), Entity("Language", "English")
+
+        random = np.random.RandomState(1)
+        self.embeddings = random.normal(size=(60, 9))
+        self.classifications = np.where(self.embeddings[:, 0] > 0, Annotation.POSITIVE, Annotation.NEGATIVE)
+
+    def test_partial_fit(self):
+
+        self.assertFalse(self.relation.fitted)
+
+        # A batch only containing a single class still informs the classifier of all the classes
+        positive = self.classifications == Annotation.POSITIVE
+        self.relation.partial_fit(self.embeddings[positive], self.classifications[positive])
+
+        self.assertTrue(self.relation.fitted)
+        self.assertEqual(list(self.relation.classifier.classes_), list(ExtractionRelation.CLASSES))
+
+        for i in range(0, len(self.embeddings), 20):
+            self.relation.partial_fit(self.embeddings[i: i+20], self.classifications[i: i+20])
+
+        self.assertEqual(len(self.relation.losses), 4)
+
+        classes, probabilities = self.relation.classify(self.embeddings)
+        self.assertEqual(classes.shape, (len(self.embeddings),))
+        self.assertTrue(((0 <= probabilities) & (probabilities <= 1)).all())
+
+    def test_partial_fit_converged(self):
+
+        self.relation.classifier.set_params(n_iter_no_change=2, tol=1e9)
+
+        self.relation.partial_fit(self.embeddings, self.classifications)
+        self.assertFalse(self.relation.converged)
+
+        # The loss cannot improve by such a tolerance
+        self.relation.partial_fit(self.embeddings, self.classifications)
+        self.relation.partial_fit(self.embeddings, self.classifications)
+        self.assertTrue(self.relation.converged)
+
+        self.relation.resetConvergence()
+        self.assertFalse(self.relation.converged)
+        self.assertEqual(len(self.relation.losses), 3)
+
+    def test_backends(self):
+
+        for name in ExtractionRelation.BACKENDS:
+            relation = ExtractionRelation.fromRelation(self.relation, classifier=name)
+
+            annotations = []
+            for embedding, classification in zip(self.embeddings, self.classifications):
+                annotation = Annotation(self.kieran, "speaks", self.english, classification=classification)
+                annotation._embedding = np.split(embedding, 3)
+                annotations.append(annotation)
+
+            relation.fit(annotations)
+
+            classes, probabilities = relation.classify(self.embeddings)
+            self.assertTrue(set(classes) <= {Annotation.POSITIVE, Annotation.NEGATIVE})
+            self.assertTrue(((0 <= probabilities) & (probabilities <= 1)).all())
+
+    def test_training_data_install(self):
+
+        annotations = []
+        for embedding, classification in zip(self.embeddings, self.classifications):
+            annotation = Annotation(self.kieran, "speaks", self.english, classification=classification)
+            annotation._embedding = np.split(embedding, 3)
+            annotations.append(annotation)
+
+        embeddings, classifications = self.relation.trainingData(annotations)
+        self.assertTrue(np.array_equal(embeddings, self.embeddings))
+        self.assertEqual(list(classifications), list(self.classifications))
+
+        with self.assertRaises(RuntimeError):
+            self.relation.trainingData([])
+
+        # A classifier fitted apart from the relation is installed as its model
+        self.relation.seed(7)
+        self.assertEqual(self.relation.classifier.random_state, 7)
+
+        classifier = LogisticRegression().fit(embeddings, classifications)
+        self.relation.install(classifier)
+        self.assertTrue(self.relation.fitted)
+        self.assertEqual(self.relation.version, 1)
+        self.assertIs(self.relation.compile(), classifier)
+
+    def test_backend_specifications(self):
+
+        self.assertIsInstance(ExtractionRelation.backend("logistic"), LogisticRegression)
+        self.assertIsInstance(ExtractionRelation.backend(MLPClassifier), MLPClassifier)
+        self.assertIsInstance(ExtractionRelation.backend(lambda: SGDClassifier(loss="log_loss")), SGDClassifier)
+
+        # Classifier objects are cloned such that relations never share a classifier
+        logistic = LogisticRegression(C=0.5)
+        backend = ExtractionRelation.backend(logistic)
+        self.assertIsNot(backend, logistic)
+        self.assertEqual(backend.C, 0.5)
+
+        with self.assertRaises(ValueError):
+            ExtractionRelation.backend("unknown")
+
+    def test_engine_backends(self):
+
+        embedder = Embedder(Word2Vec([["Kieran", "speaks", "English"]], min_count=1, workers=1))
+        engine = ExtractionEngine(
+            ontology=language.ontology(),
+            embedder=embedder,
+            classifier="logistic",
+            classifiers={"speaks": "sgd"}
+        )
+
+        self.assertIsInstance(engine.relations["speaks"].classifier, SGDClassifier)
+        self.assertIsInstance(engine.relations["lives_in"].classifier, LogisticRegression)
+
+        # Relations added after the engine is created receive their configured backends
+        person = engine.concepts["Person"]
+        engine.relations.add(ExtractionRelation({person}, "friendsWith", {person}))
+        self.assertIsInstance(engine.relations["friendsWith"].classifier, LogisticRegression)
@@ -0,0 +1,99 @@
+import os, tempfile, unittest
+
+import numpy as np
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document, Entity, Annotation
+from infogain.extraction import ExtractionEngine, FeatureStore
+from infogain.extraction.embedder import Embedder, Corpus
+
+from infogain.resources.ontologies import language
+
+class Test_FeatureStore(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.training = language.training()
+        cls.embedder = Embedder(Word2Vec(list(Corpus(cls.training)), min_count=1, seed=1, workers=1))
+
+    def test_build(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore.build(directory, self.embedder, self.training)
+
+            self.assertIsInstance(store.embeddings, np.memmap)
+            self.assertEqual(len(store), sum(len(document.annotations) for document in self.training))
+            self.assertEqual(store.embeddings.shape[1], 3*self.embedder.size())
+            self.assertEqual(store.digest, self.embedder.digest())
+
+            # The rows of the store are the embeddings of the annotations
+            for document in self.training:
+                for annotation in document.annotations:
+                    key = FeatureStore.key(annotation, document)
+                    row = np.flatnonzero((store.documents == document.name) & (store.annotations == key))
+                    self.assertEqual(len(row), 1)
+
+                    embedding = np.concatenate([self.embedder.sentence(context) for context in annotation.context])
+                    np.testing.assert_allclose(store.embeddings[row[0]], embedding, atol=1e-6)
+                    self.assertEqual(store.classifications[row[0]], annotation.classification)
+                    self.assertEqual(store.relations[row[0]], annotation.name)
+
+    def test_key(self):
+
+        # The offsets of the key are those of the entities, whichever of them appears first
+        document = Document(content="English is spoken by Kieran.")
+        kieran, english = Entity("Person", "Kieran"), Entity("Language", "English")
+        document.entities.add(kieran, document.content.find("Kieran"))
+        document.entities.add(english, document.content.find("English"))
+
+        annotation = Annotation(kieran, "speaks", english, classification=Annotation.POSITIVE)
+        document.annotations.add(annotation)
+
+        self.assertEqual(FeatureStore.key(annotation, document), "speaks(Kieran@21,English@0)")
+
+    def test_open(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore.open(directory, self.embedder, self.training, relations={"speaks"})
+            self.assertEqual(set(store.relations), {"speaks"})
+
+            # The store is reused while it is valid
+            modified = os.path.getmtime(os.path.join(directory, "embeddings.npy"))
+            store = FeatureStore.open(directory, self.embedder, self.training, relations={"speaks"})
+            self.assertEqual(os.path.getmtime(os.path.join(directory, "embeddings.npy")), modified)
+
+            # A different embedder invalidates the store
+            embedder = Embedder(Word2Vec(list(Corpus(self.training)), min_count=1, seed=2, workers=1))
+            self.assertNotEqual(embedder.digest(), self.embedder.digest())
+
+            store = FeatureStore.open(directory, embedder, self.training, relations={"speaks"})
+            self.assertEqual(store.digest, embedder.digest())
+
+            # A different selection of annotations invalidates the store
+            store = FeatureStore.open(directory, embedder, self.training)
+            self.assertEqual(len(store), sum(len(document.annotations) for document in self.training))
+
+    def test_precision(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FeatureStore.open(directory, self.embedder, self.training)
+            self.assertEqual(store.embeddings.dtype, np.float32)
+            embeddings = np.array(store.embeddings)
+            del store
+
+            # A different precision invalidates the store
+            store = FeatureStore.open(directory, self.embedder, self.training, precision="float16")
+            self.assertEqual(store.embeddings.dtype, np.float16)
+            np.testing.assert_allclose(store.embeddings, embeddings, atol=1e-3)
+
+            with self.assertRaises(ValueError):
+                FeatureStore.build(directory, self.embedder, self.training, precision="int8")
+
+    def test_fit(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine = ExtractionEngine(ontology=language.ontology(), embedder=self.embedder, classifier="logistic")
+            engine.fit(self.training, feature_store=directory)
+
+            self.assertTrue(os.path.exists(os.path.join(directory, "store.json")))
+            self.assertTrue(engine.relations["speaks"].fitted)
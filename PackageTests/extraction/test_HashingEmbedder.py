@@ -0,0 +1,101 @@
+import os, pickle, tempfile, unittest
+
+import numpy as np
+from scipy import sparse
+
+from infogain.artefact import Document
+from infogain.extraction import ExtractionEngine, HashingEmbedder, FeatureStore
+
+from infogain.resources.ontologies import language
+
+class Test_HashingEmbedder(unittest.TestCase):
+
+    def setUp(self):
+        self.embedder = HashingEmbedder(n_features=2**12)
+
+    def test_sentences(self):
+
+        sentences = ["Kieran can speak English", "Luke's friend, Kieran-san", "", "123"]
+        embeddings = self.embedder.sentences(sentences)
+
+        self.assertTrue(sparse.isspmatrix_csr(embeddings))
+        self.assertEqual(embeddings.shape, (len(sentences), self.embedder.size()))
+        self.assertEqual(embeddings.dtype, np.float32)
+
+        # Rows are normalised, sentences without words are empty
+        np.testing.assert_allclose(np.linalg.norm(embeddings[:2].toarray(), axis=1), [1, 1], atol=1e-6)
+        self.assertEqual(embeddings[2:].nnz, 0)
+
+        # Words are tokenised as the Embedder - the alphabetical characters of the runs between spaces
+        np.testing.assert_allclose(
+            self.embedder.sentence("Lukes friend KieranSan").toarray(), embeddings[1].toarray()
+        )
+
+        self.assertEqual(self.embedder.sentences([]).shape, (0, self.embedder.size()))
+
+    def test_sentence_spans(self):
+
+        sentence = "Luke's friend Kieran-san can speak English rather well, unlike Luke."
+        spans = [(0, 0), (0, 4), (2, 9), (14, 24), (26, 54), (0, len(sentence))]
+
+        embeddings = self.embedder.sentence_spans(sentence, spans)
+        self.assertEqual(embeddings.shape, (len(spans), self.embedder.size()))
+
+        for (start, end), embedding in zip(spans, embeddings):
+            np.testing.assert_allclose(embedding.toarray(), self.embedder.sentence(sentence[start: end]).toarray())
+
+    def test_untrained(self):
+
+        self.assertFalse(self.embedder.trainable())
+        self.embedder.train([["Kieran", "speaks", "English"]])  # Nothing to train
+
+        self.assertEqual(self.embedder.digest(), HashingEmbedder(n_features=2**12).digest())
+        self.assertNotEqual(self.embedder.digest(), HashingEmbedder(n_features=2**13).digest())
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.embedder.export(directory)
+            embedder = HashingEmbedder.load(directory)
+            self.assertEqual(embedder.digest(), self.embedder.digest())
+
+            with self.assertRaises(ValueError):
+                FeatureStore.build(directory, self.embedder, language.training())
+
+        embedder = pickle.loads(pickle.dumps(self.embedder))
+        np.testing.assert_allclose(
+            embedder.sentence("Kieran can speak English").toarray(),
+            self.embedder.sentence("Kieran can speak English").toarray()
+        )
+
+    def test_engine(self):
+
+        training = language.training()
+        engine = ExtractionEngine(ontology=language.ontology(), embedder=self.embedder, classifier="logistic")
+        engine.fit(training)
+
+        self.assertTrue(any(relation.fitted for relation in engine.relations()))
+
+        content = "Kieran can speak English rather well. Luke lives in France."
+        document = engine.predict(Document(content))
+        self.assertTrue(len(document.annotations))
+
+        expected = sorted((ann.name, ann.classification, round(ann.probability, 5)) for ann in document.annotations)
+
+        # Incremental training stacks the sparse points of the relations
+        streamed = ExtractionEngine(ontology=language.ontology(), embedder=self.embedder, classifier="sgd")
+        streamed.fit_stream(training, batch_size=4)
+        self.assertTrue(any(relation.fitted for relation in streamed.relations()))
+
+        # The embedder is recorded within a saved bundle
+        with tempfile.TemporaryDirectory() as directory:
+            engine = ExtractionEngine(ontology=language.ontology(), embedder=self.embedder, classifier="logistic")
+            engine.fit(training)
+            engine.save(directory)
+
+            loaded = ExtractionEngine.load(directory)
+            self.assertIsInstance(loaded._embedder, HashingEmbedder)
+
+            document = loaded.predict(Document(content))
+            self.assertEqual(
+                sorted((ann.name, ann.classification, round(ann.probability, 5)) for ann in document.annotations),
+                expected
+            )
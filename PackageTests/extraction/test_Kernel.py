@@ -0,0 +1,110 @@
+import pickle, threading, unittest
+
+import numpy as np
+from scipy import sparse
+from sklearn.neural_network import MLPClassifier
+
+from infogain.artefact import Annotation
+from infogain.knowledge import Concept
+from infogain.extraction import ExtractionRelation
+from infogain.extraction.kernel import MLPKernel
+
+class Test_MLPKernel(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(1)
+        self.X = random.normal(size=(80, 12))
+        self.y = np.digitize(self.X[:, 0], [-0.5, 0.5]) - 1
+
+    def test_predict_proba(self):
+
+        for activation in ["relu", "tanh", "logistic", "identity"]:
+            classifier = MLPClassifier(hidden_layer_sizes=(16, 8), activation=activation, max_iter=50, random_state=1)
+            classifier.fit(self.X, self.y)
+
+            kernel = MLPKernel.fromClassifier(classifier)
+
+            np.testing.assert_allclose(kernel.predict_proba(self.X), classifier.predict_proba(self.X), atol=1e-5)
+            np.testing.assert_array_equal(kernel.predict(self.X), classifier.predict(self.X))
+
+    def test_predict_proba_binary(self):
+
+        classifier = MLPClassifier(hidden_layer_sizes=(16,), max_iter=50, random_state=1)
+        classifier.fit(self.X, self.y > 0)
+
+        kernel = MLPKernel.fromClassifier(classifier)
+        np.testing.assert_allclose(kernel.predict_proba(self.X), classifier.predict_proba(self.X), atol=1e-5)
+
+    def test_buffers(self):
+
+        classifier = MLPClassifier(hidden_layer_sizes=(16,), max_iter=50, random_state=1).fit(self.X, self.y)
+        kernel = MLPKernel.fromClassifier(classifier)
+
+        # Results are not overwritten by subsequent calls that reuse the buffers
+        first = kernel.predict_proba(self.X[:10])
+        kernel.predict_proba(self.X[10:20])
+        np.testing.assert_allclose(first, classifier.predict_proba(self.X[:10]), atol=1e-5)
+
+        # Buffers grow to fit larger batches and are held per thread
+        X = np.tile(self.X, (2, 1))
+        np.testing.assert_allclose(kernel.predict_proba(X), classifier.predict_proba(X), atol=1e-5)
+
+        results = {}
+        def run(i): results[i] = kernel.predict_proba(self.X[i::4])
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        for i in range(4): np.testing.assert_allclose(results[i], classifier.predict_proba(self.X[i::4]), atol=1e-5)
+
+    def test_predict_proba_sparse(self):
+
+        X = np.where(np.abs(self.X) > 1, self.X, 0)
+        classifier = MLPClassifier(hidden_layer_sizes=(16,), max_iter=50, random_state=1).fit(X, self.y)
+        kernel = MLPKernel.fromClassifier(classifier)
+
+        # Sparse inputs are multiplied into the first layer, and share the buffers of dense inputs
+        np.testing.assert_allclose(kernel.predict_proba(sparse.csr_matrix(X)), classifier.predict_proba(X), atol=1e-5)
+        np.testing.assert_allclose(kernel.predict_proba(X), classifier.predict_proba(X), atol=1e-5)
+        np.testing.assert_allclose(
+            kernel.predict_proba(sparse.csr_matrix(np.tile(X, (2, 1)))),
+            classifier.predict_proba(np.tile(X, (2, 1))),
+            atol=1e-5
+        )
+
+    def test_pickle(self):
+
+        classifier = MLPClassifier(hidden_layer_sizes=(64, 16), max_iter=50, random_state=1).fit(self.X, self.y)
+        kernel = MLPKernel.fromClassifier(classifier)
+        kernel.predict_proba(self.X)
+
+        serialised = pickle.dumps(kernel)
+        self.assertLess(len(serialised), len(pickle.dumps(classifier)) / 2)
+
+        np.testing.assert_allclose(pickle.loads(serialised).predict_proba(self.X), kernel.predict_proba(self.X))
+
+    def test_relation_kernel(self):
+
+        relation = ExtractionRelation({Concept("Person")}, "speaks", {Concept("Language")}, classifier="small-mlp")
+        relation.classifier.set_params(max_iter=50)
+
+        with self.assertRaises(RuntimeError):
+            relation.compile()
+
+        relation.partial_fit(self.X, self.y)
+        kernel = relation.compile()
+        self.assertIsInstance(kernel, MLPKernel)
+        self.assertIs(relation.compile(), kernel)
+
+        classes, probabilities = relation.classify(self.X)
+        np.testing.assert_array_equal(classes, relation.classifier.predict(self.X))
+        np.testing.assert_allclose(probabilities, relation.classifier.predict_proba(self.X).max(axis=1), atol=1e-5)
+
+        # Training the relation again recompiles the kernel
+        relation.partial_fit(self.X, self.y)
+        self.assertIsNot(relation.compile(), kernel)
+
+        # Backends without a kernel are used directly
+        logistic = ExtractionRelation({Concept("Person")}, "speaks", {Concept("Language")}, classifier="logistic")
+        logistic.classifier.fit(self.X, self.y)
+        logistic.fitted = True
+        self.assertIs(logistic.compile(), logistic.classifier)
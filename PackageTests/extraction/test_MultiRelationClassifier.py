@@ -0,0 +1,104 @@
+import tempfile, unittest
+
+import numpy as np
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document, Annotation
+from infogain.extraction import ExtractionEngine, MultiRelationClassifier
+from infogain.extraction.embedder import Embedder, Corpus
+
+from infogain.resources.ontologies import language
+
+class Test_MultiRelationClassifier(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(1)
+        self.embeddings = random.normal(size=(120, 9))
+        self.relations = np.where(self.embeddings[:, 1] > 0, "speaks", "lives_in")
+        self.classifications = np.where(self.embeddings[:, 0] > 0, Annotation.POSITIVE, Annotation.NEGATIVE)
+
+    def test_probabilities(self):
+
+        model = MultiRelationClassifier(["friendsWith", "lives_in", "speaks"], classifier="logistic")
+        model.fit(self.embeddings, self.relations, self.classifications)
+
+        probabilities = model.probabilities(self.embeddings)
+        self.assertEqual(probabilities.shape, (len(self.embeddings), 3, len(MultiRelationClassifier.CLASSES)))
+
+        # The probabilities of each trained relation are normalised, untrained relations have none
+        np.testing.assert_allclose(probabilities[:, 1:].sum(axis=2), 1)
+        np.testing.assert_array_equal(probabilities[:, 0], 0)
+
+        classes, probs = model.classify(probabilities, self.relations)
+        self.assertEqual(set(classes), {Annotation.POSITIVE, Annotation.NEGATIVE})
+        self.assertTrue(((0.5 <= probs) & (probs <= 1)).all())
+        self.assertGreater(np.mean(classes == self.classifications), 0.8)
+
+        with self.assertRaises(RuntimeError):
+            model.classify(probabilities[:1], ["friendsWith"])
+        self.assertEqual(model.trained(), {"lives_in", "speaks"})
+
+        with self.assertRaises(ValueError):
+            model.fit(self.embeddings[:1], ["unknown"], [Annotation.POSITIVE])
+
+    def test_save_load(self):
+
+        model = MultiRelationClassifier(["lives_in", "speaks"], classifier="small-mlp")
+        model.fit(self.embeddings, self.relations, self.classifications)
+
+        with tempfile.TemporaryDirectory() as directory:
+            model.save(directory)
+            loaded = MultiRelationClassifier.load(directory)
+
+            self.assertEqual(loaded.relations, model.relations)
+            np.testing.assert_allclose(
+                loaded.probabilities(self.embeddings), model.probabilities(self.embeddings), atol=1e-5
+            )
+
+            with self.assertRaises(RuntimeError):
+                loaded.fit(self.embeddings, self.relations, self.classifications)
+
+    def test_engine(self):
+
+        training = language.training()
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+
+        engine = ExtractionEngine(ontology=language.ontology(), embedder=embedder, multi_relation="logistic")
+        engine.fit(training)
+
+        # The relations do not have classifiers of their own
+        self.assertFalse(any(relation.fitted for relation in engine.relations()))
+
+        document = engine.predict(Document("Kieran can speak English rather well. Luke lives in France."))
+        self.assertTrue(document.annotations)
+        for annotation in document.annotations:
+            self.assertIn(annotation.classification, MultiRelationClassifier.CLASSES)
+            self.assertTrue(0 <= annotation.probability <= 1)
+
+        with tempfile.TemporaryDirectory() as directory:
+            engine.save(directory)
+            loaded = ExtractionEngine.load(directory)
+
+            predicted = loaded.predict(Document("Kieran can speak English rather well. Luke lives in France."))
+            self.assertEqual(
+                sorted((ann.name, ann.classification, round(ann.probability, 5)) for ann in predicted.annotations),
+                sorted((ann.name, ann.classification, round(ann.probability, 5)) for ann in document.annotations)
+            )
+
+        with self.assertRaises(RuntimeError):
+            engine.fit_stream(training)
+
+    def test_predict_untrained(self):
+
+        training = language.training()
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+
+        engine = ExtractionEngine(ontology=language.ontology(), embedder=embedder, multi_relation="logistic")
+        engine.fit(training)
+
+        # The informs relation has no training annotations, the trained relations are predicted regardless
+        self.assertNotIn("informs", engine._shared.trained())
+
+        document = engine.predict(Document(content="Kieran told Luke that he speaks English."))
+        self.assertTrue(document.annotations)
+        self.assertNotIn("informs", {ann.name for ann in document.annotations})
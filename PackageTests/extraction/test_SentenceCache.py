@@ -0,0 +1,135 @@
+import unittest
+
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document
+from infogain.knowledge import Concept, Relation
+from infogain.extraction import ExtractionEngine, SentenceCache, CandidatePruner, ConceptCollapser
+from infogain.extraction.candidates import Candidates
+from infogain.extraction.embedder import Embedder, Corpus
+
+from infogain.resources.ontologies import language
+
+class Test_SentenceCache(unittest.TestCase):
+
+    def candidates(self, sentence: str) -> Candidates:
+        relation = Relation({Concept("Person")}, "speaks", {Concept("Language")})
+
+        spans = [(sentence.index(word), sentence.index(word) + len(word)) for word in ("Kieran", "English")]
+        candidates = Candidates(sentence, spans, ["Person", "Language"])
+        candidates.add(0, relation, 1)
+        candidates.classified([0], [1], [0.9])
+        return candidates
+
+    def test_normalise(self):
+
+        sentence = "  Kieran   can\tspeak  English. "
+        text, positions = SentenceCache.normalise(sentence)
+
+        self.assertEqual(text, "Kieran can speak English.")
+        self.assertEqual(len(positions), len(text))
+        for character, position in zip(text, positions):
+            self.assertEqual(character, " " if sentence[position].isspace() else sentence[position])
+
+    def test_get_put(self):
+
+        cache = SentenceCache()
+        sentence = "Kieran can speak English."
+
+        self.assertEqual(cache.get(1, sentence), (False, None))
+
+        cache.put(1, sentence, self.candidates(sentence))
+        cache.put(1, "Nothing to see here.", None)
+
+        # The result is relocated onto a sentence with different whitespace
+        other = " Kieran  can speak\tEnglish. "
+        found, candidates = cache.get(1, other)
+        self.assertTrue(found)
+        self.assertEqual(candidates.sentence, other)
+        self.assertEqual([other[start: end] for start, end in candidates.spans], ["Kieran", "English"])
+        self.assertEqual(candidates.concepts, ["Person", "Language"])
+        self.assertEqual(list(candidates.probabilities), [0.9])
+
+        self.assertEqual(cache.get(1, "Nothing  to see here."), (True, None))
+
+        # A different model version is not found
+        self.assertEqual(cache.get(2, sentence), (False, None))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+
+    def test_eviction(self):
+
+        cache = SentenceCache(max_entries=2)
+        for i in range(3): cache.put(1, "Sentence {}".format(i), None)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 1)
+        self.assertFalse(cache.get(1, "Sentence 0")[0])
+
+        # The memory cap is respected
+        size = SentenceCache._size("Sentence 0", None)
+        cache = SentenceCache(max_bytes=2*size)
+        for i in range(3): cache.put(1, "Sentence {}".format(i), None)
+
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.nbytes, cache.max_bytes)
+
+    def test_predict(self):
+
+        training = language.training()
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+        engine = ExtractionEngine(
+            ontology=language.ontology(), embedder=embedder, classifier="logistic", cache=SentenceCache()
+        )
+        engine.fit(training)
+
+        content = "Kieran can speak English rather well. Luke lives in France."
+        annotations = lambda document: sorted(
+            (ann.domain.surfaceForm, ann.name, ann.target.surfaceForm, ann.classification, round(ann.probability, 5))
+            for ann in document.annotations
+        )
+
+        first = engine.predict(Document(content))
+        self.assertEqual(engine.cache.hits, 0)
+
+        second = engine.predict(Document(content))
+        self.assertEqual(engine.cache.hits, engine.cache.misses)
+        self.assertTrue(annotations(first))
+        self.assertEqual(annotations(second), annotations(first))
+
+        # Training the engine invalidates the cached results
+        engine.fit(training)
+        hits = engine.cache.hits
+        engine.predict(Document(content))
+        self.assertEqual(engine.cache.hits, hits)
+
+        # Training the embedder invalidates the cached results
+        engine.predict(Document(content))
+        hits = engine.cache.hits
+        embedder.train(Corpus([Document("Kieran speaks English and Luke speaks French.")]))
+        engine.predict(Document(content))
+        self.assertEqual(engine.cache.hits, hits)
+
+        # Replacing or reconfiguring the pruner invalidates the cached results
+        expected = annotations(engine.predict(Document(content)))
+        hits = engine.cache.hits
+
+        engine.pruner = CandidatePruner(max_distance=0)
+        pruned = engine.predict(Document(content))
+        self.assertEqual(engine.cache.hits, hits)
+        self.assertEqual(annotations(pruned), [])
+
+        engine.pruner.max_distance = None
+        self.assertEqual(annotations(engine.predict(Document(content))), expected)
+        self.assertEqual(engine.cache.hits, hits)
+
+        # Engines sharing a cache don't retrieve the results of each other
+        other = ExtractionEngine(ontology=language.ontology(), embedder=embedder, cache=engine.cache)
+        self.assertNotEqual(other.version(), engine.version())
+
+        # As does replacing or reconfiguring the collapser
+        version = engine.version()
+        engine.collapser = ConceptCollapser()
+        self.assertNotEqual(engine.version(), version)
+        version = engine.version()
+        engine.collapser.policy = ConceptCollapser.GENERAL
+        self.assertNotEqual(engine.version(), version)
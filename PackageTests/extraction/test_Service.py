@@ -0,0 +1,98 @@
+import os, asyncio, tempfile, unittest
+import concurrent.futures
+
+from gensim.models import Word2Vec
+
+from infogain.artefact import Document
+from infogain.extraction import ExtractionEngine, AsyncExtractionService
+from infogain.extraction.embedder import Embedder, Corpus
+
+from infogain.resources.ontologies import language
+
+class Test_AsyncExtractionService(unittest.TestCase):
+
+    CONTENTS = [
+        "Kieran can speak English rather well.",
+        "Luke lives in France. Kieran has visited Germany though he lives in England.",
+        "The weather was pleasant for most of the week."
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        training = language.training()
+
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+        cls.engine = ExtractionEngine(ontology=language.ontology(), embedder=embedder, classifier="logistic")
+        cls.engine.fit(training)
+
+    @staticmethod
+    def annotations(document: Document) -> [tuple]:
+        return sorted(
+            (ann.domain.surfaceForm, ann.name, ann.target.surfaceForm, ann.classification, round(ann.probability, 5))
+            for ann in document.annotations
+        )
+
+    def test_predict_batch(self):
+
+        batch = self.engine.predict_batch([Document(content) for content in self.CONTENTS])
+
+        for content, document in zip(self.CONTENTS, batch):
+            self.assertEqual(self.annotations(document), self.annotations(self.engine.predict(Document(content))))
+
+    def test_predict(self):
+
+        async def run():
+            async with AsyncExtractionService(self.engine, batch_size=2, max_wait=0.05) as service:
+                return await asyncio.gather(*(service.predict(Document(content)) for content in self.CONTENTS))
+
+        documents = asyncio.run(run())
+
+        self.assertTrue(any(document.annotations for document in documents))
+        for content, document in zip(self.CONTENTS, documents):
+            self.assertEqual(document.content, Document(content).content)
+            self.assertEqual(self.annotations(document), self.annotations(self.engine.predict(Document(content))))
+
+    def test_executor(self):
+
+        async def run(executor):
+            async with AsyncExtractionService(self.engine, batch_size=1, executor=executor) as service:
+                return await asyncio.gather(*(service.predict(Document(content)) for content in self.CONTENTS))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            documents = asyncio.run(run(executor))
+
+        for content, document in zip(self.CONTENTS, documents):
+            self.assertEqual(self.annotations(document), self.annotations(self.engine.predict(Document(content))))
+
+        # The engine cannot be shared with worker processes
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(ValueError):
+                AsyncExtractionService(self.engine, executor=executor)
+
+    def test_serve(self):
+
+        async def run(path):
+            service = AsyncExtractionService(self.engine)
+            server = await service.serve(path)
+
+            reader, writer = await asyncio.open_unix_connection(path)
+            for i, content in enumerate(self.CONTENTS):
+                await AsyncExtractionService.send(writer, {"name": str(i), "content": content})
+
+            responses = [await AsyncExtractionService.receive(reader) for _ in self.CONTENTS]
+
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            await service.stop()
+            return responses
+
+        with tempfile.TemporaryDirectory() as directory:
+            responses = asyncio.run(run(os.path.join(directory, "extraction.sock")))
+
+        for i, (content, response) in enumerate(zip(self.CONTENTS, responses)):
+            self.assertEqual(response["name"], str(i))
+            self.assertEqual(response["content"], Document(content).content)
+            self.assertEqual(
+                len(response["annotations"]), len(self.engine.predict(Document(content)).annotations)
+            )
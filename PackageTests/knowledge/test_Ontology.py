@@ -163,6 +163,37 @@ class Test_Ontology_Creation(unittest.TestCase):
         for relation in ontology.findRelations("Kieran", "England"):
             self.assertIn(relation.name, ["born_in", "lives_in"])
 
+    def test_relationTable(self):
+        """ Ensure that the compiled relation table agrees with the relations themselves """
+
+        ontology = Language.ontology()
+        table = ontology.relations.table()
+
+        for domain in ontology.concepts():
+            for target in ontology.concepts():
+                self.assertEqual(
+                    set(table.get((domain.name, target.name), ())),
+                    {relation for relation in ontology.relations() if relation.between(domain, target)}
+                )
+
+    def test_relationTable_invalidation(self):
+        """ Ensure that the relation table is recompiled after the hierarchy and relations are changed """
+
+        ontology = Language.ontology()
+        self.assertFalse(list(ontology.findRelations("Kieran", "Kieran")))
+
+        # Add a concept into the hierarchy
+        ontology.concepts.add(Concept("Steve", parents={"Person"}, category="static"))
+        self.assertEqual({r.name for r in ontology.findRelations("Steve", "English")}, {"speaks"})
+
+        # Allow a relation to hold between a concept and itself
+        ontology.relations["informs"].differ = False
+        self.assertIn(ontology.relations["informs"], list(ontology.findRelations("Kieran", "Kieran")))
+
+        # Add a new relation
+        ontology.relations.add(Relation({"Person"}, "admires", {"Person"}))
+        self.assertIn("admires", {r.name for r in ontology.findRelations("Steve", "Kieran")})
+
     def test_LoadOntology_Concepts(self):
         """ Ensure that the process of loading an ontology from file is correct,
         that all concepts are created correctly and that the relations are all
@@ -0,0 +1,45 @@
+import tempfile, unittest
+
+from gensim.models import Word2Vec
+
+from infogain.extraction import ExtractionRelation
+from infogain.extraction.embedder import Embedder, Corpus
+from infogain.resources.calibrator import tune
+
+from infogain.resources.ontologies import language
+
+class Test_Calibrator(unittest.TestCase):
+
+    def test_tune(self):
+
+        training = language.training()
+        embedder = Embedder(Word2Vec(list(Corpus(training)), min_count=1, seed=1, workers=1))
+
+        structures, alphas = [(3,), (8, 4)], [1e-4, 1e-2, 1.]
+
+        with tempfile.TemporaryDirectory() as directory:
+            scores, best = tune(
+                ExtractionRelation,
+                language.ontology(),
+                training,
+                structures=structures,
+                alphas=alphas,
+                folds=2,
+                eta=3,
+                min_iter=5,
+                max_iter=45,
+                workers=2,
+                embedder=embedder,
+                feature_store=directory
+            )
+
+        # Every configuration was evaluated, the survivors with a larger budget
+        self.assertEqual(set(scores), {(layers, alpha) for layers in structures for alpha in alphas})
+        self.assertEqual(sorted(score["iterations"] for score in scores.values()), [5, 5, 5, 5, 15, 45])
+
+        for score in scores.values():
+            for metric in ("precision", "recall", "f1"):
+                self.assertTrue(0 <= score[metric] <= 1)
+
+        self.assertIn((best["hidden_layer_sizes"], best["alpha"]), scores)
+        self.assertEqual(best["max_iter"], 45)
@@ -0,0 +1,188 @@
+""" Compare the classifier backends of ExtractionRelation on the ADE and SemEval 2007 (task 4) datasets, reporting the
+time taken to fit each relation, the prediction throughput and the F1 score of the positive class.
+
+The annotations of both datasets are embedded once with the shared embedder (trained further on their sentences where
+it can be), such that only the classifiers are measured.
+
+usage: python ClassifierBenchmark.py [ADE sample size]
+"""
+
+import os, re, sys, time, random, collections
+
+import numpy as np
+from sklearn.metrics import f1_score
+
+from infogain.artefact import Document, Entity, Annotation
+from infogain.knowledge import Concept
+from infogain.extraction import ExtractionRelation, Embedder, Corpus
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+ADE = os.path.join(ROOT, "Dataset-ADE")
+SEMEVAL = os.path.join(ROOT, "Dataset-SemEval2007")
+
+def annotate(sentence: str, domain: (str, str, int), name: str, target: (str, str, int), classification: int):
+    """ Create a document of a single sentence holding a single annotation between two entities, entities are given as
+    (concept, surface form, position). Examples whose entities cannot be annotated (such as those that are separated by
+    a sentence break) are discarded by returning None """
+    document = Document(content=sentence.strip(), processed=True)
+
+    try:
+        entities = []
+        for concept, surface, position in (domain, target):
+            entity = Entity(concept, surface)
+            document.entities.add(entity, position)
+            entities.append(entity)
+
+        annotation = Annotation(entities[0], name, entities[1], classification=classification)
+        document.annotations.add(annotation)
+    except (ValueError, NotImplementedError):
+        return None
+
+    return document, annotation
+
+def semeval(filename: str) -> {str: [(Document, Annotation)]}:
+    """ Read a SemEval 2007 task 4 file into annotated documents grouped by relation """
+
+    relations = collections.defaultdict(list)
+    with open(os.path.join(SEMEVAL, filename), errors="replace") as handler:
+        for section in handler.read().split("\n\n"):
+            if not section.strip(): continue
+
+            text, info = section.strip().split("\n")[:2]
+            text = text[text.index('"') + 1: text.rindex('"')]
+
+            # Remove the entity tags recording the positions of the entities
+            entities, sentence = {}, ""
+            for part in re.split(r"(<e\d>.+?</e\d>)", text):
+                tag = re.match(r"<(e\d)>(.+?)</e\d>", part)
+                if tag:
+                    entities[tag.group(1)] = (tag.group(2), len(sentence))
+                    part = tag.group(2)
+                sentence += part
+
+            name, first, value = re.search(r'([\w-]+)\((e\d), ?e\d\) = "(\w+)"', info).groups()
+            second = "e2" if first == "e1" else "e1"
+
+            point = annotate(
+                sentence,
+                ("Entity",) + entities[first],
+                name,
+                ("Entity",) + entities[second],
+                Annotation.POSITIVE if value == "true" else Annotation.NEGATIVE
+            )
+            if point is not None: relations[name].append(point)
+
+    return relations
+
+def ade(size: int) -> [(Document, Annotation)]:
+    """ Read the ADE corpus into annotated documents. Positive examples are the drug/effect pairs of the corpus,
+    negative examples pair the drugs and effects found in the sentences that are known not to describe an effect """
+
+    positives, drugs, effects = [], set(), set()
+    with open(os.path.join(ADE, "DRUG-AE.rel")) as handler:
+        for line in handler.read().splitlines():
+            _, sentence, effect, _, _, drug = line.split("|")[:6]
+            if drug not in sentence or effect not in sentence: continue
+
+            drugs.add(drug.lower())
+            effects.add(effect.lower())
+            positives.append((sentence, drug, effect))
+
+    def matcher(aliases):
+        return re.compile(r"\b(" + "|".join(re.escape(a) for a in sorted(aliases, key=len, reverse=True)) + r")\b")
+
+    drugMatcher, effectMatcher = matcher(drugs), matcher(effects)
+
+    negatives = []
+    with open(os.path.join(ADE, "ADE-NEG.txt")) as handler:
+        lines = handler.read().splitlines()
+        random.shuffle(lines)
+        for line in lines:
+            sentence = " ".join(line.split()[2:])
+            lowered = sentence.lower()
+            drug, effect = drugMatcher.search(lowered), effectMatcher.search(lowered)
+            if drug is None or effect is None or drug.end() > effect.start() > drug.start(): continue
+            if effect.end() > drug.start() > effect.start(): continue
+            negatives.append((sentence, sentence[slice(*drug.span())], sentence[slice(*effect.span())]))
+            if len(negatives) >= size // 2: break
+
+    random.shuffle(positives)
+    examples = [(example, Annotation.POSITIVE) for example in positives[:size - len(negatives)]]
+    examples += [(example, Annotation.NEGATIVE) for example in negatives]
+
+    points = []
+    for (sentence, drug, effect), classification in examples:
+        point = annotate(
+            sentence,
+            ("Drug", drug, sentence.find(drug)),
+            "causes",
+            ("Effect", effect, sentence.find(effect)),
+            classification
+        )
+        if point is not None: points.append(point)
+    random.shuffle(points)
+    return points
+
+def embed(embedder: Embedder, points: [(Document, Annotation)]) -> (np.ndarray, np.ndarray):
+    """ Embed the annotations of the points, setting their embeddings and returning the embedding matrix and labels """
+    annotations = [annotation for _, annotation in points]
+    contexts = [context for annotation in annotations for context in annotation.context]
+    embeddings = embedder.sentences(contexts).reshape(len(annotations), -1)
+
+    for annotation, row in zip(annotations, embeddings): annotation.embedding = tuple(row.reshape(3, -1))
+    return embeddings, np.array([annotation.classification for annotation in annotations])
+
+def benchmark(name: str, training: [(Document, Annotation)], testing: [(Document, Annotation)], backend):
+    """ Fit a relation with the backend on the training points and evaluate it on the testing points """
+    relation = ExtractionRelation({Concept("Entity")}, name, {Concept("Entity")}, classifier=backend)
+
+    start = time.perf_counter()
+    relation.fit([annotation for _, annotation in training])
+    fitting = time.perf_counter() - start
+
+    embeddings = np.array([np.concatenate(annotation.embedding) for _, annotation in testing])
+    labels = np.array([annotation.classification for _, annotation in testing])
+
+    start = time.perf_counter()
+    classes, _ = relation.classify(embeddings)
+    predicting = time.perf_counter() - start
+
+    return fitting, len(testing)/predicting, f1_score(labels, classes, pos_label=Annotation.POSITIVE, zero_division=0)
+
+if __name__ == "__main__":
+
+    random.seed(1)
+    np.random.seed(1)
+
+    print("Loading datasets...")
+    semevalTraining, semevalTesting = semeval("TrainingSet.txt"), semeval("TestingSet.txt")
+    adePoints = ade(int(sys.argv[1]) if len(sys.argv) > 1 else 4000)
+
+    datasets = [("ADE causes", adePoints[:len(adePoints)//2], adePoints[len(adePoints)//2:])]
+    for name in sorted(semevalTraining):
+        datasets.append(("SemEval " + name, semevalTraining[name], semevalTesting[name]))
+
+    print("Training the embedder and embedding the annotations...")
+    documents = [document for _, training, testing in datasets for document, _ in training + testing]
+    embedder = Embedder.shared()
+    if embedder.trainable(): embedder.train(Corpus(documents))
+    for _, training, testing in datasets:
+        embed(embedder, training)
+        embed(embedder, testing)
+
+    results = collections.defaultdict(list)
+    print("\n{:<30} {:<10} {:>8} {:>8} {:>14} {:>6}".format(
+        "Dataset", "Backend", "Points", "Fit (s)", "Predict (/s)", "F1"
+    ))
+    for dataset, training, testing in datasets:
+        for backend in ExtractionRelation.BACKENDS:
+            fitting, throughput, f1 = benchmark(dataset, training, testing, backend)
+            results[backend].append((fitting, throughput, f1))
+            print("{:<30} {:<10} {:>8} {:>8.2f} {:>14.0f} {:>6.3f}".format(
+                dataset, backend, len(training), fitting, throughput, f1
+            ))
+
+    print("\n{:<10} {:>12} {:>18} {:>10}".format("Backend", "Total fit (s)", "Mean predict (/s)", "Mean F1"))
+    for backend, scores in results.items():
+        fitting, throughput, f1 = zip(*scores)
+        print("{:<10} {:>12.2f} {:>18.0f} {:>10.3f}".format(backend, sum(fitting), np.mean(throughput), np.mean(f1)))
@@ -0,0 +1,68 @@
+""" Compare the original per-word embedding path with the per-word loop of Embedder.sentence, the batched
+Embedder.sentences and the prefix-sum Embedder.sentence_spans, embedding the sentences of the bundled text collection.
+
+The original path is re-implemented inline, as Embedder.word now shares the bulk vocabulary lookup: each word is
+checked against and read from the model's KeyedVectors in turn, with a new float64 zero vector for unrecognised words.
+It requires a word embedding model, and cannot be measured when the embedder reads exported vectors.
+"""
+
+import re, sys, timeit
+
+import numpy as np
+
+from infogain import resources
+from infogain.extraction import Embedder
+
+embedder = Embedder()
+if embedder.model is None: sys.exit("The original path requires a word embedding model, not exported vectors")
+
+# Collect sentences from the text collection along with a left/middle/right split of each
+sentences = []
+for path in resources.TEXT_COLLECTIONS:
+    with open(path) as handler:
+        sentences += [s.strip() for s in re.split(r"[\.\?\!]", handler.read()) if len(s.split()) > 3]
+sentences = sentences[:5000]
+
+spans = []
+for sentence in sentences:
+    i, j = len(sentence)//3, 2*len(sentence)//3
+    spans.append([(0, i), (i, j), (j, len(sentence))])
+
+def originalWord(word):
+    """ The original Embedder.word - a membership test and lookup upon the KeyedVectors for each word """
+    if word not in embedder.model.wv: return np.zeros(embedder.size())
+    return embedder.model.wv[word]
+
+def originalSentence(sentence):
+    """ The original Embedder.sentence - the mean of the words embedded one at a time """
+    embedding = np.zeros(embedder.size())
+    words = re.sub("[^A-Za-z ]", "", sentence).split()
+    for word in words: embedding += originalWord(word)
+    if len(words): embedding = embedding/len(words)
+    return embedding
+
+def original(): return np.array([originalSentence(sentence) for sentence in sentences])
+def loop(): return np.array([embedder.sentence(sentence) for sentence in sentences])
+def batched(): return embedder.sentences(sentences)
+
+def contextOriginal(): return [[originalSentence(s[a:b].strip()) for a, b in sp] for s, sp in zip(sentences, spans)]
+def contextLoop(): return [[embedder.sentence(s[a:b].strip()) for a, b in sp] for s, sp in zip(sentences, spans)]
+def contextSpans(): return [embedder.sentence_spans(s, sp) for s, sp in zip(sentences, spans)]
+
+assert np.allclose(original(), batched(), atol=1e-5)
+assert np.allclose(loop(), batched())
+
+def measure(method): return min(timeit.repeat(method, number=1, repeat=5))*1000
+
+print("Embedding {} sentences".format(len(sentences)))
+print("{:<12} {:>14} {:>14} {:>14} {:>8} {:>8}".format(
+    "", "Original (ms)", "Loop (ms)", "Batched (ms)", "Loop", "Batched"
+))
+for name, methods in [
+        ("Sentences", (original, loop, batched)),
+        ("Contexts", (contextOriginal, contextLoop, contextSpans))
+    ]:
+    before, current, after = [measure(method) for method in methods]
+    print("{:<12} {:>14.1f} {:>14.1f} {:>14.1f} {:>7.1f}x {:>7.1f}x".format(
+        name, before, current, after, before/current, before/after
+    ))
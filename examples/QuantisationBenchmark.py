@@ -0,0 +1,62 @@
+""" Measure the memory and accuracy impact of holding the word vectors of the shared embedder at a reduced precision
+(float16, or int8 with a scale per row) on the ADE and SemEval 2007 (task 4) datasets. The annotations of the datasets
+are embedded with each precision of the vectors and a relation is fitted and evaluated on them, reporting the memory of
+the vectors, the largest difference of the annotation embeddings from the float32 embeddings and the F1 score of the
+positive class.
+
+usage: python QuantisationBenchmark.py [ADE sample size] [classifier backend]
+"""
+
+import sys, random, collections
+
+import numpy as np
+
+from infogain.extraction import Embedder, Corpus
+from infogain.extraction.embedder import WordVectors
+
+from ClassifierBenchmark import semeval, ade, embed, benchmark
+
+if __name__ == "__main__":
+
+    random.seed(1)
+    np.random.seed(1)
+
+    backend = sys.argv[2] if len(sys.argv) > 2 else "logistic"
+
+    print("Loading datasets...")
+    semevalTraining, semevalTesting = semeval("TrainingSet.txt"), semeval("TestingSet.txt")
+    adePoints = ade(int(sys.argv[1]) if len(sys.argv) > 1 else 4000)
+
+    datasets = [("ADE causes", adePoints[:len(adePoints)//2], adePoints[len(adePoints)//2:])]
+    for name in sorted(semevalTraining):
+        datasets.append(("SemEval " + name, semevalTraining[name], semevalTesting[name]))
+
+    print("Training the embedder...")
+    documents = [document for _, training, testing in datasets for document, _ in training + testing]
+    embedder = Embedder.shared()
+    if embedder.trainable(): embedder.train(Corpus(documents))
+
+    results = collections.defaultdict(list)
+    reference = {}
+    print("\n{:<10} {:<30} {:>12} {:>12} {:>6}".format("Precision", "Dataset", "Vectors (MB)", "Max error", "F1"))
+    for precision in WordVectors.PRECISIONS:
+        quantised = embedder.quantise(precision)
+        megabytes = quantised._table.vectors.nbytes/2**20
+        if quantised._table.scales is not None: megabytes += quantised._table.scales.nbytes/2**20
+
+        for dataset, training, testing in datasets:
+            embeddings, _ = embed(quantised, training)
+            embed(quantised, testing)
+
+            # The largest difference of the annotation embeddings from the float32 embeddings
+            reference.setdefault(dataset, embeddings)
+            error = float(np.abs(embeddings - reference[dataset]).max()) if len(embeddings) else 0.
+
+            _, _, f1 = benchmark(dataset, training, testing, backend)
+            results[precision].append((error, f1))
+            print("{:<10} {:<30} {:>12.1f} {:>12.2e} {:>6.3f}".format(precision, dataset, megabytes, error, f1))
+
+    print("\n{:<10} {:>12} {:>10}".format("Precision", "Max error", "Mean F1"))
+    for precision, scores in results.items():
+        errors, f1 = zip(*scores)
+        print("{:<10} {:>12.2e} {:>10.3f}".format(precision, max(errors), np.mean(f1)))
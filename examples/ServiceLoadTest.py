@@ -0,0 +1,105 @@
+""" Measure the latency of the AsyncExtractionService against its throughput. An engine is fitted on the language
+ontology training documents and served over a unix socket, then a load generator opens a number of connections and
+issues requests at a fixed rate (open loop, such that the requests do not wait on the responses) for each of the rates.
+Requests are pipelined on each connection - the service answers the requests of a connection in order, such that the
+responses are matched to the requests first in first out and the requests in flight are not bounded by the connections.
+The p50 and p99 latency and the achieved throughput are reported for each rate, with and without micro-batching.
+
+usage: python ServiceLoadTest.py [duration per rate (s)]
+"""
+
+import os, sys, time, random, asyncio, tempfile, collections
+
+import numpy as np
+
+from infogain.extraction import ExtractionEngine, AsyncExtractionService, Embedder, Corpus
+from infogain.resources.ontologies import language
+
+SENTENCES = [
+    "Kieran can speak English rather well.",
+    "Luke lives in France and speaks French.",
+    "Kieran has visited Germany though he lives in England.",
+    "Luke was born in France and lived there for a short while.",
+    "The weather was pleasant for most of the week."
+]
+
+RATES = [50, 100, 200, 400, 800]  # Requests per second
+CONNECTIONS = 8
+
+async def load(path: str, rate: float, duration: float) -> ([float], float):
+    """ Issue requests at a rate over the connections for the duration, returning the latency of each request and the
+    achieved throughput """
+
+    loop = asyncio.get_running_loop()
+    streams = [await asyncio.open_unix_connection(path) for _ in range(CONNECTIONS)]
+    pending = [collections.deque() for _ in streams]  # The awaited responses of each connection, in request order
+    latencies = []
+
+    async def responses(reader, waiting):
+        """ Resolve the requests of a connection with its responses, in the order the requests were sent """
+        while True:
+            response = await AsyncExtractionService.receive(reader)
+            if response is None: break
+            waiting.popleft().set_result(response)
+
+    async def request(writer, waiting, content):
+        start = time.perf_counter()
+
+        # The request is written before the next request is queued, such that the queue is in the order of the stream
+        response = loop.create_future()
+        waiting.append(response)
+        await AsyncExtractionService.send(writer, {"content": content})
+
+        response = await response
+        if "error" in response: raise RuntimeError(response["error"])
+        latencies.append(time.perf_counter() - start)
+
+    readers = [asyncio.ensure_future(responses(reader, waiting)) for (reader, _), waiting in zip(streams, pending)]
+    tasks = []
+
+    start = time.perf_counter()
+    for i in range(int(rate*duration)):
+        await asyncio.sleep(max(0, start + i/rate - time.perf_counter()))
+
+        (_, writer), waiting = streams[i % CONNECTIONS], pending[i % CONNECTIONS]
+        content = " ".join(random.sample(SENTENCES, 2))
+        tasks.append(asyncio.ensure_future(request(writer, waiting, content)))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    for _, writer in streams: writer.close()
+    await asyncio.gather(*readers)
+    return latencies, len(latencies)/elapsed
+
+async def run(engine: ExtractionEngine, batch_size: int, duration: float) -> None:
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "extraction.sock")
+
+        service = AsyncExtractionService(engine, batch_size=batch_size)
+        server = await service.serve(path)
+
+        print("\nBatch size {}".format(batch_size))
+        print("{:>10} {:>14} {:>10} {:>10}".format("Rate (/s)", "Achieved (/s)", "p50 (ms)", "p99 (ms)"))
+        for rate in RATES:
+            latencies, throughput = await load(path, rate, duration)
+            p50, p99 = np.percentile(latencies, [50, 99])*1000
+            print("{:>10} {:>14.0f} {:>10.1f} {:>10.1f}".format(rate, throughput, p50, p99))
+
+        server.close()
+        await server.wait_closed()
+        await service.stop()
+
+if __name__ == "__main__":
+
+    random.seed(1)
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.
+
+    print("Fitting the engine...")
+    training = language.training()
+    engine = ExtractionEngine(ontology=language.ontology(), classifier="small-mlp")
+    engine.fit(training)
+
+    for batch_size in (1, 32):
+        asyncio.run(run(engine, batch_size, duration))
@@ -539,6 +539,28 @@ class Document:
 
         self._yieldedSentence = 0
 
+    def indexedSentences(self) -> ("Document", int, str):
+        """ Generator for the sentences of the document alongside the (sub) document that contains each sentence and the
+        index of the sentence within the content of that document. Unlike `sentences`, the yield cursors of the document
+        are not used, such that the document can be read by several readers at once and entities can be added to the
+        containing document with an index of the sentence start plus the entity's index within the sentence.
+        """
+
+        if self._content:
+            content, last = self._content, 0
+            for match in self._SENTENCE_RGX.finditer(content):
+
+                start, end = match.span()
+                if content[last: start]: yield self, last, content[last: start]
+
+                last = end
+
+            if content[last:]: yield self, last, content[last:]
+
+        else:
+            for document in self._sub_documents:
+                yield from document.indexedSentences()
+
     def words(self) -> str:
         """ Return all the words of the document ensuring that they are valid. Words that contain non alphabetical
         characters shall not be yielded from this function
@@ -1,3 +1,11 @@
 from .extrationengine import ExtractionEngine
 from .extractionrelation import ExtractionRelation
-from .embedder import Embedder
\ No newline at end of file
+from .embedder import Embedder, Corpus
+from .featurestore import FeatureStore
+from .service import AsyncExtractionService
+from .cache import SentenceCache
+from .pruning import CandidatePruner
+from .multirelation import MultiRelationClassifier
+from .instrumentation import EngineStats
+from .hashing import HashingEmbedder
+from .collapse import ConceptCollapser
@@ -0,0 +1,220 @@
+import collections
+import json
+import re
+
+from ..knowledge import Concept
+
+class AliasMatcher:
+    """ Detect the surface forms of concepts within sentences. The aliases of the concepts are compiled into patterns
+    once, rather than for every document, and the patterns are only compiled upon first use.
+
+    Misspelled surface forms (such as the errors of OCR'd documents) can additionally be matched approximately, within
+    an edit distance of the aliases. The aliases are indexed by the strings formed by deleting up to max_distance of
+    their characters (symmetric deletion), such that the spans of words of a sentence are looked up by their own
+    deletions - the cost of a sentence depends on its words rather than the number of aliases. Approximate matches are
+    given a confidence reduced by their distance, see `search`.
+
+    Params:
+        aliases ({str: [str]}): A mapping of alias onto the names of the concepts that it represents
+        max_distance (int): The maximum edit distance of an approximate match, aliases are only matched exactly when 0
+        min_length (int): The minimum length of an alias to be matched approximately, shorter aliases are only matched
+            exactly as any word of a similar length would be within their distance
+    """
+
+    _TOKEN_RGX = re.compile(r"\w+(?:['-]\w+)*")  # The words that approximate matches are formed of
+
+    def __init__(self, aliases: {str: [str]}, max_distance: int = 0, min_length: int = 4):
+        self.aliases = {alias: set(concepts) for alias, concepts in aliases.items()}
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self._patterns = None
+        self._index = None
+
+    def __getstate__(self):
+        return {"aliases": self.aliases, "max_distance": self.max_distance, "min_length": self.min_length}
+
+    def __setstate__(self, state):
+        self.aliases = state["aliases"]
+        self.max_distance = state.get("max_distance", 0)
+        self.min_length = state.get("min_length", 4)
+        self._patterns = None
+        self._index = None
+
+    def __len__(self): return len(self.aliases)
+
+    @classmethod
+    def fromConcepts(cls, concepts: [Concept], **kwargs):
+        """ Create the matcher of a collection of concepts - a concept is represented by its name and its aliases.
+        Abstract concepts cannot be expressed in text and are ignored.
+
+        Params:
+            concepts ([Concept]): The concepts to be detected
+            **kwargs: The approximate matching parameters of the matcher - max_distance and min_length
+
+        Returns:
+            AliasMatcher: The matcher of the concepts
+        """
+
+        aliases = collections.defaultdict(set)
+        for concept in concepts:
+            if concept.category is Concept.ABSTRACT: continue
+
+            aliases[concept.name].add(concept.name)
+            for alias in concept.aliases:
+                aliases[alias].add(concept.name)
+
+        return cls(aliases, **kwargs)
+
+    @classmethod
+    def load(cls, filepath: str, **kwargs):
+        """ Load a matcher saved with `save`
+
+        Params:
+            filepath (str): The location of the saved matcher
+            **kwargs: The approximate matching parameters of the matcher - max_distance and min_length
+        """
+        with open(filepath) as handler:
+            return cls(json.load(handler), **kwargs)
+
+    def save(self, filepath: str) -> None:
+        """ Save the aliases of the matcher into a json file
+
+        Params:
+            filepath (str): The location the matcher is to be saved to
+        """
+        with open(filepath, "w") as handler:
+            json.dump({alias: sorted(concepts) for alias, concepts in self.aliases.items()}, handler, sort_keys=True)
+
+    def patterns(self) -> [(str, re.Pattern)]:
+        """ The compiled pattern of each of the aliases """
+
+        if self._patterns is None:
+            #? This can become the fast text algorithm
+            self._patterns = [
+                (
+                    alias,
+                    re.compile(r"(^|(?!\s))"+alias+r"((?=(\W(\W|$)))|(?=\s)|(?='s)|$)")
+                )
+                for alias in self.aliases.keys()
+            ]
+
+        return self._patterns
+
+    def index(self) -> ({str: {str}}, [int]):
+        """ The symmetric deletion index of the aliases that are matched approximately - the aliases keyed by each of
+        the strings formed by deleting up to max_distance of their characters - and the distinct numbers of words of the
+        indexed aliases """
+
+        if self._index is None:
+            deletions, lengths = collections.defaultdict(set), set()
+            for alias in self.aliases:
+                words = len(self._TOKEN_RGX.findall(alias))
+                if len(alias) < self.min_length or not words: continue
+
+                lengths.add(words)
+                for variant in self._deletions(alias, self.max_distance):
+                    deletions[variant].add(alias)
+
+            self._index = (dict(deletions), sorted(lengths))
+
+        return self._index
+
+    def find(self, sentence: str) -> {(int, int): {str}}:
+        """ Find all the surface forms of concepts within the sentence
+
+        Params:
+            sentence (str): The sentence to be searched
+
+        Returns:
+            {(int, int): {str}}: The names of the concepts that could be expressed at each of the matched spans
+        """
+        return self.search(sentence)[0]
+
+    def search(self, sentence: str) -> ({(int, int): {str}}, {(int, int): {str: float}}):
+        """ Find all the surface forms of concepts within the sentence, exactly and (when enabled) approximately. The
+        spans of consecutive words of the sentence are matched approximately when they have not been matched exactly,
+        a match at a distance d from an alias of length n has the confidence 1 - d/n.
+
+        Params:
+            sentence (str): The sentence to be searched
+
+        Returns:
+            {(int, int): {str}}: The names of the concepts that could be expressed at each of the matched spans
+            {(int, int): {str: float}}: The confidence of each of the concepts of the approximately matched spans
+        """
+
+        entities = collections.defaultdict(set)
+        for alias, pattern in self.patterns():
+            for match in pattern.finditer(sentence):
+
+                # Found a possible entity - convert the alias into the possible concepts for the match
+                entities[match.span()].update(self.aliases[alias])
+
+        confidences = {}
+        if not self.max_distance: return entities, confidences
+
+        deletions, lengths = self.index()
+        words = [match.span() for match in self._TOKEN_RGX.finditer(sentence)]
+
+        # Look up the spans of each number of words that an alias is formed of
+        for length in lengths:
+            for i in range(len(words) - length + 1):
+                span = (words[i][0], words[i + length - 1][1])
+                if span in entities: continue
+
+                text = " ".join(sentence[span[0]: span[1]].split())
+                if len(text) + self.max_distance < self.min_length: continue
+
+                aliases = set()
+                for variant in self._deletions(text, self.max_distance):
+                    aliases.update(deletions.get(variant, ()))
+
+                for alias in aliases:
+                    distance = self.distance(text, alias, self.max_distance)
+                    if not distance: continue  # Outside of the distance, or left to the exact patterns
+
+                    entities[span].update(self.aliases[alias])
+                    scores = confidences.setdefault(span, {})
+                    for concept in self.aliases[alias]:
+                        scores[concept] = max(scores.get(concept, 0.), 1. - distance/len(alias))
+
+        return entities, confidences
+
+    @staticmethod
+    def _deletions(text: str, distance: int) -> {str}:
+        """ The strings formed by deleting up to a number of characters of the text, including the text itself """
+        variants, frontier = {text}, {text}
+        for _ in range(distance):
+            frontier = {variant[:i] + variant[i+1:] for variant in frontier for i in range(len(variant))}
+            variants |= frontier
+        return variants
+
+    @staticmethod
+    def distance(first: str, second: str, limit: int = None) -> int:
+        """ The edit distance between two strings - the number of character insertions, deletions, substitutions and
+        transpositions of adjacent characters that transform one into the other (optimal string alignment)
+
+        Params:
+            first (str): A string
+            second (str): The other string
+            limit (int): The largest distance of interest, the calculation is abandoned once it is exceeded
+
+        Returns:
+            int: The distance between the strings, None when it exceeds the limit
+        """
+
+        if limit is not None and abs(len(first) - len(second)) > limit: return None
+
+        before, previous = None, list(range(len(second) + 1))
+        for i, a in enumerate(first, 1):
+            current = [i] + [0]*len(second)
+            for j, b in enumerate(second, 1):
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a != b))
+                if i > 1 and j > 1 and a == second[j - 2] and first[i - 2] == b:
+                    current[j] = min(current[j], before[j - 2] + 1)
+
+            # The smallest distance of a row cannot decrease in the following rows
+            if limit is not None and min(current) > limit: return None
+            before, previous = previous, current
+
+        return previous[-1] if limit is None or previous[-1] <= limit else None
@@ -0,0 +1,176 @@
+import re
+import sys
+import bisect
+import threading
+import collections
+
+from .candidates import Candidates
+
+class SentenceCache:
+    """ A bounded least recently used cache of the prediction results of sentences, such that sentences that recur
+    between documents (disclaimers, headers, template phrases) are only matched and classified once. Sentences are keyed
+    by their text with runs of whitespace normalised, and the version of the model that predicted them. The scenario
+    chosen for a sentence (its entity spans, concepts and annotation probabilities) is stored relative to the normalised
+    text and relocated onto the sentence it is retrieved for.
+
+    Params:
+        max_bytes (int): The approximate memory cap of the cached results, least recently used results are evicted
+        max_entries (int): The maximum number of cached sentences, unbounded when None
+    """
+
+    _WHITESPACE_RGX = re.compile(r"\s+")
+
+    def __init__(self, max_bytes: int = 64*1024*1024, max_entries: int = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self): return len(self._entries)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """ The approximate memory held by the cached results """
+        return self._nbytes
+
+    def stats(self) -> {str: int}:
+        """ The counters of the cache """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._nbytes
+        }
+
+    def clear(self) -> None:
+        """ Remove all of the cached results, the counters are kept """
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @classmethod
+    def normalise(cls, sentence: str) -> (str, [int]):
+        """ Normalise the whitespace of a sentence - the sentence is stripped and runs of whitespace are replaced with a
+        single space
+
+        Params:
+            sentence (str): The sentence to be normalised
+
+        Returns:
+            str: The normalised text
+            [int]: The position within the sentence of each of the characters of the normalised text
+        """
+
+        text, positions = [], []
+
+        start = len(sentence) - len(sentence.lstrip())
+        end = len(sentence.rstrip())
+
+        last = start
+        for match in cls._WHITESPACE_RGX.finditer(sentence, start, end):
+            text.append(sentence[last: match.start()])
+            positions.extend(range(last, match.start()))
+            text.append(" ")
+            positions.append(match.start())
+            last = match.end()
+
+        text.append(sentence[last: end])
+        positions.extend(range(last, end))
+
+        return "".join(text), positions
+
+    def get(self, version: object, sentence: str) -> (bool, Candidates):
+        """ Retrieve the cached result of a sentence
+
+        Params:
+            version (object): The version of the model predicting the sentence
+            sentence (str): The sentence
+
+        Returns:
+            bool: Whether the sentence was found within the cache
+            Candidates: The scenario chosen for the sentence relocated onto the sentence, None when no scenario was
+                chosen (or the sentence was not found)
+        """
+
+        text, positions = self.normalise(sentence)
+
+        with self._lock:
+            entry = self._entries.get((version, text))
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end((version, text))
+            self.hits += 1
+
+        candidates, _ = entry
+        if candidates is None: return True, None
+
+        spans = [(positions[start], positions[end - 1] + 1) for start, end in candidates.spans]
+        return True, candidates.relocate(sentence, spans)
+
+    def put(self, version: object, sentence: str, candidates: Candidates) -> None:
+        """ Cache the result of a sentence
+
+        Params:
+            version (object): The version of the model that predicted the sentence
+            sentence (str): The sentence
+            candidates (Candidates): The scenario chosen for the sentence, None when no scenario was chosen
+        """
+
+        text, positions = self.normalise(sentence)
+
+        if candidates is not None:
+            spans = [
+                (bisect.bisect_left(positions, start), bisect.bisect_left(positions, end - 1) + 1)
+                for start, end in candidates.spans
+            ]
+            candidates = candidates.relocate(text, spans)
+
+        nbytes = self._size(text, candidates)
+        if nbytes > self.max_bytes: return
+
+        key = (version, text)
+        with self._lock:
+            if key in self._entries: self._nbytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (candidates, nbytes)
+            self._nbytes += nbytes
+
+            full = lambda: self.max_entries is not None and len(self._entries) > self.max_entries
+            while self._nbytes > self.max_bytes or full():
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+                self.evictions += 1
+
+    @staticmethod
+    def _size(text: str, candidates: Candidates) -> int:
+        """ Approximate the memory of a cached result """
+
+        nbytes = sys.getsizeof(text) + 200  # The key, entry and ordering overheads
+        if candidates is None: return nbytes
+
+        nbytes += sys.getsizeof(candidates) + sys.getsizeof(candidates.__dict__)
+        for values in (candidates.spans, candidates.concepts, candidates.domains, candidates.targets,
+                candidates.relations, candidates.contexts, candidates.confidences or []):
+            nbytes += sys.getsizeof(values) + 64*len(values)
+        if candidates.classifications is not None:
+            nbytes += candidates.classifications.nbytes + candidates.probabilities.nbytes + 200
+
+        return nbytes
@@ -0,0 +1,128 @@
+import numpy as np
+
+from ..artefact import Entity, Annotation
+
+class Candidates:
+    """ A light weight representation of a single scenario of a sentence - the entities that have been chosen for the
+    detected spans and the annotations that could form between them. The information is held as plain arrays such that
+    the scenario can be scored without generating any document artefacts. Entity and Annotation objects are only
+    generated for the scenario that is chosen via materialise.
+
+    Params:
+        sentence (str): The sentence that the scenario describes
+        spans ([(int, int)]): The character offsets of each entity surface form within the sentence
+        concepts ([str]): The concept (name) chosen for each of the spans
+        confidences ([float]): The confidence of the detection of each of the entities, all entities are certain when
+            None (see AliasMatcher.search)
+    """
+
+    def __init__(self, sentence: str, spans: [(int, int)], concepts: [str], confidences: [float] = None):
+        self.sentence = sentence
+        self.spans = list(spans)
+        self.concepts = list(concepts)
+        self.confidences = list(confidences) if confidences is not None else None
+
+        # Pair information - the entity indexes, the relation and the context offsets for each candidate annotation
+        self.domains = []
+        self.targets = []
+        self.relations = []
+        self.contexts = []
+
+        # The classification results of each of the candidate annotations
+        self.classifications = None
+        self.probabilities = None
+
+    def __len__(self): return len(self.relations)
+
+    def add(self, domain: int, relation: object, target: int) -> int:
+        """ Record a candidate annotation between two of the scenario entities. The context offsets of the annotation
+        are determined in the same way as the document AnnotationSet, from the order of appearance of the entities.
+
+        Params:
+            domain (int): The index of the domain entity
+            relation (Relation): The relation that the annotation is to express
+            target (int): The index of the target entity
+
+        Returns:
+            int: The index of the candidate annotation
+        """
+
+        (i, iEnd), (j, jEnd) = sorted((self.spans[domain], self.spans[target]))
+
+        self.domains.append(domain)
+        self.targets.append(target)
+        self.relations.append(relation)
+        self.contexts.append(((0, i), (iEnd, j), (jEnd, len(self.sentence))))
+
+        return len(self.relations) - 1
+
+    def relocate(self, sentence: str, spans: [(int, int)]):
+        """ Copy the scenario onto another sentence, such as another occurrence of the same text, keeping the entities,
+        candidate annotations and classification results of the scenario
+
+        Params:
+            sentence (str): The sentence the copy describes
+            spans ([(int, int)]): The character offsets of each of the entities within the sentence
+
+        Returns:
+            Candidates: The copy of the scenario
+        """
+
+        candidates = Candidates(sentence, spans, self.concepts, self.confidences)
+        for domain, relation, target in zip(self.domains, self.relations, self.targets):
+            candidates.add(domain, relation, target)
+
+        if self.classifications is not None:
+            candidates.classifications = self.classifications.copy()
+            candidates.probabilities = self.probabilities.copy()
+
+        return candidates
+
+    def context(self, index: int) -> (str, str, str):
+        """ Return the left, middle and right context strings of a candidate annotation """
+        return tuple(self.sentence[slice(*span)].strip() for span in self.contexts[index])
+
+    def classified(self, indexes: [int], classifications: [int], probabilities: [float]) -> None:
+        """ Record the classification results for a collection of candidate annotations
+
+        Params:
+            indexes ([int]): The indexes of the candidate annotations that have been classified
+            classifications ([int]): The classification for each of the candidates
+            probabilities ([float]): The probability of the classification for each of the candidates
+        """
+
+        if self.classifications is None:
+            self.classifications = np.zeros(len(self), dtype=int)
+            self.probabilities = np.zeros(len(self))
+
+        self.classifications[indexes] = classifications
+        self.probabilities[indexes] = probabilities
+
+    def ranked(self) -> [float]:
+        """ The probabilities of the candidate annotations ordered from most to least probable """
+        if self.probabilities is None: return []
+        return sorted(self.probabilities, reverse=True)
+
+    def materialise(self, document: object, offset: int = 0) -> None:
+        """ Generate the entities and annotations of the scenario and add them into the document. Entity indexes are
+        relative to the sentence in the same way as adding entities while iterating over the document sentences, unless
+        the offset of the sentence within the document is provided.
+
+        Params:
+            document (Document): The document the scenario is to be written into
+            offset (int): The index of the sentence within the document
+        """
+
+        confidences = self.confidences if self.confidences is not None else [1.]*len(self.spans)
+
+        entities = []
+        for (start, end), concept, confidence in zip(self.spans, self.concepts, confidences):
+            entity = Entity(concept, self.sentence[start: end], confidence=confidence)
+            document.entities.add(entity, offset + start)
+            entities.append(entity)
+
+        for k, relation in enumerate(self.relations):
+            annotation = Annotation(entities[self.domains[k]], relation.name, entities[self.targets[k]])
+            annotation.classification = self.classifications[k]
+            annotation.probability = self.probabilities[k]
+            document.annotations.add(annotation)
@@ -0,0 +1,117 @@
+import threading
+
+class ConceptCollapser:
+    """ Collapse the concepts detected for each span of a sentence before its scenarios are enumerated. Aliases are
+    inherited down the concept hierarchy, such that a span matching the alias of a concept also matches every one of
+    its descendants, and every concept of a span multiplies the scenarios of the sentence. The collapser keeps either
+    the most specific or the most general of the related concepts of a span, and optionally discards the concepts of a
+    span that cannot form a relation with any of the concepts of the other spans of the sentence. The concepts and
+    scenarios removed are counted such that the reduction can be measured.
+
+    Params:
+        policy (str): SPECIFIC to keep the concepts without a descendant among the span's concepts, GENERAL to keep the
+            concepts without an ancestor among them, or None to keep the hierarchy as it is
+        applicable (bool): Toggle to discard the concepts of a span that no relation can be formed with. Concepts are
+            only discarded while at least one of the span's concepts remains
+    """
+
+    SPECIFIC = "specific"
+    GENERAL = "general"
+
+    def __init__(self, policy: str = SPECIFIC, applicable: bool = True):
+        if policy not in (self.SPECIFIC, self.GENERAL, None):
+            raise ValueError("Invalid collapse policy '{}'".format(policy))
+
+        self.policy = policy
+        self.applicable = applicable
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def configuration(self) -> tuple:
+        """ The settings of the collapser that determine the concepts it keeps, such that results predicted with a
+        different configuration can be told apart (see ExtractionEngine.version) """
+        return (self.policy, self.applicable)
+
+    def reset(self) -> None:
+        """ Reset the counters of the collapser """
+        with self._lock:
+            self.spans = 0
+            self.removed = {"hierarchy": 0, "relations": 0}
+            self.scenarios = {"before": 0, "after": 0}
+
+    def stats(self) -> {str: int}:
+        """ The counters of the collapser - the spans seen, the concepts removed by reason, and the scenarios of the
+        sentences before and after they were collapsed """
+        with self._lock:
+            stats = {"spans": self.spans, "removed": sum(self.removed.values())}
+            stats.update(("removed_" + reason, count) for reason, count in self.removed.items())
+            stats.update(("scenarios_" + stage, count) for stage, count in self.scenarios.items())
+            return stats
+
+    def collapse(self, entities: {(int, int): {str}}, ancestry: {str: {str}}, relationTable: dict) -> dict:
+        """ Collapse the concepts of the spans of a sentence
+
+        Params:
+            entities ({(int, int): {str}}): The names of the concepts detected at each of the spans of the sentence
+            ancestry ({str: {str}}): The names of the ancestors of each concept (see ExtractionEngine.ancestry)
+            relationTable (dict): The relations that can be formed between each pair of concepts
+
+        Returns:
+            {(int, int): {str}}: The collapsed concepts of each of the spans
+        """
+
+        removed = {"hierarchy": 0, "relations": 0}
+
+        collapsed = {}
+        for span, concepts in entities.items():
+            kept = concepts
+
+            if self.policy == self.SPECIFIC:
+                # Discard the concepts that are the ancestor of another of the span's concepts
+                ancestors = set().union(*(ancestry.get(concept, ()) for concept in concepts))
+                kept = {concept for concept in concepts if concept not in ancestors}
+
+            elif self.policy == self.GENERAL:
+                # Discard the concepts that have an ancestor among the span's concepts
+                kept = {concept for concept in concepts if not concepts.intersection(ancestry.get(concept, ()))}
+
+            removed["hierarchy"] += len(concepts) - len(kept)
+            collapsed[span] = kept
+
+        if self.applicable and len(collapsed) > 1:
+            hierarchy = dict(collapsed)
+            for span, concepts in hierarchy.items():
+                if len(concepts) < 2: continue
+
+                others = {other for key, group in hierarchy.items() if key != span for other in group}
+                kept = {
+                    concept for concept in concepts
+                    if any((concept, other) in relationTable or (other, concept) in relationTable for other in others)
+                }
+
+                if kept and len(kept) < len(concepts):
+                    removed["relations"] += len(concepts) - len(kept)
+                    collapsed[span] = kept
+
+        before, after = 1, 1
+        for span, concepts in entities.items():
+            before *= len(concepts)
+            after *= len(collapsed[span])
+
+        with self._lock:
+            self.spans += len(entities)
+            for reason, count in removed.items(): self.removed[reason] += count
+            self.scenarios["before"] += before
+            self.scenarios["after"] += after
+
+        return collapsed
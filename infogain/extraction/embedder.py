@@ -1,16 +1,196 @@
+import os
 import re
+import hashlib
+import bisect
+import threading
 import numpy
 import math
-from gensim.models import Word2Vec
 
 from .. import resources
 
 import logging
 log = logging.getLogger(__name__)
 
+class WordVectors:
+    """ A read only table of word vectors held as uncompressed arrays such that the table can be memory mapped and
+    shared between processes. The vocabulary is held sorted (as utf-8 bytes) alongside the row of each word, such that
+    words are found with a binary search rather than a mapping that would need to be built on load.
+
+    The vectors may be held at a reduced precision (see `quantise`) - as float16, or as int8 with a float32 scale per
+    row. Vectors are always read as float32 through `gather`.
+
+    Params:
+        vocabulary (numpy.array) - The sorted words of the table as fixed width bytes
+        rows (numpy.array) - The row of the vectors matrix for each of the sorted words
+        vectors (numpy.array) - The matrix of word vectors
+        scales (numpy.array) - The scale of each row of int8 quantised vectors, None for floating point vectors
+    """
+
+    PRECISIONS = ("float32", "float16", "int8")
+
+    _FILES = ("vocabulary.npy", "rows.npy", "vectors.npy")
+
+    def __init__(self, vocabulary: numpy.array, rows: numpy.array, vectors: numpy.array, scales: numpy.array = None):
+        self.vocabulary = vocabulary
+        self.wordRows = rows
+        self.vectors = vectors
+        self.scales = scales
+
+    def __len__(self): return len(self.vocabulary)
+
+    @property
+    def precision(self) -> str:
+        """ The precision the vectors are held at, one of PRECISIONS """
+        return "int8" if self.scales is not None else self.vectors.dtype.name
+
+    @classmethod
+    def fromKeyedVectors(cls, wv: object):
+        """ Generate a table from the keyed vectors of a gensim model
+
+        Params:
+            wv (KeyedVectors) - The keyed vectors of a word embedding model
+
+        Returns:
+            WordVectors - The table of the vectors
+        """
+        words = wv.index_to_key if hasattr(wv, "index_to_key") else wv.index2word
+        vocabulary = numpy.array([word.encode("utf-8") for word in words], dtype=bytes)
+        order = numpy.argsort(vocabulary, kind="stable")
+        return cls(vocabulary[order], order.astype(numpy.int64), numpy.asarray(wv.vectors, dtype=numpy.float32))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """ Load a table saved into a directory
+
+        Params:
+            path (str) - The directory of the table
+            mmap (bool) - Toggle to memory map the arrays in read only mode rather than read them into memory
+        """
+        arrays = [numpy.load(os.path.join(path, name), mmap_mode="r" if mmap else None) for name in cls._FILES]
+
+        scalesPath = os.path.join(path, "scales.npy")
+        scales = numpy.load(scalesPath, mmap_mode="r" if mmap else None) if os.path.exists(scalesPath) else None
+
+        return cls(*arrays, scales=scales)
+
+    def save(self, path: str) -> None:
+        """ Save the table into a directory as uncompressed arrays
+
+        Params:
+            path (str) - The directory to save the table into, created if it doesn't exist
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in zip(self._FILES, (self.vocabulary, self.wordRows, self.vectors)):
+            numpy.save(os.path.join(path, name), array)
+
+        # Remove the scales of a previously saved quantised table
+        scalesPath = os.path.join(path, "scales.npy")
+        if self.scales is not None: numpy.save(scalesPath, self.scales)
+        elif os.path.exists(scalesPath): os.remove(scalesPath)
+
+    def quantise(self, precision: str):
+        """ Create a copy of the table with its vectors held at a reduced precision. float16 halves the memory of the
+        vectors, int8 quarters it by scaling each row such that its largest magnitude element is 127.
+
+        Params:
+            precision (str) - The precision of the vectors, one of PRECISIONS
+
+        Returns:
+            WordVectors - The table at the precision
+        """
+
+        if precision not in self.PRECISIONS:
+            raise ValueError("Invalid precision '{}', expected one of {}".format(precision, self.PRECISIONS))
+
+        vectors = self.gather(numpy.arange(len(self.vectors)))
+        if precision != "int8":
+            return WordVectors(self.vocabulary, self.wordRows, vectors.astype(precision))
+
+        scales = numpy.abs(vectors).max(axis=1)/127
+        scales[scales == 0] = 1
+        quantised = numpy.rint(vectors/scales[:, None]).astype(numpy.int8)
+        return WordVectors(self.vocabulary, self.wordRows, quantised, scales.astype(numpy.float32))
+
+    def gather(self, rows: numpy.array) -> numpy.array:
+        """ Read the vectors of a collection of rows as float32, restoring the scale of quantised vectors
+
+        Params:
+            rows (numpy.array) - The rows of the vectors matrix to be read
+
+        Returns:
+            numpy.array - A float32 matrix of the vectors of the rows
+        """
+        vectors = self.vectors[rows].astype(numpy.float32)
+        if self.scales is not None: vectors *= self.scales[rows, None]
+        return vectors
+
+    def size(self) -> int:
+        """ The size of the word vectors """
+        return self.vectors.shape[1]
+
+    def rows(self, words: [str]) -> numpy.array:
+        """ Find the rows of the vectors matrix for a collection of words
+
+        Params:
+            words ([str]) - The words to be found
+
+        Returns:
+            numpy.array - The row of each word, -1 for words not in the table
+        """
+
+        rows = numpy.full(len(words), -1, dtype=numpy.int64)
+        if not len(self.vocabulary) or not len(words): return rows
+
+        # Words wider than the vocabulary cannot be present (and would be truncated)
+        encoded = [word.encode("utf-8") for word in words]
+        fits = numpy.array([len(word) <= self.vocabulary.itemsize for word in encoded])
+
+        query = numpy.array(encoded, dtype=self.vocabulary.dtype)
+        positions = numpy.minimum(numpy.searchsorted(self.vocabulary, query), len(self.vocabulary) - 1)
+        found = fits & (self.vocabulary[positions] == query)
+
+        rows[found] = self.wordRows[positions[found]]
+        return rows
+
+class Corpus:
+    """ A restartable iterable over the tokenised sentences of a collection of documents. Each iteration streams the
+    sentences of the documents such that an embedding model can make multiple passes over the corpus without it being
+    held in memory as words. Sentences are tokenised the same as the Embedder tokenises them for embedding - the runs
+    of characters between spaces with any non alphabetical characters removed - such that the words trained are the
+    words that are looked up.
+
+    Params:
+        documents ([Document]) - The documents of the corpus
+    """
+
+    def __init__(self, documents: ["Document"]):
+        self._documents = documents
+
+    def __iter__(self):
+        for document in self._documents:
+            for sentence in document.sentences():
+                words = Embedder._NONALPHA_RGX.sub("", sentence).split()
+                if words: yield words
+
+    def save(self, path: str) -> None:
+        """ Write the tokenised corpus to a file, a sentence per line with words separated by spaces
+
+        Params:
+            path (str) - The location of the corpus file
+        """
+        with open(path, "w") as handler:
+            for words in self:
+                handler.write(" ".join(words) + "\n")
+
 class Embedder:
     """ Embeds words and sentences into a vector of real values.
 
+    Words are the runs of characters between spaces with any non alphabetical characters removed, such that the
+    embedding of a sentence is the mean of the embeddings of its words. Embeddings are float32.
+
+    When a model is not provided, the model is loaded or trained upon its first use rather than on construction. Use
+    `Embedder.shared` to share a single embedder between all users of the same configuration.
+
     Params:
         word_embedding_model (Word2Vec) - A word to vector model already made and generated
         embedding_size (int) - The size of the embedded vectors
@@ -18,37 +198,235 @@ class Embedder:
         workers (int) - The number of processes to be used to help train the model
     """
 
+    isSparse = False  # Embeddings are dense arrays
+
+    _RUN_RGX = re.compile(r"[^ ]+")  # Characters between spaces
+    _NONALPHA_RGX = re.compile(r"[^A-Za-z ]")
+
+    _shared = {}  # The embedders shared between users, keyed by their configuration
+    _sharedLock = threading.Lock()
+
     def __init__(self,
-        word_embedding_model: Word2Vec = None,
+        word_embedding_model: "Word2Vec" = None,
         embedding_size: int = 300,
         count: int = 10,
         workers: int = 4):
 
-        if word_embedding_model is None:
-            if resources.hasEmbedder():
-                self.model = resources.loadEmbedder()
-            else:
-                self.model = Word2Vec(resources.TEXT(), size=embedding_size, min_count=count, workers=workers)
-        else:
-            self.model = word_embedding_model
+        self._configuration = (embedding_size, count, workers)
+        self._lock = threading.Lock()
+
+        self._model = None  # A trainable word embedding model
+        self._table = None  # Read only word vectors - used in place of a model
+        self._index = None  # Mapping of the vocabulary words onto their rows of the model vectors matrix
+        self._zero = None  # The shared embedding of unrecognised words
+        self._digest = None  # The digest of the vocabulary and vectors
+
+        if word_embedding_model is not None: self._setModel(word_embedding_model)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
 
-    def train(self, sentences: [[str]]) -> None:
-        """ Train the model on a collection of sentences
+    @classmethod
+    def shared(cls, embedding_size: int = 300, count: int = 10, workers: int = 4):
+        """ Return the embedder for the configuration that is shared by all of its users. The embedder is created on
+        the first request for the configuration and its model is generated on its first use.
+
+        Params:
+            embedding_size (int) - The size of the embedded vectors
+            count (int) - The number of times a word needs to be seen before an embedding is made
+            workers (int) - The number of processes to be used to help train the model
+
+        Returns:
+            Embedder - The shared embedder
+        """
+        configuration = (embedding_size, count, workers)
+        with cls._sharedLock:
+            if configuration not in cls._shared:
+                cls._shared[configuration] = cls(None, *configuration)
+            return cls._shared[configuration]
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """ Create an embedder from word vectors exported with `export`. The embedder is read only, it can embed but
+        cannot be trained. When memory mapped, processes loading the same vectors share their pages and the embedder
+        is available immediately.
+
+        Params:
+            path (str) - The directory the vectors were exported to
+            mmap (bool) - Toggle to memory map the vectors rather than reading them into memory
+
+        Returns:
+            Embedder - A read only embedder of the vectors
+        """
+        embedder = cls()
+        embedder._setTable(WordVectors.load(path, mmap=mmap))
+        return embedder
+
+    def export(self, path: str, precision: str = None) -> None:
+        """ Export the word vectors of the embedder into a directory of uncompressed arrays that can be memory mapped.
+        Only the vectors and the vocabulary are kept, the training state of the model is not required to embed.
+
+        Params:
+            path (str) - The directory the vectors are to be written into
+            precision (str) - The precision to export the vectors at (see WordVectors.quantise), the precision of the
+                embedder's vectors when None
+        """
+        self._exportTable(precision).save(path)
+
+    def quantise(self, precision: str):
+        """ Create a read only embedder of the embedder's vectors held at a reduced precision, see WordVectors.quantise
+
+        Params:
+            precision (str) - The precision of the vectors, one of WordVectors.PRECISIONS
+
+        Returns:
+            Embedder - A read only embedder of the quantised vectors
+        """
+        embedder = Embedder(None, *self._configuration)
+        embedder._setTable(self._exportTable(precision))
+        return embedder
+
+    def precision(self) -> str:
+        """ Return the precision the word vectors of the embedder are held at """
+        return self._table.precision if self._table is not None else self._vectors().dtype.name
+
+    def _exportTable(self, precision: str = None) -> WordVectors:
+        """ The word vectors of the embedder as a table at a precision """
+        self._vectors()
+        table = self._table if self._table is not None else WordVectors.fromKeyedVectors(self._model.wv)
+        return table if precision is None or precision == table.precision else table.quantise(precision)
+
+    @property
+    def model(self) -> "Word2Vec":
+        """ The word embedding model - loaded or trained upon first use when not provided. None for an embedder of
+        read only vectors """
+        self._vectors()
+        return self._model
+
+    def _vectors(self) -> numpy.array:
+        """ Return the matrix of word vectors, generating the source of the vectors upon first use. Exported vectors
+        are preferred as they are memory mapped, then a stored model, and finally a model is trained.
+        """
+        if self._model is None and self._table is None:
+            with self._lock:
+                if self._model is None and self._table is None:
+                    if resources.hasVectors():
+                        self._setTable(WordVectors.load(resources.VECTORS))
+                    elif resources.hasEmbedder():
+                        self._setModel(resources.loadEmbedder())
+                    else:
+                        import gensim
+                        from gensim.models import Word2Vec
+                        size, count, workers = self._configuration
+
+                        # The dimension of the vectors is named vector_size from gensim 4
+                        dimension = "vector_size" if int(gensim.__version__.split(".")[0]) >= 4 else "size"
+                        self._setModel(
+                            Word2Vec(resources.TEXT(), **{dimension: size}, min_count=count, workers=workers)
+                        )
+
+        return self._table.vectors if self._table is not None else self._model.wv.vectors
+
+    def _setModel(self, model: "Word2Vec") -> None:
+        """ Set the model of the embedder and reset the information derived from the model """
+        self._index = None
+        self._digest = None
+        self._zero = numpy.zeros(model.wv.vector_size, dtype=numpy.float32)
+        self._zero.flags.writeable = False
+        self._model = model
+
+    def _setTable(self, table: "WordVectors") -> None:
+        """ Set read only vectors as the source of the embedder in place of a model """
+        self._digest = None
+        self._zero = numpy.zeros(table.size(), dtype=numpy.float32)
+        self._zero.flags.writeable = False
+        self._table = table
+
+    def trainable(self) -> bool:
+        """ Return whether the embedder has a model that can be trained, rather than read only vectors """
+        self._vectors()
+        return self._model is not None
+
+    def train(self, sentences: [[str]] = None, corpus_file: str = None) -> None:
+        """ Train the model on a collection of sentences. The vocabulary is updated once with the collection before
+        the model is trained over it, the collection may be any restartable iterable (such as a Corpus) as it is not
+        held in memory. Alternatively a pre-tokenised corpus file can be provided, which allows the model to train with
+        its workers without being bound by a single reading thread.
 
         Params:
             sentences ([[str]]) - A collection of sentences broken down into a list of words.
                 Words are kept in order in a sentence to train semantics.
+            corpus_file (str) - Path to a file of sentences, a sentence per line with words separated by spaces
+
+        Raises:
+            RuntimeError - In the event that the embedder is made from read only vectors
         """
-        self.model.build_vocab(sentences, update=True)
-        self.model.train(sentences, total_examples=len(sentences), epochs=self.model.epochs)
+        if not self.trainable(): raise RuntimeError("Cannot train an embedder of read only word vectors")
+
+        model = self.model
+        if corpus_file is not None:
+            model.build_vocab(corpus_file=corpus_file, update=True)
+            model.train(
+                corpus_file=corpus_file,
+                total_examples=model.corpus_count,
+                total_words=model.corpus_total_words,
+                epochs=model.epochs
+            )
+        else:
+            model.build_vocab(sentences, update=True)
+            model.train(sentences, total_examples=model.corpus_count, epochs=model.epochs)
+        self._index = None
+        self._digest = None
+
+    def digest(self) -> str:
+        """ Return a digest of the vocabulary and word vectors of the embedder. Embedders with the same digest
+        produce the same embeddings, such that information derived from embeddings can be invalidated when the embedder
+        is trained or replaced. The digest is computed once per state of the embedder.
+
+        Returns:
+            str - The hex digest of the embedder
+        """
+        if self._digest is None:
+            vectors = self._vectors()
+
+            if self._table is not None:
+                words, rows = self._table.vocabulary, self._table.wordRows
+            else:
+                wv = self._model.wv
+                keys = wv.index_to_key if hasattr(wv, "index_to_key") else wv.index2word
+                words = numpy.array([word.encode("utf-8") for word in keys], dtype=bytes)
+                rows = numpy.arange(len(words), dtype=numpy.int64)
+
+            # The vocabulary is ordered differently between models and tables - digest the words in row order
+            ordered = numpy.empty_like(words)
+            ordered[rows] = words
+
+            digest = hashlib.sha1()
+            digest.update(str(vectors.shape).encode("utf-8"))
+            digest.update(b"\0".join(ordered.tolist()))
+            if self._table is not None and self._table.precision != "float32":
+                digest.update(self._table.precision.encode("utf-8"))
+                digest.update(numpy.ascontiguousarray(vectors).data)
+                if self._table.scales is not None: digest.update(numpy.ascontiguousarray(self._table.scales).data)
+            else:
+                digest.update(numpy.ascontiguousarray(vectors, dtype=numpy.float32).data)
+            self._digest = digest.hexdigest()
+
+        return self._digest
 
     def size(self) -> int:
         """ Return the size of the embedding vectors """
-        return self.model.trainables.layer1_size
+        return self._vectors().shape[1]
 
     def workers(self) -> int:
         """ Return the number of works being used by the embedding method """
-        return self.model.workers
+        return self.model.workers if self.trainable() else self._configuration[2]
 
     def word(self, word: str) -> numpy.array:
         """ Embed the provided word and return the real value vector that represents it
@@ -59,10 +437,48 @@ class Embedder:
         Returns:
             vector (numpy.array) - The embedded vector that represents the word
         """
-        if word not in self.model.wv:
+        self._vectors()
+        row = self._rows([word])[0]
+        if row < 0:
             # log.warning("Unrecognised word: {}".format(word))
-            return numpy.zeros(self.size())
-        return self.model.wv[word]
+            return self._zero
+        return self._gather(numpy.array([row]))[0]
+
+    def words(self, words: [str]) -> numpy.array:
+        """ Embed a collection of words together. The words are mapped onto their vocabulary rows in bulk and gathered
+        from the vectors matrix in a single indexing operation, unrecognised words take the shared zero vector.
+
+        Params:
+            words ([str]) - The words to be embedded
+
+        Returns:
+            matrix (numpy.array) - A matrix with the embedding of each word as a row
+        """
+
+        self._vectors()
+        rows = self._rows(words)
+
+        embeddings = self._gather(numpy.maximum(rows, 0))
+        embeddings[rows < 0] = self._zero
+        return embeddings
+
+    def _gather(self, rows: numpy.array) -> numpy.array:
+        """ Read the rows of the vectors matrix as a float32 matrix """
+        if self._table is not None: return self._table.gather(rows)
+        return self._model.wv.vectors[rows].astype(numpy.float32)
+
+    def _rows(self, words: [str]) -> numpy.array:
+        """ Return the rows of the vectors matrix for each of the words, -1 for unrecognised words """
+
+        if self._table is not None: return self._table.rows(words)
+
+        if self._index is None:
+            wv = self._model.wv
+            if hasattr(wv, "key_to_index"): self._index = wv.key_to_index
+            else: self._index = {word: vocab.index for word, vocab in wv.vocab.items()}
+
+        index = self._index
+        return numpy.fromiter((index.get(word, -1) for word in words), dtype=numpy.int64, count=len(words))
 
 
     def sentence(self, sentence: str) -> numpy.array:
@@ -76,8 +492,8 @@ class Embedder:
         Returns:
             vector (numpy.array) - A vector representation of the of the sentence
         """
-        sentence = re.sub("[^A-Za-z ]", "", sentence)
-        embedding = numpy.zeros(self.size())  # Sentence embedding
+        sentence = self._NONALPHA_RGX.sub("", sentence)
+        embedding = numpy.zeros(self.size(), dtype=numpy.float32)  # Sentence embedding
         words = sentence.split()  # Words of the sentence
 
         def pf(index: int, alpha: float = 1, beta: float = 0) -> float:
@@ -91,8 +507,85 @@ class Embedder:
             """
             return 1
 
-        # Embed the words of the sentence
-        for index, word in enumerate(words): embedding += pf(index)*self.word(word)
+        # Embed the words of the sentence together, weighted by their position
+        if len(words):
+            weights = numpy.array([pf(index) for index in range(len(words))], dtype=numpy.float32)
+            embedding = weights @ self.words(words)/len(words)
+        return embedding
+
+    def sentences(self, sentences: [str]) -> numpy.array:
+        """ Embed a collection of sentences together. The words of all the sentences are embedded in bulk and reduced
+        into their sentences with a single segmented sum. The embedding of each sentence is identical to `sentence`.
+
+        Params:
+            sentences ([str]) - The sentences to be embedded
+
+        Returns:
+            matrix (numpy.array) - A matrix with the embedding of each sentence as a row
+        """
+
+        tokenised = [self._NONALPHA_RGX.sub("", sentence).split() for sentence in sentences]
+        lengths = numpy.array([len(words) for words in tokenised], dtype=numpy.int64)
+
+        embeddings = numpy.zeros((len(sentences), self.size()), dtype=numpy.float32)
+        if not lengths.sum(): return embeddings
+
+        # Sum the word vectors of each of the non empty sentences - reduceat cannot express an empty segment
+        offsets = numpy.concatenate(([0], numpy.cumsum(lengths)[:-1]))
+        populated = lengths > 0
+
+        vectors = self.words([word for words in tokenised for word in words])
+        embeddings[populated] = numpy.add.reduceat(vectors, offsets[populated], axis=0)
+        embeddings[populated] /= lengths[populated, None]
+
+        return embeddings
+
+    def sentence_spans(self, sentence: str, spans: [(int, int)]) -> numpy.array:
+        """ Embed a collection of spans of a single sentence. The sentence is tokenised once into a matrix of word
+        vectors and its cumulative sum such that the mean embedding of any span of words costs a single subtraction.
+        The embedding of each span is identical to embedding the span's text with `sentence`, words that are cut by the
+        boundary of a span are embedded as the part of the word within the span.
+
+        Params:
+            sentence (str) - The sentence that the spans index into
+            spans ([(int, int)]) - The start and end character offsets of the spans to be embedded
+
+        Returns:
+            matrix (numpy.array) - A matrix with the embedding of each span as a row
+        """
+
+        # Tokenise the sentence - recording the character offsets of each of the words
+        starts, ends, words = [], [], []
+        for match in self._RUN_RGX.finditer(sentence):
+            word = self._NONALPHA_RGX.sub("", match.group(0))
+            if word:
+                starts.append(match.start())
+                ends.append(match.end())
+                words.append(word)
+
+        # The cumulative sum of the word vectors - the sum of words [i, j) is cumulative[j] - cumulative[i]. The sums
+        # are held in float64 as the difference of two long running sums loses the precision of a short span
+        cumulative = numpy.zeros((len(words) + 1, self.size()))
+        if words: numpy.cumsum(self.words(words), axis=0, out=cumulative[1:])
+
+        embeddings = numpy.zeros((len(spans), self.size()), dtype=numpy.float32)
+        for row, (start, end) in enumerate(spans):
+
+            # The words that are entirely within the span
+            first = bisect.bisect_left(starts, start)
+            last = bisect.bisect_right(ends, end)
+
+            embedding = cumulative[max(first, last)] - cumulative[first]
+            count = max(0, last - first)
+
+            # Words that are cut by the span boundaries contribute their part within the span
+            for index in {first - 1, last}:
+                if 0 <= index < len(words) and starts[index] < end and start < ends[index]:
+                    part = self._NONALPHA_RGX.sub("", sentence[max(start, starts[index]): min(end, ends[index])])
+                    if part:
+                        embedding = embedding + self.word(part)
+                        count += 1
+
+            if count: embeddings[row] = embedding/count
 
-        if len(words): embedding = embedding/len(words)
-        return embedding
\ No newline at end of file
+        return embeddings
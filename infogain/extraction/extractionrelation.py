@@ -1,39 +1,208 @@
+import os
+import pickle
+
 import numpy as np
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import log_loss
 from sklearn.neural_network import MLPClassifier
 
 from ..artefact import Annotation
 from ..knowledge import Relation
 
+from .kernel import MLPKernel
+from .featurestore import FeatureStore
+
 import logging
 log = logging.getLogger(__name__)
 
+def fitClassifier(classifier: object, embeddings: np.ndarray, classifications: [int]) -> object:
+    """ Fit a classifier on the training data of a relation. Defined at the module level such that the relations of an
+    engine can be trained in worker processes, only the classifier and the training data are sent to the worker.
+
+    Params:
+        classifier (object): The unfitted classifier of the relation
+        embeddings (np.ndarray): The matrix of concatenated context embeddings, a row per point (dense or sparse)
+        classifications ([int]): The classification of each of the points
+
+    Returns:
+        object: The fitted classifier
+    """
+    classifier.fit(embeddings, classifications)
+    return classifier
+
 class ExtractionRelation(Relation):
+    """ A relation that predicts the classification of annotations from their context embeddings with a classifier.
+    The classifier backend is pluggable, any object providing the sklearn `fit` and `predict_proba` interface can be
+    used (`partial_fit` is additionally required for incremental training). Fitted MLP classifiers are compiled into an
+    MLPKernel for classification.
 
-    def __init__(self, *args, **kwargs):
-        self.classifier = MLPClassifier(hidden_layer_sizes=(900, 50, 20))
+    Params:
+        *args, **kwargs - The arguments of the Relation
+        classifier (str|object|callable) - The classifier backend of the relation. Either the name of one of the
+            BACKENDS, a classifier object which is cloned for the relation, or a callable returning a new classifier
+    """
+
+    # The classes an incrementally trained classifier is told about up front, as a batch may not contain all of them
+    CLASSES = np.array([Annotation.NEGATIVE, Annotation.INSUFFICIENT, Annotation.POSITIVE])
+
+    BACKENDS = {
+        "mlp": lambda: MLPClassifier(hidden_layer_sizes=(900, 50, 20)),
+        "small-mlp": lambda: MLPClassifier(hidden_layer_sizes=(50,)),
+        "logistic": lambda: LogisticRegression(max_iter=1000),
+        "sgd": lambda: SGDClassifier(loss="log_loss", alpha=1e-4)
+    }
+
+    def __init__(self, *args, classifier = "mlp", **kwargs):
+        self.classifier = self.backend(classifier)
         self.fitted = False
+        self.version = 0  # Incremented each time the model of the relation changes
+        self._kernel = None
+        self.losses = []
+        self._bestLoss, self._stale = np.inf, 0
         super().__init__(*args, **kwargs)
 
+    @staticmethod
+    def stack(embeddings: [tuple]):
+        """ Concatenate the context embeddings of each of a collection of points into a matrix with a row per point.
+        Sparse context embeddings (see HashingEmbedder) are stacked into a sparse matrix.
+
+        Params:
+            embeddings ([tuple]): The (left, middle, right) context embeddings of each of the points
+
+        Returns:
+            np.ndarray|sparse.csr_matrix: The matrix of the points
+        """
+        if len(embeddings) and sparse.issparse(embeddings[0][0]):
+            return sparse.vstack([sparse.hstack(embedding) for embedding in embeddings], format="csr")
+        return np.array([np.concatenate(embedding) for embedding in embeddings])
+
     def fit(self, annotations: [Annotation]) -> None:
         """ Use the datapoints to train the relation model
 
         Params:
-            datapoints (Annotation) - A collection of datapoints for this relation to train on
+            datapoints (Annotation|FeatureStore) - A collection of datapoints for this relation to train on, or a
+                feature store holding the embedded datapoints of the relation. The embeddings of the datapoints may be
+                dense or sparse
+        """
+        self.install(fitClassifier(self.classifier, *self.trainingData(annotations)))
+
+    def trainingData(self, annotations: [Annotation], embeddings = None) -> (np.ndarray, [int]):
+        """ Collect the training matrix and labels of the relation from its datapoints, such that the classifier can be
+        fitted apart from the relation (see `fitClassifier` and `install`)
+
+        Params:
+            datapoints (Annotation|FeatureStore) - A collection of embedded datapoints of the relation, or a feature
+                store holding the embedded datapoints of the relation
+            embeddings (np.ndarray|sparse.csr_matrix) - The matrix of the datapoints, a row per datapoint, when it has
+                already been computed. The embeddings of the datapoints are stacked when None
+
+        Returns:
+            np.ndarray|sparse.csr_matrix: The matrix of concatenated context embeddings, a row per datapoint
+            [int]: The classification of each of the datapoints
+
+        Raises:
+            RuntimeError: In the event that the relation cannot be trained or there are no datapoints
         """
 
+        if self.classifier is None:
+            raise RuntimeError("The '{}' relation was restored without its classifier and cannot be trained".format(
+                self.name
+            ))
+
+        # Convert the point structure usable by sklearn
+        if isinstance(annotations, FeatureStore):
+            Xtr, ttr = annotations.relation(self.name)
+        else:
+            annotations = list(annotations)
+            Xtr = self.stack([ann.embedding for ann in annotations]) if embeddings is None else embeddings
+            ttr = [ann.classification for ann in annotations]
+
         # Do nothing if no datapoints have been provided
-        if not len(annotations):
+        if not len(ttr):
             raise RuntimeError("Called fit on model with no training data for '{}' relation".format(self.name))
 
-        # Convert the point structure usable by sklearn
-        Xtr, ttr = [], []
-        for ann in annotations:
-            Xtr.append(np.concatenate(ann.embedding))
-            ttr.append(ann.classification)
+        return Xtr, ttr
+
+    def install(self, classifier: object) -> None:
+        """ Replace the model of the relation with a classifier fitted on its training data
+
+        Params:
+            classifier (object): The fitted classifier of the relation
+        """
+        self.classifier = classifier
+        self.fitted = True
+        self.version += 1
+        self._kernel = None
+
+    def seed(self, seed: int) -> None:
+        """ Seed the random state of the classifier such that its training is reproducible. Classifiers without a
+        random_state parameter are left as they are
+
+        Params:
+            seed (int): The seed of the classifier, between 0 and 2**32 - 1
+        """
+        if self.classifier is None or not hasattr(self.classifier, "get_params"): return
+        if "random_state" in self.classifier.get_params(deep=False):
+            self.classifier.set_params(random_state=seed)
+
+    def partial_fit(self, embeddings: np.ndarray, classifications: np.ndarray) -> float:
+        """ Update the relation model with a mini-batch of embedded points without revisiting previous batches. The loss
+        of each batch is recorded, and the relation is considered converged once the loss has failed to improve by the
+        classifier's tolerance for its configured number of consecutive batches.
+
+        An untrained classifier is told about all of the CLASSES up front. A classifier that has been trained (by `fit`)
+        keeps the classes it was trained with, such that a fitted relation can be updated with new data.
+
+        Params:
+            embeddings (np.ndarray): A matrix of concatenated context embeddings, a row per point (dense or sparse)
+            classifications (np.ndarray): The classification of each of the points
+
+        Returns:
+            float: The loss of the classifier on the batch
+        """
+
+        if self.classifier is None:
+            raise RuntimeError("The '{}' relation was restored without its classifier and cannot be trained".format(
+                self.name
+            ))
 
-        # Fit the classifier
-        self.classifier.fit(Xtr, ttr)
+        if not np.shape(embeddings)[0]:
+            raise RuntimeError("Called partial_fit on model with no training data for '{}' relation".format(self.name))
+
+        if not hasattr(self.classifier, "partial_fit"):
+            raise RuntimeError("The classifier of the '{}' relation cannot be trained incrementally".format(self.name))
+
+        if hasattr(self.classifier, "classes_"):
+            self.classifier.partial_fit(embeddings, classifications)
+        else:
+            self.classifier.partial_fit(embeddings, classifications, classes=self.CLASSES)
         self.fitted = True
+        self.version += 1
+        self._kernel = None
+
+        # Track the convergence of the classifier - measure the loss of the batch for backends that don't report one
+        loss = getattr(self.classifier, "loss_", None)
+        if loss is None:
+            loss = log_loss(classifications, self.classifier.predict_proba(embeddings), labels=self.classifier.classes_)
+        self.losses.append(loss)
+        if loss < self._bestLoss - getattr(self.classifier, "tol", 1e-4):
+            self._bestLoss, self._stale = loss, 0
+        else:
+            self._stale += 1
+
+        return loss
+
+    @property
+    def converged(self) -> bool:
+        """ Whether the incremental training of the relation has stopped improving """
+        return self._stale >= getattr(self.classifier, "n_iter_no_change", 10)
+
+    def resetConvergence(self) -> None:
+        """ Forget the convergence history of the relation such that it may be trained on newly provided data. The
+        recorded losses are kept """
+        self._bestLoss, self._stale = np.inf, 0
 
     def predict(self, point: Annotation) -> Annotation:
         """ Use the relation model to predict on a collection of points and return the points
@@ -42,22 +211,120 @@ class ExtractionRelation(Relation):
             points (Annotation) - A collection of datapoints to be predicted on
         """
 
+        classifications, probabilities = self.classify(self.stack([point.embedding]))
+        point.classification, point.probability = classifications[0], probabilities[0]
+        return point
+
+    def classify(self, embeddings: np.ndarray) -> (np.ndarray, np.ndarray):
+        """ Classify a collection of embedded points with the relation model in a single call, returning the most
+        likely class of each point and the probability of that class.
+
+        Params:
+            embeddings (np.ndarray): A matrix of concatenated context embeddings, a row per point (dense or sparse)
+
+        Returns:
+            np.ndarray: The most likely class for each of the points
+            np.ndarray: The probability of the chosen class for each of the points
+        """
+
         if not self.fitted:
             raise RuntimeError("attempted to run predict with '{}' relation before being trained".format(self.name))
 
-        # Predict the point with the relation's classifier
-        probs = self.classifier.predict_proba([np.concatenate(point.embedding)])[0]
+        model = self.compile()
 
-        # Convert probability vector into the class and associated probability of the most likely class
-        point.classification, point.probability = max(zip(self.classifier.classes_, probs), key = lambda x: x[1])
-        return point
+        # Convert probability vectors into the class and associated probability of the most likely class
+        probs = model.predict_proba(embeddings)
+        best = probs.argmax(axis=1)
+        return model.classes_[best], probs[np.arange(len(best)), best]
+
+    def compile(self) -> object:
+        """ Compile the fitted classifier into its inference kernel, the kernel is kept until the classifier is trained
+        again. Classifiers without a kernel are used as they are.
+
+        Returns:
+            object: The kernel of the classifier or the classifier itself
+
+        Raises:
+            RuntimeError: In the event that the relation has not been fitted
+        """
+        if not self.fitted:
+            raise RuntimeError("attempted to compile '{}' relation before being trained".format(self.name))
+
+        if self._kernel is not None: return self._kernel
+        if not isinstance(self.classifier, MLPClassifier): return self.classifier
+        self._kernel = MLPKernel.fromClassifier(self.classifier)
+        return self._kernel
+
+    def save(self, path: str, *, trainable: bool = False) -> None:
+        """ Save the fitted model of the relation into a directory. MLP classifiers are saved as the uncompressed arrays
+        of their kernel, such that they can be memory mapped, any other classifier is pickled.
+
+        Params:
+            path (str): The directory to save the model into, created if it doesn't exist
+            *,
+            trainable (bool): Toggle to additionally pickle MLP classifiers such that training can be continued
+
+        Raises:
+            RuntimeError: In the event that the relation has not been fitted
+        """
+        model = self.compile()
+
+        os.makedirs(path, exist_ok=True)
+        if isinstance(model, MLPKernel): model.save(path)
+        if trainable or not isinstance(model, MLPKernel):
+            with open(os.path.join(path, "classifier.pkl"), "wb") as handler:
+                pickle.dump(self.classifier, handler)
+
+    def restore(self, path: str, mmap: bool = True) -> None:
+        """ Restore the fitted model of the relation from a directory written by `save`. A relation restored from only
+        a kernel can classify but cannot be trained.
+
+        Params:
+            path (str): The directory of the saved model
+            mmap (bool): Toggle to memory map the kernel weights rather than read them into memory
+        """
+        classifierPath = os.path.join(path, "classifier.pkl")
+        if os.path.exists(classifierPath):
+            with open(classifierPath, "rb") as handler:
+                self.classifier = pickle.load(handler)
+        else:
+            self.classifier = None
+
+        self._kernel = MLPKernel.load(path, mmap=mmap) if os.path.exists(os.path.join(path, "kernel.json")) else None
+        self.fitted = True
+        self.version += 1
+
+    @classmethod
+    def backend(cls, classifier) -> object:
+        """ Create a new classifier from a classifier specification
+
+        Params:
+            classifier (str|object|callable) - The name of one of the BACKENDS, a classifier object to be cloned or a
+                callable that returns a new classifier
+
+        Returns:
+            object: An unfitted classifier
+
+        Raises:
+            ValueError - In the event that the specification doesn't describe a classifier
+        """
+        if isinstance(classifier, str):
+            if classifier not in cls.BACKENDS:
+                raise ValueError("Unknown classifier backend '{}', expected one of {}".format(
+                    classifier, ", ".join(cls.BACKENDS)
+                ))
+            return cls.BACKENDS[classifier]()
+        if not isinstance(classifier, type) and hasattr(classifier, "fit"): return clone(classifier)
+        if callable(classifier): return classifier()
+        raise ValueError("Classifier backend must be a backend name, classifier or callable - {}".format(classifier))
 
     @classmethod
-    def fromRelation(self, relation: Relation):
-        return ExtractionRelation(
+    def fromRelation(cls, relation: Relation, classifier = "mlp"):
+        return cls(
             relation.domains,
             relation.name,
             relation.targets,
             rules = [rule for rule in relation.rules],
-            differ = relation.differ
+            differ = relation.differ,
+            classifier = classifier
         )
\ No newline at end of file
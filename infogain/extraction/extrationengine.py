@@ -1,30 +1,49 @@
 import os
 import sys
+import json
 import weakref
+import zlib
 import collections
+import concurrent.futures
 import re
 from tqdm import tqdm
 import itertools
+import numpy as np
+from scipy import sparse
 
 from ..artefact import Document, Entity, Annotation
 from ..knowledge import Concept, Relation
 from ..knowledge.ontology import Ontology, OntologyConcepts, OntologyRelations
-
-from .extractionrelation import ExtractionRelation
-from .embedder import Embedder
+from ..knowledge.revision import Revision
+from ..serialisers import SerialiserFactory
+
+from .extractionrelation import ExtractionRelation, fitClassifier
+from .candidates import Candidates
+from .embedder import Embedder, Corpus
+from .hashing import HashingEmbedder
+from .featurestore import FeatureStore
+from .cache import SentenceCache
+from .pruning import CandidatePruner
+from .collapse import ConceptCollapser
+from .multirelation import MultiRelationClassifier
+from .aliases import AliasMatcher
+from .instrumentation import EngineStats, NULL_RECORD
 
 import logging
 log = logging.getLogger(__name__)
 
 class ExtractionRelations(OntologyRelations):
 
-    def __init__(self, owner: weakref.ref, relationClass = ExtractionRelation):
-        self._ownerRef = owner
+    def __init__(self, owner: weakref.ref, relationClass = ExtractionRelation, classifier = "mlp", classifiers = None):
+        super().__init__(owner)
         self._relationClass = relationClass
-        self._elements = {}
+        self._classifier = classifier
+        self._classifiers = dict(classifiers or {})
 
     def add(self, relation: Relation) -> Relation:
-        if isinstance(relation, Relation): relation = self._relationClass.fromRelation(relation)
+        if isinstance(relation, Relation):
+            classifier = self._classifiers.get(relation.name, self._classifier)
+            relation = self._relationClass.fromRelation(relation, classifier=classifier)
         return super().add(relation)
 
 class ExtractionEngine(Ontology):
@@ -34,24 +53,61 @@ class ExtractionEngine(Ontology):
         name (str) - The name given to extractor
         ontology (Ontology) - An ontology object to be used to form the bases of the extraction
         *,
-        embedder (Embedder): Object that shall embed words and sentences into the apprioprate vectors for the models
+        embedder (Embedder): Object that shall embed words and sentences into the apprioprate vectors for the models.
+            Defaults to the shared embedder, whose model is only generated once it is first used. A HashingEmbedder
+            provides sparse hashed features in place of word vectors
         relation_class (ExtractionRelation): A Relation class implementing a method for predicting on embeddings
+        classifier (str|object|callable): The classifier backend of the relations, see ExtractionRelation.BACKENDS
+        classifiers ({str: str|object|callable}): Classifier backends for specific relations, keyed by relation name
+        cache (SentenceCache): A cache of the prediction results of sentences, sentences are not cached when None
+        pruner (CandidatePruner): A pruner of the candidate annotations of sentences, every candidate is classified when
+            None
+        multi_relation (str|object|callable): The classifier backend of a single MultiRelationClassifier shared by all
+            the relations in place of their own classifiers. Each relation has its own classifier when None
+        alias_distance (int): The maximum edit distance at which misspelled aliases of the concepts are detected, with
+            a confidence reduced by their distance (see AliasMatcher). Aliases are only detected exactly when 0
+        stats (EngineStats): Instrumentation recording the time spent in each stage of `fit` and `predict` and counts of
+            the work done, nothing is recorded when None
+        collapser (ConceptCollapser): A collapser of the concepts detected for each span using the concept hierarchy and
+            the relations, every detected concept is a scenario branch when None
     """
 
+    _INSTANCES = itertools.count()  # The identities of the engines of the process
+
     def __init__(
         self,
         name: str = None,
         ontology: Ontology = None,
         *,
-        embedder: Embedder = Embedder(),
-        relation_class = ExtractionRelation
+        embedder: Embedder = None,
+        relation_class = ExtractionRelation,
+        classifier = "mlp",
+        classifiers: dict = None,
+        cache: SentenceCache = None,
+        pruner: CandidatePruner = None,
+        multi_relation = None,
+        stats: EngineStats = None,
+        alias_distance: int = 0,
+        collapser: ConceptCollapser = None
     ):
         self.name = name
+        self.cache = cache
+        self.pruner = pruner
+        self.collapser = collapser
+        self.stats = stats
+
+        self._identity = next(ExtractionEngine._INSTANCES)  # Distinguishes the results of engines sharing a cache
+        self._multiRelation = multi_relation
+        self._shared = None  # The fitted multi-relation classifier
+        self._aliasDistance = alias_distance
 
         self._concepts = OntologyConcepts(weakref.ref(self))
-        self._relations = ExtractionRelations(weakref.ref(self), relation_class)
+        self._relations = ExtractionRelations(weakref.ref(self), relation_class, classifier, classifiers)
 
-        self._embedder = embedder
+        self._embedder = embedder if embedder is not None else Embedder.shared()
+        self._matcher = (None, None)
+        self._ancestry = (None, None)
+        self._classifiableTable = (None, None)
 
         if ontology:
             # Add each of the items of the provided ontology into the engine - clone elements to avoid coupling issues
@@ -64,151 +120,676 @@ class ExtractionEngine(Ontology):
             for relation in ontology.relations():
                 self.relations.add(relation.clone())
 
-    def fit(self, documents: [Document]):
-        """ Train the model on the collection of documents (InfoGain documents)
+    @classmethod
+    def load(cls, path: str, *, mmap: bool = True, relation_class = ExtractionRelation):
+        """ Load an engine from a bundle written by `save`. The word vectors and the relation kernels are memory mapped
+        such that the engine is available immediately, and processes that load the same bundle share their pages.
+        The embedder of the loaded engine is read only.
+
+        Params:
+            path (str) - The directory of the bundle
+            *,
+            mmap (bool) - Toggle to memory map the arrays of the bundle rather than read them into memory
+            relation_class (ExtractionRelation) - The Relation class of the saved relations
+
+        Returns:
+            ExtractionEngine: The engine saved in the bundle
+        """
+
+        with open(os.path.join(path, "engine.json")) as handler:
+            bundle = json.load(handler)
+
+        embedderClass = HashingEmbedder if bundle.get("embedder") == "hashing" else Embedder
+
+        engine = cls(
+            bundle["name"],
+            SerialiserFactory("json").load(os.path.join(path, "ontology.json")),
+            embedder=embedderClass.load(os.path.join(path, "vectors"), mmap=mmap),
+            relation_class=relation_class,
+            alias_distance=bundle.get("alias_distance", 0)
+        )
+
+        for name, directory in bundle["relations"].items():
+            engine.relations[name].restore(os.path.join(path, directory), mmap=mmap)
+
+        if bundle.get("multi_relation") is not None:
+            engine._shared = MultiRelationClassifier.load(os.path.join(path, bundle["multi_relation"]), mmap=mmap)
+            engine._multiRelation = engine._shared.classifier if engine._shared.classifier is not None else "mlp"
+
+        engine._matcher = (
+            Revision.current,
+            AliasMatcher.load(os.path.join(path, "aliases.json"), max_distance=engine._aliasDistance)
+        )
+        return engine
+
+    def save(self, path: str, *, trainable: bool = False, precision: str = None) -> None:
+        """ Save the engine into a bundle directory - the ontology (including the learnt aliases), the compiled alias
+        matcher, the word vectors of the embedder and the models of the fitted relations. Arrays are saved uncompressed
+        such that they can be memory mapped when the bundle is loaded.
+
+        Params:
+            path (str) - The directory of the bundle, created if it doesn't exist
+            *,
+            trainable (bool) - Toggle to additionally save the state required to continue training the relations
+                (see ExtractionRelation.save). The embedder of a loaded bundle cannot be trained regardless
+            precision (str) - The precision to save the word vectors at (see WordVectors.quantise), the precision of the
+                embedder when None
+        """
+
+        os.makedirs(path, exist_ok=True)
+
+        SerialiserFactory("json").save(self, os.path.join(path, "ontology.json"))
+        self.aliasMatcher().save(os.path.join(path, "aliases.json"))
+        self._embedder.export(os.path.join(path, "vectors"), precision=precision)
+
+        relations = {}
+        for index, relation in enumerate(sorted(self.relations(), key=lambda relation: relation.name)):
+            if not relation.fitted: continue
+
+            directory = os.path.join("relations", str(index))
+            relation.save(os.path.join(path, directory), trainable=trainable)
+            relations[relation.name] = directory
+
+        shared = None
+        if self._shared is not None:
+            shared = "multirelation"
+            self._shared.save(os.path.join(path, shared), trainable=trainable)
+
+        with open(os.path.join(path, "engine.json"), "w") as handler:
+            json.dump(
+                {
+                    "name": self.name,
+                    "embedder": "hashing" if isinstance(self._embedder, HashingEmbedder) else "vectors",
+                    "relations": relations,
+                    "multi_relation": shared,
+                    "alias_distance": self._aliasDistance
+                },
+                handler,
+                indent=4,
+                sort_keys=True
+            )
+
+    def aliasMatcher(self) -> AliasMatcher:
+        """ Return the alias matcher of the engine's concepts, compiled lazily and recompiled once the concepts or their
+        aliases have been modified """
+
+        revision, matcher = self._matcher
+        if revision != Revision.current:
+            revision = Revision.current
+            matcher = AliasMatcher.fromConcepts(self.concepts(), max_distance=self._aliasDistance)
+            self._matcher = (revision, matcher)
+
+        return matcher
+
+    def ancestry(self) -> {str: frozenset}:
+        """ Return the names of the ancestors of each of the engine's concepts, compiled lazily and recompiled once the
+        concept hierarchy has been modified """
+
+        revision, ancestry = self._ancestry
+        if revision != Revision.current:
+            revision = Revision.current
+            ancestry = {
+                concept.name: frozenset(getattr(ancestor, "name", ancestor) for ancestor in concept.ancestors())
+                for concept in self.concepts()
+            }
+            self._ancestry = (revision, ancestry)
+
+        return ancestry
+
+    def version(self) -> tuple:
+        """ The version of the engine's model - changed when the knowledge of the engine is modified, its embedder or
+        any of its relations are trained, or its pruner or collapser are replaced or reconfigured. The version is unique
+        to the engine such that a cache can be shared between engines """
+        pruner, collapser = self.pruner, self.collapser
+        return (
+            self._identity,
+            Revision.current,
+            self._embedder.digest(),
+            tuple(getattr(relation, "version", 0) for relation in self.relations()),
+            self._shared.version if self._shared is not None else None,
+            pruner.configuration() if pruner is not None else None,
+            collapser.configuration() if collapser is not None else None
+        )
+
+    def fit(
+        self,
+        documents: [Document],
+        *,
+        corpus_file: str = None,
+        feature_store: str = None,
+        workers: int = 1,
+        seed: int = None):
+        """ Train the model on the collection of documents (InfoGain documents). The sentences of all the documents are
+        streamed through the embedder as a single corpus, such that its vocabulary is built and it is trained once.
 
         Params:
             documents ([Document]) - A collection of training files to fit the model on.
+            *,
+            corpus_file (str) - Location of a pre-tokenised corpus file to train the embedder with. The file is written
+                from the documents if it doesn't exist, otherwise it is reused and the documents are not tokenised
+            feature_store (str) - Location of a feature store of the annotation embeddings (see FeatureStore). The store
+                is reused when it was built by the same embedder over the same annotations, otherwise it is rebuilt
+            workers (int) - The number of worker processes the relations are trained in, once all the annotations are
+                embedded. Only the training matrix and labels of a relation are sent to a worker, and the fitted
+                classifier is installed back into the relation. The relations are trained in this process when 1, and
+                with the number of processors when None
+            seed (int) - The seed of the classifiers of the relations, such that training is reproducible. Each relation
+                is seeded from the seed and its name, so the result doesn't depend on the order or the process the
+                relations are trained in. The classifiers are left as they are when None
         """
 
         if isinstance(documents, Document): documents = [documents]
+        documents = list(documents)
+
+        stats = self.stats
+        record = stats.record("fit", documents) if stats is not None else NULL_RECORD
 
         relation_datapoints = collections.defaultdict(list)
+        with record.stage("aliases"):
+            for document in documents:
+
+                for annotation in document.annotations:
+
+                    # Train the entity detection with the datapoint entities
+                    self._learnAliases(annotation)
+
+                    # Split out the datapoints for training relations
+                    relation = self.relations.get(annotation.name)
+                    if relation:
+                        relation_datapoints[relation].append(annotation)
+
+        if stats is not None:
+            record.count(
+                documents=len(documents),
+                annotations=sum(len(annotations) for annotations in relation_datapoints.values())
+            )
+
+        # Train the embedder on the corpus - only take alpha words (read only embedders cannot be trained)
+        if self._embedder.trainable():
+            with record.stage("embedder"):
+                if corpus_file is None:
+                    self._embedder.train(Corpus(documents))
+                else:
+                    if not os.path.exists(corpus_file): Corpus(documents).save(corpus_file)
+                    self._embedder.train(corpus_file=corpus_file)
+
+        if self._multiRelation is not None:
+            # Train the multi-relation classifier on the annotations of all the relations
+            self._shared = MultiRelationClassifier(
+                sorted(relation.name for relation in self.relations()), self._multiRelation
+            )
+
+            if feature_store is not None:
+                names = {relation.name for relation in relation_datapoints}
+                with record.stage("embedding"):
+                    store = FeatureStore.open(feature_store, self._embedder, documents, relations=names)
+                with record.stage("training"):
+                    self._shared.fit(store.embeddings, store.relations, store.classifications)
+            else:
+                annotations = [ann for annotations in relation_datapoints.values() for ann in annotations]
+                with record.stage("embedding"):
+                    embeddings = self._embedAnnotations(annotations)
+                with record.stage("training"):
+                    self._shared.fit(
+                        embeddings,
+                        [ann.name for ann in annotations],
+                        [ann.classification for ann in annotations]
+                    )
+            record.count(classifier_calls=1)
+
+        else:
+            # Collect the training matrix and labels of each relation
+            training = {}
+            with record.stage("embedding"):
+                if feature_store is not None:
+                    names = {relation.name for relation in relation_datapoints}
+                    store = FeatureStore.open(feature_store, self._embedder, documents, relations=names)
+                    for relation in relation_datapoints: training[relation] = relation.trainingData(store)
+
+                else:
+                    for relation, annotations in relation_datapoints.items():
+                        embeddings = self._embedAnnotations(annotations)
+                        if not sparse.issparse(embeddings):
+                            for ann, row in zip(annotations, embeddings):
+                                ann.embedding = tuple(row.reshape(3, self._embedder.size()))
+                        training[relation] = relation.trainingData(annotations, embeddings)
+
+            with record.stage("training"):
+                self._train(training, workers=workers, seed=seed)
+            record.count(classifier_calls=len(training))
+
+        if stats is not None: stats.add(record)
+
+    def _train(self, training: {ExtractionRelation: tuple}, *, workers: int = 1, seed: int = None) -> None:
+        """ Fit the classifiers of the relations on their training data and install them into the relations. The
+        relations are independent, such that they can be trained concurrently in a process pool
+
+        Params:
+            training ({ExtractionRelation: (np.ndarray, [int])}): The training matrix and labels of each relation
+            *,
+            workers (int): The number of worker processes, the relations are trained in this process when 1 and with
+                the number of processors when None
+            seed (int): The seed the classifier of each relation is seeded from with its name, unseeded when None
+        """
+
+        if seed is not None:
+            for relation in training:
+                relation.seed((seed + zlib.crc32(relation.name.encode("utf-8"))) % 2**32)
+
+        if workers == 1 or len(training) < 2:
+            for relation, (embeddings, classifications) in training.items():
+                relation.install(fitClassifier(relation.classifier, embeddings, classifications))
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                relation: pool.submit(fitClassifier, relation.classifier, embeddings, classifications)
+                for relation, (embeddings, classifications) in training.items()
+            }
+
+            for relation, future in futures.items():
+                relation.install(future.result())
+
+    def fit_stream(self, documents: [Document], batch_size: int = 256) -> {str: float}:
+        """ Incrementally train the relations on a stream of documents, such that only a mini-batch of embedded points
+        per relation is held in memory at any one time. Documents are consumed lazily from the iterable and may be
+        discarded after they have been processed, allowing a trained engine to be updated with only new documents.
+
+        The embedder is not trained by the stream; its vocabulary should already be established (by fit, or by loading
+        vectors). Relations that have converged are not updated for the remainder of the stream.
+
+        Params:
+            documents ([Document]) - An iterable of training documents
+            batch_size (int) - The number of points collected for a relation before its model is updated
+
+        Returns:
+            {str: float}: The most recent batch loss of each of the relations trained
+        """
+
+        if self._multiRelation is not None:
+            raise RuntimeError("Incremental training is not supported by the multi-relation classifier")
+
+        if isinstance(documents, Document): documents = [documents]
+
+        for relation in self.relations(): relation.resetConvergence()
+
+        def update(relation, batch):
+            embeddings, classifications = zip(*batch)
+            batch.clear()
+            if relation.converged: return
+            if sparse.issparse(embeddings[0]): embeddings = sparse.vstack(embeddings, format="csr")
+            else: embeddings = np.array(embeddings)
+            relation.partial_fit(embeddings, np.array(classifications))
+            if relation.converged: log.info("Relation '{}' has converged".format(relation.name))
+
+        batches = collections.defaultdict(list)
         for document in documents:
 
+            annotations = []
             for annotation in document.annotations:
+                self._learnAliases(annotation)
+                if self.relations.get(annotation.name) is not None: annotations.append(annotation)
 
-                # Train the entity detection with the datapoint entities
-                for entity in (annotation.domain, annotation.target):
-                    concept = self.concepts.get(entity.classType)
-                    if concept is not None:
-                        concept.aliases.add(entity.surfaceForm)
+            if not annotations: continue
 
-                # Split out the datapoints for training relations
+            # Embed the annotations of the document together and distribute the points among the relation batches
+            for annotation, row in zip(annotations, self._embedAnnotations(annotations)):
                 relation = self.relations.get(annotation.name)
-                if relation:
-                    relation_datapoints[relation].append(annotation)
-
-            # Train the embedder - only take alpha words
-            self._embedder.train([[word for word in sentence if word.isalpha()] for sentence in document.sentences()])
-            # self._embedder.train(word for word in document.words() if word.isalpha())
-
-        # Embed the annotations and train their relations
-        for relation, annotations in relation_datapoints.items():
-            for ann in annotations: ann.embedding = tuple(self._embedder.sentence(context) for context in ann.context)
-            relation.fit(annotations)
+                batch = batches[relation]
+                batch.append((row, annotation.classification))
+                if len(batch) >= batch_size: update(relation, batch)
+
+        # Flush the partially filled batches
+        for relation, batch in batches.items():
+            if batch: update(relation, batch)
+
+        return {relation.name: relation.losses[-1] for relation in batches if relation.losses}
+
+    def _learnAliases(self, annotation: Annotation) -> None:
+        """ Train the entity detection with the surface forms of an annotation's entities """
+        for entity in (annotation.domain, annotation.target):
+            concept = self.concepts.get(entity.classType)
+            if concept is not None:
+                concept.aliases.add(entity.surfaceForm)
+
+    def _embedAnnotations(self, annotations: [Annotation]) -> np.ndarray:
+        """ Embed the (left, middle, right) contexts of annotations in a single call, returning a row of the three
+        concatenated context embeddings per annotation (a sparse matrix for sparse embedders) """
+        contexts = [context for annotation in annotations for context in annotation.context]
+        embeddings = self._embedder.sentences(contexts).reshape(len(annotations), 3*self._embedder.size())
+        return embeddings.tocsr() if sparse.issparse(embeddings) else embeddings
 
     def predict(self, document: Document):
         """ Identify entities and relationships within the document and predict their confidences
 
+        Predictions are reentrant - all of the state of a call is local to the call and the models of the engine are
+        only read, such that the engine can predict on different documents from several threads at once. Structures
+        compiled lazily from the engine (the alias matcher, relation table and relation kernels) are built before being
+        published with a single assignment, so concurrent callers at worst compile them more than once. The engine must
+        not be trained or modified while predictions are running, and a document must only be predicted on by a single
+        caller at a time.
+
         Parmas:
             document (Document): The document to be predicted on
         """
+        return self.predict_batch([document])[0]
+
+    def predict_batch(self, documents: [Document]) -> [Document]:
+        """ Identify entities and relationships within a collection of documents and predict their confidences. The
+        candidate annotations of all the documents are classified together, a single call per relation, such that the
+        cost of invoking the classifiers is shared between the documents. Reentrant in the same way as `predict`.
+
+        Params:
+            documents ([Document]): The documents to be predicted on
+
+        Returns:
+            [Document]: The documents that were predicted on
+        """
+
+        # The record of the call's instrumentation
+        stats = self.stats
+        record = stats.record("predict", documents) if stats is not None else NULL_RECORD
+
+        # The matcher of the concept aliases
+        matcher = self.aliasMatcher()
 
-        # A store mapping aliases to concepts
-        aliases = collections.defaultdict(set)
-        for concept in self.concepts():
-            if concept.category is Concept.ABSTRACT: continue
-
-            aliases[concept.name].add(concept.name)
-            for alias in concept.aliases:
-                aliases[alias].add(concept.name)
-
-        #? This can become the fast text algorithm
-        # Identify the text within the documents
-        patterns = [
-            (
-                pattern,
-                re.compile(r"(^|(?!\s))"+pattern+r"((?=(\W(\W|$)))|(?=\s)|(?='s)|$)")
+        # The relations that can be formed between each pair of concepts
+        relationTable = self._classifiable()
+
+        # The version of the model whose results are cached
+        cache = self.cache
+        version = self.version() if cache is not None else None
+
+        # Generate the scenarios of each of the sentences of the documents - a sentence found within the cache has its
+        # chosen scenario recorded in place of its scenarios. The sentences are read without the document's cursors
+        sentences = []
+        for document in documents:
+            for container, offset, sentence in document.indexedSentences():
+                if cache is not None:
+                    with record.stage("cache"):
+                        found, candidates = cache.get(version, sentence)
+                    if found:
+                        sentences.append((container, offset, sentence, None, candidates))
+                        continue
+
+                scenarios = self._scenarios(sentence, matcher, relationTable, record)
+                sentences.append((container, offset, sentence, scenarios, None))
+
+        # Embed the candidate annotations of all the documents and predict them
+        self._score([(sentence, scenarios) for _, _, sentence, scenarios, _ in sentences if scenarios], record)
+
+        # Choose a scenario for each sentence and generate its entities/annotations within the containing document
+        annotations = 0
+        for container, offset, sentence, scenarios, candidates in sentences:
+            if scenarios is not None:
+                with record.stage("choosing"):
+                    candidates = self._choose(scenarios)
+                if cache is not None:
+                    with record.stage("cache"):
+                        cache.put(version, sentence, candidates)
+
+            if candidates is not None:
+                with record.stage("materialising"):
+                    candidates.materialise(container, offset)
+                annotations += len(candidates)
+
+        if stats is not None:
+            record.count(
+                documents=len(documents),
+                sentences=len(sentences),
+                cached=sum(scenarios is None for _, _, _, scenarios, _ in sentences),
+                annotations=annotations
             )
-            for pattern in aliases.keys()
-        ]
+            stats.add(record)
+
+        return documents
+
+    def _classifiable(self) -> dict:
+        """ The relation table of the engine restricted to the relations that can be classified - a relation that has
+        not been fitted has no model and forms no candidate annotations, as does a relation that a multi-relation
+        classifier had no training data for. The table is compiled lazily and recompiled once the knowledge of the
+        engine is modified or any of its relations are trained (see `version`)
+
+        Returns:
+            dict: The fitted relations that can be formed between each pair of concepts
+        """
+
+        key = (
+            Revision.current,
+            tuple(getattr(relation, "version", 0) for relation in self.relations()),
+            self._shared.version if self._shared is not None else None
+        )
+
+        compiled, table = self._classifiableTable
+        if compiled == key: return table
+
+        if self._shared is not None:
+            trained = self._shared.trained()
+            classifiable = lambda relation: relation.name in trained
+        else:
+            classifiable = lambda relation: relation.fitted
+
+        table = self.relations.table()
+        if not all(classifiable(relation) for relation in self.relations()):
+            restricted = {}
+            for pair, relations in table.items():
+                relations = tuple(relation for relation in relations if classifiable(relation))
+                if relations: restricted[pair] = relations
+            table = restricted
+
+        self._classifiableTable = (key, table)
+        return table
+
+    def _scenarios(
+            self,
+            sentence: str,
+            matcher: AliasMatcher,
+            relationTable: dict,
+            record = NULL_RECORD) -> [Candidates]:
+        """ Detect the entities of a sentence and generate the candidate annotations for each of the scenarios of the
+        entities, a scenario per combination of the concepts that each of the entities could be
 
-        # For each sentence of the document predict datapoints
-        for sentence in document.sentences():
+        Params:
+            sentence (str): The sentence to generate candidates for
+            matcher (AliasMatcher): The matcher of the concept aliases
+            relationTable (dict): The relations that can be formed between each pair of concepts
+            record (StageRecord): The record of the instrumentation of the call
 
-            # Find all entities within the sentence - stack them upon their spans so patterns matching for the same
-            entities = collections.defaultdict(set)
-            for (rep, pattern) in patterns:
-                for match in pattern.finditer(sentence):
+        Returns:
+            [Candidates]: The scenarios of the sentence
+        """
 
-                    # Found a possible entity - convert the pattern used into possible entities for the match
-                    for concept in aliases[rep]:
-                        entities[match.span()].add(Entity(concept, match.group(0)))
+        # Find all entities within the sentence - stack their concepts upon their spans
+        with record.stage("matching"):
+            entities, confidences = matcher.search(sentence)
 
-            # Check to see if any information was identified
-            if not entities: continue
+        # Check to see if any information was identified
+        if not entities: return []
 
-            # Collapse the structure into two lists, the span list and a list of sets of representations
-            spans, ents = zip(*entities.items())
+        # Reduce the concepts of the spans before they multiply the scenarios
+        collapser = self.collapser
+        if collapser is not None:
+            with record.stage("collapsing"):
+                entities = collapser.collapse(entities, self.ancestry(), relationTable)
 
-            # Choose for the conflicts a single scenario for their occurrence
-            scenarioDocuments = []
-            for scenario in itertools.product(*ents):
+        with record.stage("scenarios"):
+            scenarios = self._enumerate(sentence, entities, relationTable, confidences)
 
-                # Create a document to represent this sentence and this entity setup
-                sceneDocument = Document(sentence, processed=True)
+        if record is not NULL_RECORD:
+            record.count(
+                matches=len(entities),
+                scenarios=len(scenarios),
+                candidates=sum(len(candidates) for candidates in scenarios)
+            )
 
-                # Add the entities to the document
-                for span, entity in zip(spans, scenario): sceneDocument.entities.add(entity, span[0])
+        return scenarios
+
+    def _enumerate(self, sentence: str, entities: dict, relationTable: dict, confidences: dict = None) -> [Candidates]:
+        """ Generate the candidate annotations of each of the scenarios of a sentence's detected entities, the
+        confidences of approximately detected entities are recorded upon the scenarios """
+
+        # Collapse the structure into two lists, the span list and a list of the concepts for each span. The spans are
+        # ordered by their position such that the scenarios don't depend upon the order the aliases were matched in
+        spans, ents = zip(*((span, sorted(concepts)) for span, concepts in sorted(entities.items())))
+
+        # The pruner of the candidate annotations, and the layout of the entities it judges the candidates with
+        pruner = self.pruner
+        if pruner is not None:
+            layout = pruner.layout(sentence, spans)
+            kept, pruned = 0, collections.Counter()
+
+        # Choose for the conflicts a single scenario for their occurrence
+        scenarios = []
+        for scenario in itertools.product(*ents):
+
+            # Represent the sentence with this entity setup, without generating any document artefacts
+            candidates = Candidates(
+                sentence,
+                spans,
+                scenario,
+                [confidences.get(span, {}).get(concept, 1.) for span, concept in zip(spans, scenario)]
+                if confidences else None
+            )
 
-                # Loop over scenario entities to find possible annotations to be made
-                scenario = list(scenario)
-                while scenario:
-                    # Extract an entity
-                    e1 = scenario.pop()
+            # Loop over pairs of scenario entities to find possible annotations to be made
+            for e1 in reversed(range(len(scenario))):
+                for e2 in range(e1):
 
-                    # Loop over the remaining entities
-                    for e2 in scenario:
+                    # Judge whether the pair of entities is close enough to be related
+                    reason = pruner.near(layout, e1, e2) if pruner is not None else None
+
+                    # Investigate relations that can form in either direction
+                    for first, second in [(e1, e2), (e2, e1)]:
+
+                        # For any valid relationships that can be formed between the entities
+                        relations = relationTable.get((scenario[first], scenario[second]), ())
+                        if pruner is None:
+                            for relation in relations: candidates.add(first, relation, second)
+                            continue
+
+                        if reason is not None:
+                            pruned[reason] += len(relations)
+                            continue
+
+                        forward = spans[first] < spans[second]
+                        for relation in relations:
+                            if pruner.ordered(relation, forward):
+                                candidates.add(first, relation, second)
+                                kept += 1
+                            else:
+                                pruned["ordering"] += 1
+
+            scenarios.append(candidates)
+
+        if pruner is not None: pruner.count(kept, **pruned)
+
+        return scenarios
+
+    @staticmethod
+    def _choose(scenarios: [Candidates]) -> Candidates:
+        """ Compare the scored scenarios of a sentence and choose the scenario with the greatest relative confidences
+
+        Params:
+            scenarios ([Candidates]): The scored scenarios of a sentence
+
+        Returns:
+            Candidates: The chosen scenario, None when none of the scenarios have any candidate annotations
+        """
+
+        if not any(len(candidates) for candidates in scenarios): return None
+
+        # Extract a starting scenario
+        scenarios = list(scenarios)
+        s1 = scenarios.pop()
+        ann1 = s1.ranked()
+
+        while scenarios:
+
+            # Extract a comparison scenario
+            s2 = scenarios.pop()
+            ann2 = s2.ranked()
+
+            # Compete for value of the scenario
+            counter, si, ci = 0, 0, 0
+            length = min(len(ann1), len(ann2))
+            for i in range(length):
+                if ann1[si] < ann2[ci]:
+                    counter += (length - i)**2
+                    ci += 1
+                else:
+                    counter -= (length - i)**2
+                    si += 1
+
+            # Choose the scenario with the greatest relative confidences
+            if counter >= 0:
+                s1, ann1 = s2, ann2
+
+        return s1
+
+    def _score(self, sentences: [(str, [Candidates])], record = NULL_RECORD) -> None:
+        """ Embed the candidate annotations of the scenarios of a collection of sentences and classify them with their
+        relations, classifying all the candidates of a relation together. The context of an annotation is determined
+        only by the spans of its entities such that a context is embedded once and reused for every relation, direction
+        and scenario of the sentence that consumes it. With a multi-relation classifier, each context is scored against
+        every relation in a single forward pass.
+
+        Params:
+            sentences ([(str, [Candidates])]): The sentences and the scenario candidates of the sentence to be scored
+            record (StageRecord): The record of the instrumentation of the call
+        """
 
-                        # Investigate relations that can form in either direction
-                        for first, second in [(e1, e2), (e2, e1)]:
+        # Embed all the distinct contexts of each sentence together - a row of (left, middle, right) per context
+        vectors, indexes, count = [], [], 0
+        with record.stage("embedding"):
+            for sentence, scenarios in sentences:
 
-                            # For any valid relationships that can be formed between the entities
-                            for relation in self.findRelations(first.classType, second.classType):
+                contexts = list({offsets for candidates in scenarios for offsets in candidates.contexts})
+                if not contexts: continue
 
-                                # Create an annotation object and add it to the document for context and validation
-                                ann = Annotation(first, relation.name, second)
-                                sceneDocument.annotations.add(ann)
+                spans = [span for offsets in contexts for span in offsets]
+                embedded = self._embedder.sentence_spans(sentence, spans)
+                vectors.append(embedded.reshape(len(contexts), 3*self._embedder.size()))
 
-                                # Embed the annotation and predict it
-                                ann.embedding = tuple(self._embedder.sentence(context) for context in ann.context)
-                                relation.predict(ann)
+                # The row of the embedding matrix of each of the contexts of the sentence
+                indexes.append((scenarios, {context: count + i for i, context in enumerate(contexts)}))
+                count += len(contexts)
 
-                scenarioDocuments.append(sceneDocument)
+        if not vectors: return
+        embeddings = sparse.vstack(vectors, format="csr") if sparse.issparse(vectors[0]) else np.concatenate(vectors)
+        record.count(contexts=count)
 
-            # Compare the different scenarios
-            if any(len(sceneDocument.annotations) for sceneDocument in scenarioDocuments):
+        if self._shared is not None:
+            with record.stage("classification"):
+                probabilities = self._shared.probabilities(embeddings)
 
-                order = lambda doc: sorted(doc.annotations, key = lambda ann: ann.probability, reverse=True)
+                for scenarios, index in indexes:
+                    for candidates in scenarios:
+                        if not len(candidates): continue
 
-                # Extract a starting document
-                d1 = scenarioDocuments.pop()
-                ann1 = order(d1)
+                        rows = [index[context] for context in candidates.contexts]
+                        names = [relation.name for relation in candidates.relations]
+                        results = self._shared.classify(probabilities[rows], names)
+                        candidates.classified(list(range(len(candidates))), *results)
 
-                while scenarioDocuments:
+            record.count(classifier_calls=1)
+            return
 
-                    # Extract a comparison document
-                    d2 = scenarioDocuments.pop()
-                    ann2 = order(d2)
+        # The scenario, candidate index and embedding row of each of the candidates of each relation
+        owners = collections.defaultdict(list)
+        for scenarios, index in indexes:
+            for candidates in scenarios:
+                for i, relation in enumerate(candidates.relations):
+                    owners[relation].append((candidates, i, index[candidates.contexts[i]]))
 
-                    # Compete for value of the scenario
-                    counter, si, ci = 0, 0, 0
-                    length = min(len(ann1), len(ann2))
-                    for i in range(length):
-                        if ann1[si].probability < ann2[ci].probability:
-                            counter += (length - i)**2
-                            ci += 1
-                        else:
-                            counter -= (length - i)**2
-                            si += 1
+        with record.stage("classification"):
+            for relation, points in owners.items():
+                classifications, probabilities = relation.classify(embeddings[[row for _, _, row in points]])
 
-                    # Choose the document with the greatest relative confidences
-                    if counter >= 0:
-                        d1, ann1 = d2, ann2
+                # Return the results of the relation to their scenarios
+                grouped = collections.defaultdict(list)
+                for k, (candidates, _, _) in enumerate(points): grouped[candidates].append(k)
 
-                # Add the document information and its entities/annotations
-                for i, e in d1.entities.indexes(): document.entities.add(e, i)
-                for ann in d1.annotations: document.annotations.add(ann)
+                for candidates, ks in grouped.items():
+                    candidates.classified([points[k][1] for k in ks], classifications[ks], probabilities[ks])
 
-        return document
\ No newline at end of file
+        record.count(classifier_calls=len(owners))
@@ -0,0 +1,248 @@
+import os
+import json
+
+import numpy as np
+
+from ..artefact import Document, Annotation
+
+from .embedder import Embedder
+
+import logging
+log = logging.getLogger(__name__)
+
+class FeatureStore:
+    """ The context embeddings of the annotations of a training corpus, computed once and held as an uncompressed
+    matrix such that it can be memory mapped and reused by every fit, fold and trial that trains on the corpus. Each
+    row is the concatenated (left, middle, right) context embedding of an annotation, keyed by the name of its document
+    and the id of the annotation, with the classification and the relation of the annotation in side arrays.
+
+    A store records the digest of the embedder that produced it, and is rebuilt when opened with a different
+    embedder. The embeddings are held as float32, or as float16 to halve the memory of the store.
+
+    Params:
+        embeddings (np.ndarray): The matrix of context embeddings, a row per annotation
+        classifications (np.ndarray): The classification of each of the annotations
+        relations (np.ndarray): The relation name of each of the annotations
+        documents (np.ndarray): The name of the document of each of the annotations
+        annotations (np.ndarray): The id of each of the annotations within its document
+        digest (str): The digest of the embedder that produced the embeddings
+    """
+
+    PRECISIONS = ("float32", "float16")
+
+    _FILES = ("embeddings.npy", "classifications.npy", "relations.npy", "documents.npy", "annotations.npy")
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        classifications: np.ndarray,
+        relations: np.ndarray,
+        documents: np.ndarray,
+        annotations: np.ndarray,
+        digest: str):
+
+        self.embeddings = embeddings
+        self.classifications = classifications
+        self.relations = relations
+        self.documents = documents
+        self.annotations = annotations
+        self.digest = digest
+
+    def __len__(self): return len(self.embeddings)
+
+    @staticmethod
+    def key(annotation: Annotation, document: Document) -> str:
+        """ The id of an annotation within its document - its relation and the surface forms and offsets of its
+        entities, which are fixed by the content of the document
+
+        Params:
+            annotation (Annotation): An annotation that has been added to the document
+            document (Document): The document of the annotation
+
+        Returns:
+            str: The id of the annotation
+        """
+        domain, target = (document.entities.index(entity) for entity in (annotation.domain, annotation.target))
+        return "{}({}@{},{}@{})".format(
+            annotation.name, annotation.domain.surfaceForm, domain, annotation.target.surfaceForm, target
+        )
+
+    @classmethod
+    def open(
+        cls,
+        path: str,
+        embedder: Embedder,
+        documents: [Document],
+        relations: {str} = None,
+        mmap: bool = True,
+        precision: str = "float32"):
+        """ Open the store of a corpus, building the store when it does not exist, was produced by a different embedder,
+        does not hold the annotations of the documents or holds its embeddings at a different precision
+
+        Params:
+            path (str): The directory of the store
+            embedder (Embedder): The embedder of the annotation contexts
+            documents ([Document]): The documents of the corpus
+            relations ({str}): The names of the relations whose annotations are stored, all annotations when None
+            mmap (bool): Toggle to memory map the embeddings rather than read them into memory
+            precision (str): The precision of the embeddings, one of PRECISIONS
+
+        Returns:
+            FeatureStore: The store of the corpus
+        """
+
+        documents = list(documents)
+
+        if os.path.exists(os.path.join(path, "store.json")):
+            store = cls.load(path, mmap=mmap)
+
+            keys = [
+                (document.name, cls.key(ann, document), ann.name)
+                for document, ann in cls._annotations(documents, relations)
+            ]
+            stored = zip(store.documents.tolist(), store.annotations.tolist(), store.relations.tolist())
+
+            if store.digest != embedder.digest():
+                log.info("Rebuilding the feature store at '{}' - the embedder has changed".format(path))
+            elif sorted(keys) != sorted(stored):
+                log.info("Rebuilding the feature store at '{}' - the annotations have changed".format(path))
+            elif store.embeddings.dtype != np.dtype(precision):
+                log.info("Rebuilding the feature store at '{}' - the precision has changed".format(path))
+            else:
+                return store
+
+            # Release the mapping of the invalid store before its files are overwritten
+            del store
+
+        store = cls.build(path, embedder, documents, relations, precision=precision)
+        return store if mmap else cls.load(path, mmap=False)
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        embedder: Embedder,
+        documents: [Document],
+        relations: {str} = None,
+        batch_size: int = 1024,
+        precision: str = "float32"):
+        """ Embed the annotations of a corpus and write them into a store. The embeddings are written directly into the
+        memory mapped matrix of the store in batches, such that the embeddings of the corpus are not held in memory.
+
+        Params:
+            path (str): The directory of the store, created if it doesn't exist
+            embedder (Embedder): The embedder of the annotation contexts
+            documents ([Document]): The documents of the corpus
+            relations ({str}): The names of the relations whose annotations are stored, all annotations when None
+            batch_size (int): The number of annotations embedded together
+            precision (str): The precision of the embeddings, one of PRECISIONS
+
+        Returns:
+            FeatureStore: The store of the corpus, memory mapped
+        """
+
+        if precision not in cls.PRECISIONS:
+            raise ValueError("Invalid precision '{}', expected one of {}".format(precision, cls.PRECISIONS))
+
+        if getattr(embedder, "isSparse", False):
+            raise ValueError("A feature store cannot hold the sparse embeddings of a hashing embedder")
+
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, "store.json")): os.remove(os.path.join(path, "store.json"))
+
+        points = list(cls._annotations(documents, relations))
+
+        embeddings = np.lib.format.open_memmap(
+            os.path.join(path, "embeddings.npy"), mode="w+", dtype=precision, shape=(len(points), 3*embedder.size())
+        )
+        for start in range(0, len(points), batch_size):
+            batch = [ann for _, ann in points[start: start + batch_size]]
+            contexts = [context for ann in batch for context in ann.context]
+            embeddings[start: start + len(batch)] = embedder.sentences(contexts).reshape(len(batch), -1)
+        embeddings.flush()
+        del embeddings
+
+        classifications = np.array([ann.classification for _, ann in points], dtype=np.int8)
+        np.save(os.path.join(path, "classifications.npy"), classifications)
+        np.save(os.path.join(path, "relations.npy"), np.array([ann.name for _, ann in points], dtype=str))
+        np.save(os.path.join(path, "documents.npy"), np.array([document.name for document, _ in points], dtype=str))
+        np.save(
+            os.path.join(path, "annotations.npy"),
+            np.array([cls.key(ann, document) for document, ann in points], dtype=str)
+        )
+
+        # The configuration is written last such that an interrupted build is not mistaken for a store
+        with open(os.path.join(path, "store.json"), "w") as handler:
+            json.dump({"digest": embedder.digest(), "size": len(points)}, handler, indent=4)
+
+        return cls.load(path)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """ Load a store written by `build`
+
+        Params:
+            path (str): The directory of the store
+            mmap (bool): Toggle to memory map the embeddings in read only mode rather than read them into memory
+
+        Returns:
+            FeatureStore: The store
+        """
+        with open(os.path.join(path, "store.json")) as handler:
+            config = json.load(handler)
+
+        embeddings, *arrays = (
+            np.load(os.path.join(path, name), mmap_mode="r" if mmap and name == "embeddings.npy" else None)
+            for name in cls._FILES
+        )
+        return cls(embeddings, *arrays, config["digest"])
+
+    @staticmethod
+    def _annotations(documents: [Document], relations: {str} = None) -> [(Document, Annotation)]:
+        """ Yield the annotations of the documents that belong to the relations, in a stable order """
+        for document in documents:
+            for ann in sorted(document.annotations, key=lambda ann: FeatureStore.key(ann, document)):
+                if relations is None or ann.name in relations:
+                    yield document, ann
+
+    def relation(self, name: str) -> (np.ndarray, np.ndarray):
+        """ The embeddings and classifications of the annotations of a relation
+
+        Params:
+            name (str): The name of the relation
+
+        Returns:
+            np.ndarray: The embeddings of the relation's annotations, a row per annotation
+            np.ndarray: The classification of each of the annotations
+        """
+        rows = np.flatnonzero(self.relations == name)
+        return self.embeddings[rows], self.classifications[rows]
+
+    def rows(self, documents: {str}) -> np.ndarray:
+        """ The rows of the store that belong to a collection of documents, such as the documents of a fold
+
+        Params:
+            documents ({str}): The names of the documents
+
+        Returns:
+            np.ndarray: The indexes of the rows of the documents
+        """
+        return np.flatnonzero(np.isin(self.documents, list(documents)))
+
+    def subset(self, rows: np.ndarray):
+        """ Create a store of a selection of the rows of the store, sharing the digest of the store
+
+        Params:
+            rows (np.ndarray): The indexes of the rows to be selected
+
+        Returns:
+            FeatureStore: The store of the selected rows
+        """
+        return FeatureStore(
+            self.embeddings[rows],
+            self.classifications[rows],
+            self.relations[rows],
+            self.documents[rows],
+            self.annotations[rows],
+            self.digest
+        )
@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import hashlib
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+class HashingEmbedder:
+    """ Embeds words and sentences into sparse vectors of hashed word n-gram counts, in place of an Embedder. There is
+    no vocabulary or model, the index of an n-gram is its hash, such that the embedder is available immediately, holds
+    constant memory and does not need to be trained. Words are tokenised the same as the Embedder - the runs of
+    characters between spaces with any non alphabetical characters removed.
+
+    Embeddings are scipy sparse (csr) matrices with a row per sentence, normalised to unit length. They suit linear
+    classifiers (the "logistic" and "sgd" backends), the input layer of an MLP would be as wide as the hash space.
+
+    Params:
+        n_features (int) - The size of the hash space, and so of the embedded vectors
+        ngram_range ((int, int)) - The smallest and largest number of consecutive words hashed as a feature
+        lowercase (bool) - Toggle to lowercase words before they are hashed
+    """
+
+    isSparse = True  # Embeddings are scipy sparse matrices
+
+    _NONALPHA_RGX = re.compile(r"[^A-Za-z ]")
+
+    def __init__(self, n_features: int = 2**18, ngram_range: (int, int) = (1, 2), lowercase: bool = True):
+        self.n_features = n_features
+        self.ngram_range = tuple(ngram_range)
+        self.lowercase = lowercase
+
+        self._vectorizer = HashingVectorizer(
+            n_features=n_features,
+            ngram_range=self.ngram_range,
+            lowercase=lowercase,
+            tokenizer=HashingEmbedder._tokenise,
+            token_pattern=None,
+            alternate_sign=False,
+            dtype=np.float32
+        )
+
+    @classmethod
+    def _tokenise(cls, text: str) -> [str]:
+        """ Split text into its alphabetical words """
+        return cls._NONALPHA_RGX.sub("", text.replace("\n", " ")).split()
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """ Create an embedder from the configuration exported with `export`
+
+        Params:
+            path (str) - The directory the embedder was exported to
+            mmap (bool) - Unused, there are no arrays to be mapped
+
+        Returns:
+            HashingEmbedder - The embedder
+        """
+        with open(os.path.join(path, "hashing.json")) as handler:
+            return cls(**json.load(handler))
+
+    def export(self, path: str, precision: str = None) -> None:
+        """ Export the configuration of the embedder into a directory
+
+        Params:
+            path (str) - The directory the configuration is to be written into
+            precision (str) - Unused, the embeddings are not stored
+        """
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "hashing.json"), "w") as handler:
+            json.dump(self._configuration(), handler, indent=4)
+
+    def _configuration(self) -> dict:
+        return {"n_features": self.n_features, "ngram_range": list(self.ngram_range), "lowercase": self.lowercase}
+
+    def trainable(self) -> bool:
+        """ Return whether the embedder has a model that can be trained - there is no model to train """
+        return False
+
+    def train(self, sentences: [[str]] = None, corpus_file: str = None) -> None:
+        """ Do nothing - the features are hashed and do not need to be trained """
+
+    def digest(self) -> str:
+        """ Return a digest of the configuration of the embedder, see Embedder.digest """
+        return hashlib.sha1(json.dumps(self._configuration(), sort_keys=True).encode("utf-8")).hexdigest()
+
+    def size(self) -> int:
+        """ Return the size of the embedding vectors """
+        return self.n_features
+
+    def word(self, word: str) -> sparse.csr_matrix:
+        """ Embed the provided word, returning a sparse matrix of a single row """
+        return self.sentences([word])
+
+    def words(self, words: [str]) -> sparse.csr_matrix:
+        """ Embed a collection of words together, returning a sparse matrix with a row per word """
+        return self.sentences(words)
+
+    def sentence(self, sentence: str) -> sparse.csr_matrix:
+        """ Embed a sentence, returning a sparse matrix of a single row """
+        return self.sentences([sentence])
+
+    def sentences(self, sentences: [str]) -> sparse.csr_matrix:
+        """ Embed a collection of sentences together
+
+        Params:
+            sentences ([str]) - The sentences to be embedded
+
+        Returns:
+            matrix (sparse.csr_matrix) - A sparse matrix with the embedding of each sentence as a row
+        """
+        if not len(sentences): return sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        return self._vectorizer.transform(sentences)
+
+    def sentence_spans(self, sentence: str, spans: [(int, int)]) -> sparse.csr_matrix:
+        """ Embed a collection of spans of a single sentence, words that are cut by the boundary of a span are embedded
+        as the part of the word within the span
+
+        Params:
+            sentence (str) - The sentence that the spans index into
+            spans ([(int, int)]) - The start and end character offsets of the spans to be embedded
+
+        Returns:
+            matrix (sparse.csr_matrix) - A sparse matrix with the embedding of each span as a row
+        """
+        return self.sentences([sentence[start: end] for start, end in spans])
@@ -0,0 +1,144 @@
+import time
+import threading
+import contextlib
+import collections
+
+class StageRecord:
+    """ The timings and counters of a single call of an engine (a `fit` or a `predict_batch`). The time spent within
+    each of the stages of the call is accumulated with `stage`, and the work done is tallied with `count`.
+
+    Params:
+        operation (str): The name of the engine operation being recorded
+        documents ([str]): The names of the documents the operation was called with
+    """
+
+    def __init__(self, operation: str, documents: [str] = ()):
+        self.operation = operation
+        self.documents = list(documents)
+        self.duration = None
+        self.stages = collections.defaultdict(float)
+        self.counts = collections.Counter()
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """ Time the body of the with statement and add the elapsed seconds onto the stage
+
+        Params:
+            name (str): The name of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] += time.perf_counter() - start
+
+    def count(self, **counts: int) -> None:
+        """ Add onto the counters of the record
+
+        Params:
+            **counts (int): The amounts to be added keyed by the name of the counter
+        """
+        self.counts.update(counts)
+
+    def finish(self) -> None:
+        """ Mark the end of the recorded call, setting its total duration """
+        self.duration = time.perf_counter() - self._start
+
+    def asdict(self) -> dict:
+        """ The record as a plain dictionary, suitable for sending to a metrics system """
+        return {
+            "operation": self.operation,
+            "documents": self.documents,
+            "duration": self.duration,
+            "stages": dict(self.stages),
+            "counts": dict(self.counts)
+        }
+
+class _NullRecord:
+    """ A record that discards everything, used by engines without instrumentation """
+
+    _CONTEXT = contextlib.nullcontext()
+
+    def stage(self, name: str): return self._CONTEXT
+    def count(self, **counts: int) -> None: pass
+
+NULL_RECORD = _NullRecord()
+
+class EngineStats:
+    """ Instrumentation of an ExtractionEngine - the time spent in each of the stages of its calls (alias matching,
+    scenario enumeration, embedding, classification, ...) and counts of the work done (sentences, matches, scenarios,
+    candidates, classifier calls, ...). Each call is captured as a StageRecord, which is aggregated into totals per
+    operation and passed to the callback, such that individual slow calls (and their documents) can be identified.
+    Engines without instrumentation only pay for a no-op record.
+
+    Params:
+        callback (callable): Function called with the StageRecord of each completed call, from the calling thread
+    """
+
+    def __init__(self, callback: callable = None):
+        self.callback = callback
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """ Reset the aggregated totals """
+        with self._lock:
+            self._totals = {}
+
+    def record(self, operation: str, documents: [object] = ()) -> StageRecord:
+        """ Start the record of a call of the engine
+
+        Params:
+            operation (str): The name of the operation being called
+            documents ([Document]): The documents the operation was called with
+
+        Returns:
+            StageRecord: The record of the call, to be passed to `add` once the call is complete
+        """
+        return StageRecord(operation, [getattr(document, "name", None) for document in documents])
+
+    def add(self, record: StageRecord) -> None:
+        """ Complete the record of a call, aggregating it into the totals of its operation and passing it onto the
+        callback
+
+        Params:
+            record (StageRecord): The record of the call
+        """
+
+        if record.duration is None: record.finish()
+
+        with self._lock:
+            totals = self._totals.setdefault(
+                record.operation,
+                {"calls": 0, "duration": 0., "stages": collections.defaultdict(float), "counts": collections.Counter()}
+            )
+            totals["calls"] += 1
+            totals["duration"] += record.duration
+            for name, seconds in record.stages.items(): totals["stages"][name] += seconds
+            totals["counts"].update(record.counts)
+
+        if self.callback is not None: self.callback(record)
+
+    def stats(self) -> {str: dict}:
+        """ The aggregated totals keyed by operation - the number of calls, their total duration, the seconds spent in
+        each stage and the counters """
+        with self._lock:
+            return {
+                operation: {
+                    "calls": totals["calls"],
+                    "duration": totals["duration"],
+                    "stages": dict(totals["stages"]),
+                    "counts": dict(totals["counts"])
+                }
+                for operation, totals in self._totals.items()
+            }
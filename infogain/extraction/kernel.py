@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+
+import numpy as np
+from scipy import sparse
+from scipy.special import expit
+
+class MLPKernel:
+    """ A standalone inference kernel compiled from a fitted sklearn MLPClassifier. The kernel holds only the float32
+    weights and biases of the network and runs the forward pass as a sequence of dot products and in place activations
+    on buffers that are preallocated per thread, without any of the input validation of the classifier.
+
+    Params:
+        weights ([np.ndarray]): The weight matrix of each of the layers
+        biases ([np.ndarray]): The bias vector of each of the layers
+        activation (str): The activation of the hidden layers - relu, tanh, logistic or identity
+        output (str): The activation of the output layer - softmax or logistic
+        classes (np.ndarray): The classes of the output
+    """
+
+    def __init__(self, weights: [np.ndarray], biases: [np.ndarray], activation: str, output: str, classes: np.ndarray):
+        if activation not in self._ACTIVATIONS or output not in self._ACTIVATIONS:
+            raise ValueError("Unsupported activations for kernel '{}' and '{}'".format(activation, output))
+
+        self.weights = [np.require(w, dtype=np.float32, requirements="C") for w in weights]
+        self.biases = [np.require(b, dtype=np.float32, requirements="C") for b in biases]
+        self.activation = activation
+        self.output = output
+        self.classes_ = np.array(classes)
+
+        self._local = threading.local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    @classmethod
+    def fromClassifier(cls, classifier: object):
+        """ Compile a fitted MLPClassifier into a kernel
+
+        Params:
+            classifier (MLPClassifier): The fitted classifier
+
+        Returns:
+            MLPKernel: The kernel of the classifier
+        """
+        return cls(
+            classifier.coefs_,
+            classifier.intercepts_,
+            classifier.activation,
+            classifier.out_activation_,
+            classifier.classes_
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """ Load a kernel saved into a directory with `save`
+
+        Params:
+            path (str): The directory of the kernel
+            mmap (bool): Toggle to memory map the weights in read only mode rather than read them into memory
+
+        Returns:
+            MLPKernel: The kernel
+        """
+        with open(os.path.join(path, "kernel.json")) as handler:
+            config = json.load(handler)
+
+        mode = "r" if mmap else None
+        return cls(
+            [np.load(os.path.join(path, "weights_{}.npy".format(i)), mmap_mode=mode) for i in range(config["layers"])],
+            [np.load(os.path.join(path, "biases_{}.npy".format(i)), mmap_mode=mode) for i in range(config["layers"])],
+            config["activation"],
+            config["output"],
+            config["classes"]
+        )
+
+    def save(self, path: str) -> None:
+        """ Save the kernel into a directory, the weights and biases are saved as uncompressed arrays
+
+        Params:
+            path (str): The directory to save the kernel into, created if it doesn't exist
+        """
+        os.makedirs(path, exist_ok=True)
+
+        for i, (weights, bias) in enumerate(zip(self.weights, self.biases)):
+            np.save(os.path.join(path, "weights_{}.npy".format(i)), weights)
+            np.save(os.path.join(path, "biases_{}.npy".format(i)), bias)
+
+        with open(os.path.join(path, "kernel.json"), "w") as handler:
+            json.dump({
+                "layers": len(self.weights),
+                "activation": self.activation,
+                "output": self.output,
+                "classes": self.classes_.tolist()
+            }, handler, indent=4)
+
+    def nbytes(self) -> int:
+        """ The number of bytes held by the weights and biases of the kernel """
+        return sum(array.nbytes for array in self.weights + self.biases)
+
+    def _buffers(self, rows: int, inputs: bool = True) -> [np.ndarray]:
+        """ Collect the input buffer and the buffer of each layer for this thread, with the capacity for at least the
+        number of rows required. Buffers are grown by doubling their capacity. The input buffer is None when not
+        required, such as for sparse inputs that are multiplied directly. """
+
+        buffers = getattr(self._local, "buffers", None)
+        if buffers is None or len(buffers[1]) < rows:
+            capacity = max(rows, 2*len(buffers[1]) if buffers is not None else 64)
+            buffers = [None]
+            buffers += [np.empty((capacity, w.shape[1]), dtype=np.float32) for w in self.weights]
+            self._local.buffers = buffers
+
+        if inputs and (buffers[0] is None or len(buffers[0]) < len(buffers[1])):
+            buffers[0] = np.empty((len(buffers[1]), self.weights[0].shape[0]), dtype=np.float32)
+
+        return [buffer[:rows] if buffer is not None else None for buffer in buffers]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """ Run the forward pass of the network on the points and return the probability of each class
+
+        Params:
+            X (np.ndarray): A matrix with a row per point, sparse matrices are multiplied into the first layer directly
+
+        Returns:
+            np.ndarray: The probability of each of the classes (columns) for each of the points (rows)
+        """
+
+        if sparse.issparse(X):
+            buffers = self._buffers(X.shape[0], inputs=False)
+        else:
+            X = np.asarray(X)
+            buffers = self._buffers(len(X))
+            np.copyto(buffers[0], X, casting="unsafe")
+
+        layers = len(self.weights)
+        for i, (weights, bias) in enumerate(zip(self.weights, self.biases)):
+            if i == 0 and sparse.issparse(X):
+                buffers[1][...] = X @ weights
+            else:
+                np.dot(buffers[i], weights, out=buffers[i+1])
+            buffers[i+1] += bias
+            self._ACTIVATIONS[self.activation if i + 1 < layers else self.output](buffers[i+1])
+
+        probs = buffers[-1].astype(np.float64)
+
+        # A binary network has a single output - the probability of the second class
+        if probs.shape[1] == 1: probs = np.hstack((1 - probs, probs))
+        return probs
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """ Predict the most likely class of each of the points """
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    @staticmethod
+    def _relu(X):
+        np.maximum(X, 0, out=X)
+
+    @staticmethod
+    def _tanh(X):
+        np.tanh(X, out=X)
+
+    @staticmethod
+    def _logistic(X):
+        expit(X, out=X)
+
+    @staticmethod
+    def _identity(X):
+        return
+
+    @staticmethod
+    def _softmax(X):
+        X -= X.max(axis=1, keepdims=True)
+        np.exp(X, out=X)
+        X /= X.sum(axis=1, keepdims=True)
+
+    _ACTIVATIONS = {
+        "relu": _relu.__func__,
+        "tanh": _tanh.__func__,
+        "logistic": _logistic.__func__,
+        "identity": _identity.__func__,
+        "softmax": _softmax.__func__
+    }
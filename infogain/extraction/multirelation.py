@@ -0,0 +1,183 @@
+import os
+import json
+import pickle
+
+import numpy as np
+from sklearn.neural_network import MLPClassifier
+
+from .extractionrelation import ExtractionRelation
+from .kernel import MLPKernel
+
+class MultiRelationClassifier:
+    """ A single classifier shared by all the relations of an engine. The classifier predicts a label per (relation,
+    classification) pair, such that a single forward pass of a candidate's context embedding scores the candidate
+    against every relation. The classification probabilities of a relation are the probabilities of its labels
+    normalised over the relation. Fitted MLP classifiers are compiled into an MLPKernel for classification.
+
+    Params:
+        relations ([str]): The names of the relations the classifier scores
+        classifier (str|object|callable): The classifier backend, see ExtractionRelation.BACKENDS
+    """
+
+    CLASSES = ExtractionRelation.CLASSES
+
+    def __init__(self, relations: [str], classifier = "mlp"):
+        self.relations = list(relations)
+        self.classifier = ExtractionRelation.backend(classifier)
+        self.fitted = False
+        self.version = 0  # Incremented each time the model changes
+        self._index = {name: i for i, name in enumerate(self.relations)}
+        self._kernel = None
+
+    def labels(self, relations: [str], classifications: [int]) -> np.ndarray:
+        """ Encode the relations and classifications of points as the labels of the classifier
+
+        Params:
+            relations ([str]): The relation name of each of the points
+            classifications ([int]): The classification of each of the points
+
+        Returns:
+            np.ndarray: The label of each of the points
+        """
+        try:
+            relations = np.array([self._index[name] for name in relations], dtype=int)
+        except KeyError as e:
+            raise ValueError("Relation {} is not scored by the multi-relation classifier".format(e)) from None
+
+        return relations*len(self.CLASSES) + np.searchsorted(self.CLASSES, classifications)
+
+    def fit(self, embeddings: np.ndarray, relations: [str], classifications: [int]) -> None:
+        """ Train the classifier on embedded points of all the relations
+
+        Params:
+            embeddings (np.ndarray): A matrix of concatenated context embeddings, a row per point
+            relations ([str]): The relation name of each of the points
+            classifications ([int]): The classification of each of the points
+        """
+
+        if self.classifier is None:
+            raise RuntimeError(
+                "The multi-relation classifier was restored without its classifier and cannot be trained"
+            )
+
+        if not embeddings.shape[0]:
+            raise RuntimeError("Called fit on the multi-relation classifier with no training data")
+
+        self.classifier.fit(embeddings, self.labels(relations, classifications))
+        self.fitted = True
+        self.version += 1
+        self._kernel = None
+
+    def probabilities(self, embeddings: np.ndarray) -> np.ndarray:
+        """ Score embedded points against every relation in a single call
+
+        Params:
+            embeddings (np.ndarray): A matrix of concatenated context embeddings, a row per point
+
+        Returns:
+            np.ndarray: The probability of each classification (CLASSES) for each relation and point, with a shape of
+                (points, relations, classes). The probabilities of relations without any training data are zero, and
+                such relations cannot be classified (see `trained`)
+        """
+
+        model = self.compile()
+        points = embeddings.shape[0]
+
+        probs = np.zeros((points, len(self.relations)*len(self.CLASSES)))
+        probs[:, model.classes_] = model.predict_proba(embeddings)
+        probs = probs.reshape(points, len(self.relations), len(self.CLASSES))
+
+        totals = probs.sum(axis=2, keepdims=True)
+        np.divide(probs, totals, out=probs, where=totals > 0)
+        return probs
+
+    def classify(self, probabilities: np.ndarray, relations: [str]) -> (np.ndarray, np.ndarray):
+        """ Select the most likely class of points for a relation each from their scored probabilities
+
+        Params:
+            probabilities (np.ndarray): The probabilities of the points returned by `probabilities`
+            relations ([str]): The relation name of each of the points
+
+        Returns:
+            np.ndarray: The most likely class for each of the points
+            np.ndarray: The probability of the chosen class for each of the points
+        """
+
+        rows = np.arange(len(probabilities))
+        probs = probabilities[rows, [self._index[name] for name in relations]]
+
+        untrained = probs.sum(axis=1) == 0
+        if untrained.any():
+            raise RuntimeError("attempted to classify '{}' relation without training data".format(
+                relations[int(np.flatnonzero(untrained)[0])]
+            ))
+
+        best = probs.argmax(axis=1)
+        return self.CLASSES[best], probs[rows, best]
+
+    def trained(self) -> {str}:
+        """ The names of the relations that the classifier was fitted with training data for, only these relations can
+        be classified
+
+        Returns:
+            {str}: The names of the trained relations
+        """
+        return {self.relations[label] for label in np.unique(self.compile().classes_ // len(self.CLASSES))}
+
+    def compile(self) -> object:
+        """ Compile the fitted classifier into its inference kernel, see ExtractionRelation.compile
+
+        Returns:
+            object: The kernel of the classifier or the classifier itself
+        """
+        if not self.fitted:
+            raise RuntimeError("attempted to compile the multi-relation classifier before being trained")
+
+        if self._kernel is not None: return self._kernel
+        if not isinstance(self.classifier, MLPClassifier): return self.classifier
+        self._kernel = MLPKernel.fromClassifier(self.classifier)
+        return self._kernel
+
+    def save(self, path: str, *, trainable: bool = False) -> None:
+        """ Save the fitted classifier into a directory, see ExtractionRelation.save
+
+        Params:
+            path (str): The directory to save the classifier into, created if it doesn't exist
+            *,
+            trainable (bool): Toggle to additionally pickle MLP classifiers such that training can be continued
+        """
+        model = self.compile()
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "relations.json"), "w") as handler:
+            json.dump(self.relations, handler, indent=4)
+
+        if isinstance(model, MLPKernel): model.save(path)
+        if trainable or not isinstance(model, MLPKernel):
+            with open(os.path.join(path, "classifier.pkl"), "wb") as handler:
+                pickle.dump(self.classifier, handler)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True):
+        """ Load a classifier saved with `save`. A classifier loaded from only a kernel can classify but cannot be
+        trained.
+
+        Params:
+            path (str): The directory of the saved classifier
+            mmap (bool): Toggle to memory map the kernel weights rather than read them into memory
+
+        Returns:
+            MultiRelationClassifier: The classifier
+        """
+        with open(os.path.join(path, "relations.json")) as handler:
+            model = cls(json.load(handler), classifier=lambda: None)
+
+        classifierPath = os.path.join(path, "classifier.pkl")
+        if os.path.exists(classifierPath):
+            with open(classifierPath, "rb") as handler:
+                model.classifier = pickle.load(handler)
+
+        model._kernel = MLPKernel.load(path, mmap=mmap) if os.path.exists(os.path.join(path, "kernel.json")) else None
+        model.fitted = True
+        model.version += 1
+        return model
@@ -0,0 +1,126 @@
+import re
+import bisect
+import threading
+
+class CandidatePruner:
+    """ Prune the candidate annotations of a sentence before they are embedded and classified. Every pair of entities
+    of a scenario would otherwise be tried in both directions against every relation that can form between them, the
+    pruner discards pairs that are far apart and directions that a relation is not expressed in. The number of
+    candidates kept and pruned (by reason) are counted such that recall can be traded for throughput with evidence.
+
+    Params:
+        max_distance (int): The maximum number of words between the entities of a candidate, unbounded when None
+        max_entities (int): The maximum number of entities that start between the entities of a candidate, unbounded
+            when None
+        orderings ({str: str}): The orderings allowed for relations keyed by relation name - FORWARD when the domain of
+            the relation must precede its target, BACKWARD when the target must precede the domain or ANY
+    """
+
+    FORWARD = "forward"
+    BACKWARD = "backward"
+    ANY = "any"
+
+    _RUN_RGX = re.compile(r"[^ ]+")  # Characters between spaces
+
+    def __init__(self, max_distance: int = None, max_entities: int = None, orderings: {str: str} = None):
+        orderings = dict(orderings or {})
+        for name, ordering in orderings.items():
+            if ordering not in (self.FORWARD, self.BACKWARD, self.ANY):
+                raise ValueError("Invalid ordering '{}' for relation '{}'".format(ordering, name))
+
+        self.max_distance = max_distance
+        self.max_entities = max_entities
+        self.orderings = orderings
+
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def configuration(self) -> tuple:
+        """ The settings of the pruner that determine the candidates it keeps, such that results predicted with a
+        different configuration can be told apart (see ExtractionEngine.version) """
+        return (self.max_distance, self.max_entities, tuple(sorted(self.orderings.items())))
+
+    def reset(self) -> None:
+        """ Reset the counters of the pruner """
+        with self._lock:
+            self.kept = 0
+            self.pruned = {"distance": 0, "entities": 0, "ordering": 0}
+
+    def stats(self) -> {str: int}:
+        """ The counters of the pruner - the candidates kept, and the candidates pruned in total and by reason """
+        with self._lock:
+            stats = {"kept": self.kept, "pruned": sum(self.pruned.values())}
+            stats.update(("pruned_" + reason, count) for reason, count in self.pruned.items())
+            return stats
+
+    def layout(self, sentence: str, spans: [(int, int)]) -> tuple:
+        """ Prepare the information of a sentence's entity spans needed to judge their pairs. The spans of a sentence
+        are shared by all of its scenarios such that the layout is computed once per sentence.
+
+        Params:
+            sentence (str): The sentence of the spans
+            spans ([(int, int)]): The character offsets of the entities of the sentence
+
+        Returns:
+            tuple: The layout of the sentence
+        """
+        words = [match.start() for match in self._RUN_RGX.finditer(sentence)]
+        return spans, words, sorted(start for start, _ in spans)
+
+    def near(self, layout: tuple, first: int, second: int) -> str:
+        """ Judge whether a pair of entities is close enough for candidate annotations to be formed between them
+
+        Params:
+            layout (tuple): The layout of the sentence of the entities
+            first (int): The index of one of the entities
+            second (int): The index of the other entity
+
+        Returns:
+            str: The reason the pair is pruned, None if the pair is kept
+        """
+
+        spans, words, starts = layout
+        (_, end), (start, _) = sorted((spans[first], spans[second]))
+
+        if self.max_distance is not None:
+            if bisect.bisect_left(words, start) - bisect.bisect_left(words, end) > self.max_distance:
+                return "distance"
+
+        if self.max_entities is not None:
+            if bisect.bisect_left(starts, start) - bisect.bisect_left(starts, end) > self.max_entities:
+                return "entities"
+
+        return None
+
+    def ordered(self, relation: object, forward: bool) -> bool:
+        """ Judge whether a relation can be expressed with its domain and target in the given order
+
+        Params:
+            relation (Relation): The relation of the candidate
+            forward (bool): Whether the domain precedes the target
+
+        Returns:
+            bool: True if the ordering is allowed
+        """
+        ordering = self.orderings.get(relation.name, self.ANY)
+        return ordering == self.ANY or (ordering == self.FORWARD) == forward
+
+    def count(self, kept: int = 0, **pruned: int) -> None:
+        """ Record the candidates that have been kept and pruned
+
+        Params:
+            kept (int): The number of candidates kept
+            **pruned (int): The number of candidates pruned keyed by the reason they were pruned
+        """
+        with self._lock:
+            self.kept += kept
+            for reason, count in pruned.items(): self.pruned[reason] += count
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import struct
+import concurrent.futures
+
+from ..artefact import Document
+from ..serialisers import SerialiserFactory
+
+import logging
+log = logging.getLogger(__name__)
+
+class AsyncExtractionService:
+    """ An asyncio front end for an ExtractionEngine. Documents submitted to the service are queued and combined into
+    micro-batches, such that the candidate annotations of the documents of a batch are classified together (see
+    ExtractionEngine.predict_batch). A batch is dispatched once it holds `batch_size` documents or its first document
+    has waited `max_wait` seconds, and is run on a worker pool while the next batch is collected.
+
+    The service can be served over a local (unix) socket with `serve`. Messages are length prefixed json - a request is
+    a document {"content": str, "name": str} and its response is the predicted document serialised by the json document
+    serialiser, or {"error": str} if the prediction failed.
+
+    Params:
+        engine (ExtractionEngine): The fitted engine of the service
+        *,
+        batch_size (int): The maximum number of documents predicted together
+        max_wait (float): The maximum number of seconds a document waits for its batch to fill
+        executor (concurrent.futures.ThreadPoolExecutor): The pool of worker threads that runs the batches, a single
+            worker thread when None. Batches are predicted by the engine of the service in place, the worker processes
+            of a ProcessPoolExecutor cannot share the engine and are rejected
+    """
+
+    _HEADER = struct.Struct("!I")
+
+    def __init__(
+        self,
+        engine: "ExtractionEngine",
+        *,
+        batch_size: int = 32,
+        max_wait: float = 0.005,
+        executor: concurrent.futures.ThreadPoolExecutor = None):
+
+        if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+            raise ValueError("The extraction service requires a thread pool executor, the engine cannot be shared with "
+                             "worker processes")
+
+        self.engine = engine
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self._executor = executor
+        self._ownsExecutor = executor is None
+        self._queue = None
+        self._batcher = None
+        self._serialiser = SerialiserFactory("json", Document)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._batcher is not None and not self._batcher.done()
+
+    async def start(self) -> None:
+        """ Start collecting submitted documents into batches """
+        if self.running: return
+
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="extraction")
+
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._batch())
+
+    async def stop(self) -> None:
+        """ Stop the service - the documents that have been submitted are predicted before the service stops """
+        if not self.running: return
+
+        await self._queue.put(None)
+        await self._batcher
+        self._batcher = None
+
+        if self._ownsExecutor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def predict(self, document: Document) -> Document:
+        """ Submit a document to be predicted on and await its prediction
+
+        Params:
+            document (Document): The document to be predicted on
+
+        Returns:
+            Document: The document that was predicted on
+        """
+        if not self.running: raise RuntimeError("The extraction service has not been started")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, future))
+        return await future
+
+    async def _batch(self) -> None:
+        """ Collect the submitted documents into batches and dispatch them to the worker pool """
+
+        loop = asyncio.get_running_loop()
+        pending = set()
+
+        stopping = False
+        while not stopping:
+
+            # Wait for the first document of the batch
+            item = await self._queue.get()
+            if item is None: break
+
+            batch = [item]
+            deadline = loop.time() + self.max_wait
+
+            # Fill the batch until it is full or the first document has waited long enough
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0: break
+
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+                if item is None:
+                    stopping = True
+                    break
+
+                batch.append(item)
+
+            task = asyncio.ensure_future(self._dispatch(batch))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        if pending: await asyncio.wait(pending)
+
+    async def _dispatch(self, batch: [(Document, asyncio.Future)]) -> None:
+        """ Predict a batch on the worker pool and return each of the results to its awaiting caller """
+
+        documents, futures = zip(*batch)
+
+        try:
+            documents = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.engine.predict_batch, list(documents)
+            )
+        except Exception as e:
+            for future in futures:
+                if not future.done(): future.set_exception(e)
+            return
+
+        # Return the predicted documents of the batch rather than the submitted documents
+        for document, future in zip(documents, futures):
+            if not future.done(): future.set_result(document)
+
+    async def serve(self, path: str) -> asyncio.AbstractServer:
+        """ Serve the service over a unix socket. The service is started if it is not already running
+
+        Params:
+            path (str): The path of the socket
+
+        Returns:
+            asyncio.AbstractServer: The server of the socket
+        """
+        await self.start()
+        return await asyncio.start_unix_server(self._handle, path=path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """ Handle the requests of a connection to the socket - requests of the connection are predicted concurrently
+        and their responses are written in the order of the requests """
+
+        responses = asyncio.Queue()
+
+        async def respond():
+            while True:
+                response = await responses.get()
+                if response is None: break
+                await self.send(writer, await response)
+
+        responder = asyncio.ensure_future(respond())
+
+        try:
+            while True:
+                request = await self.receive(reader)
+                if request is None: break
+                await responses.put(asyncio.ensure_future(self._respond(request)))
+        finally:
+            await responses.put(None)
+            await responder
+            writer.close()
+
+    async def _respond(self, request: dict) -> dict:
+        """ Predict on the document of a request and form the response """
+        try:
+            document = await self.predict(Document(request["content"], name=request.get("name")))
+            return json.loads(self._serialiser.dump(document))
+        except Exception as e:
+            log.exception("Failed to predict on a request")
+            return {"error": "{}: {}".format(type(e).__name__, e)}
+
+    @classmethod
+    async def send(cls, writer: asyncio.StreamWriter, message: dict) -> None:
+        """ Write a message onto a stream of the service socket
+
+        Params:
+            writer (asyncio.StreamWriter): The stream to be written to
+            message (dict): The message
+        """
+        data = json.dumps(message).encode("utf-8")
+        writer.write(cls._HEADER.pack(len(data)) + data)
+        await writer.drain()
+
+    @classmethod
+    async def receive(cls, reader: asyncio.StreamReader) -> dict:
+        """ Read a message from a stream of the service socket
+
+        Params:
+            reader (asyncio.StreamReader): The stream to be read
+
+        Returns:
+            dict: The message, None if the stream has been closed
+        """
+        try:
+            header = await reader.readexactly(cls._HEADER.size)
+            data = await reader.readexactly(cls._HEADER.unpack(header)[0])
+        except asyncio.IncompleteReadError:
+            return None
+
+        return json.loads(data.decode("utf-8"))
@@ -5,6 +5,7 @@ import collections
 from ..information import Vertex
 from .instance import Instance
 from ..exceptions import ConsistencyError
+from .revision import Revision
 
 import logging
 log = logging.getLogger(__name__)
@@ -226,6 +227,7 @@ class FamilyConceptSet(ConceptSet):
 
         # Add the element into the set via ConceptSet method
         super().add(concept)
+        Revision.increment()
         if not isinstance(concept, Concept): return  # Do not attempt to connect family with partial concept
 
         # Identify corresponding family concept set from new concept + pull down relations where applicable
@@ -279,6 +281,7 @@ class FamilyConceptSet(ConceptSet):
 
         # if they were not removed or they were just a partial concept - return nothing else to do.
         if not isRemoved or isinstance(concept, str): return
+        Revision.increment()
 
         # The removed concept and remove the inherited attributes
         if self._ancestors:
@@ -340,6 +343,8 @@ class ConceptAliases(collections.abc.MutableSet):
         for child in filter(lambda x: isinstance(x, Concept), self._owner.descendants()):
             child.aliases._addInherited(name, cascade = False)
 
+        Revision.increment()
+
     def _addInherited(self, name: str, cascade: bool = True):
         """ Add an aliases as an inherited aliases and cascade the alias down to child concepts
 
@@ -382,6 +387,7 @@ class ConceptAliases(collections.abc.MutableSet):
         for child in filter(lambda x: isinstance(x, Concept), self._owner.descendants()):
             child.aliases._discardInherited(name, cascade = False)
 
+        Revision.increment()
         return True
 
     def _discardInherited(self, name: str, cascade: bool = True):
@@ -771,6 +777,7 @@ class Concept(Vertex):
         elif category == self.STATIC: self._category = self.STATIC
         elif category == self.DYNAMIC: self._category = self.DYNAMIC
         else: raise ValueError("Invalid category '{}' provided to concept {} definition".format(category, self.name))
+        Revision.increment()
 
     @property
     def aliases(self) -> ConceptAliases: return self._aliases
@@ -6,6 +6,7 @@ from ..exceptions import MissingConcept
 from .concept import Concept
 from .relation import Relation
 from .rule import Rule, Condition
+from .revision import Revision
 
 import logging
 log = logging.getLogger(__name__)
@@ -67,6 +68,7 @@ class OntologyConcepts(collections.abc.MutableMapping):
                 component._subscribe(concept)
 
         self._elements[concept.name] = concept
+        Revision.increment()
 
     def remove(self, concept: Concept) -> None:
         raise NotImplementedError()
@@ -76,11 +78,14 @@ class OntologyRelations(collections.abc.MutableMapping):
     def __init__(self, owner: weakref.ref):
         self._ownerRef = owner
         self._elements = {}
+        self._table = (None, {})  # The compiled relation table and the knowledge revision it was compiled at
 
     def __len__(self): return len(self._elements)
     def __iter__(self): return iter(self._elements)
     def __getitem__(self, name: str) -> Relation: return self._elements[name]
-    def __setitem__(self, name: str, relation: Relation) -> None: self._elements[name] = relation
+    def __setitem__(self, name: str, relation: Relation) -> None:
+        self._elements[name] = relation
+        Revision.increment()
     def __delitem__(self, name: str) -> None: self.remove(self._elements[name])
     def __call__(self, name: str = None) -> Relation: return set(self._elements.values())
 
@@ -122,6 +127,40 @@ class OntologyRelations(collections.abc.MutableMapping):
     def remove(self, relation: Relation):
         raise NotImplementedError()
 
+    def table(self) -> {(str, str): (Relation,)}:
+        """ Return the compiled relation table of the ontology, a mapping from a (domain, target) pair of concept names
+        onto the relations that can form between those concepts. Inherited domains and targets are expanded and the
+        differ toggle of the relations is respected. The table is compiled lazily and recompiled once the concept
+        hierarchy or relations have been modified.
+
+        Returns:
+            {(str, str): (Relation,)}: The relations that can be formed between each pair of concepts
+        """
+
+        revision, table = self._table
+        if revision == Revision.current: return table
+
+        revision, compiled = Revision.current, collections.defaultdict(list)
+        for relation in self._elements.values():
+            for domains, targets in zip(relation.domains, relation.targets):
+                for domain in domains:
+                    domain = domain if isinstance(domain, str) else domain.name
+
+                    # Consistent with Relation.between - an abstract domain cannot hold the relation
+                    concept = self._owner.concepts.get(domain)
+                    if concept is None or concept.category is Concept.ABSTRACT: continue
+
+                    for target in targets:
+                        target = target if isinstance(target, str) else target.name
+                        if relation.differ and domain == target: continue
+
+                        pair = compiled[(domain, target)]
+                        if relation not in pair: pair.append(relation)
+
+        table = {pair: tuple(relations) for pair, relations in compiled.items()}
+        self._table = (revision, table)
+        return table
+
 class Ontology:
     """ An ontology is a collection of knowledge, it contains a collection of concepts
     and the relationships between them.
@@ -176,9 +215,8 @@ class Ontology:
         if None in (dom, tar):
             raise Exception("Invalid concepts provided when looking for relations")
 
-        for relation in self.relations():
-            if relation.between(dom, tar):
-                yield relation
+        for relation in self.relations.table().get((dom.name, tar.name), ()):
+            yield relation
 
     def clone(self):
         """ Create a new ontology object that is a deep copy of this ontology instance
@@ -7,6 +7,7 @@ from ..information import Vertex
 from .concept import Concept, ConceptSet
 from .instance import Instance
 from .rule import Rule
+from .revision import Revision
 
 import logging
 log = logging.getLogger(__name__)
@@ -53,6 +54,8 @@ class RelationConceptSet(ConceptSet):
             concept (Concept/str): the concept to be added
         """
 
+        Revision.increment()
+
         if isinstance(concept, str):
             # Partial base being added
             if concept in self._elements:
@@ -87,6 +90,8 @@ class RelationConceptSet(ConceptSet):
             concept (Concept):
         """
 
+        Revision.increment()
+
         queryGroup = [concept]
 
         while queryGroup:
@@ -112,6 +117,8 @@ class RelationConceptSet(ConceptSet):
 
         #! Partial concepts that are added as children to concepts shall not inherit of become part of this concept
 
+        Revision.increment()
+
         if concept in self._partial:
             # A base partial concept being replaced - Remove the partial concept from everywhere
 
@@ -142,6 +149,7 @@ class RelationConceptSet(ConceptSet):
             bool: True if the concept was removed
         """
         if concept not in self._elements: return False  # Not present
+        Revision.increment()
         if concept in self._partial: return super().discard(concept)  # Only partial - remove and return
 
         # If full concept as member by partial passed - convert partial to full concept
@@ -172,6 +180,8 @@ class RelationConceptSet(ConceptSet):
             concepts (typing.Iterable[Concept]): An iterable of concepts to be discarded
         """
 
+        Revision.increment()
+
         while concepts:
             concept = concepts.pop()
 
@@ -206,6 +216,8 @@ class RelationConceptSet(ConceptSet):
             partial (str): partial name
         """
 
+        Revision.increment()
+
         # Decrement the existence of the partial child
         self._derivedPartial[partial] -= 1
 
@@ -256,6 +268,7 @@ class RelationConceptManager(collections.abc.MutableSequence):
             self._elements[index].add(concept)
     def __delitem__(self, index: int):
         # Delete from both group the references to the concept sets
+        Revision.increment()
         del self._elements[index]
         del self._correspondingGroup()._elements[index]
 
@@ -382,6 +395,12 @@ class Relation:
     @property
     def targets(self) -> RelationConceptManager: return self._targets
     @property
+    def differ(self) -> bool: return self._differ
+    @differ.setter
+    def differ(self, differ: bool):
+        self._differ = differ
+        Revision.increment()
+    @property
     def rules(self) -> RuleManager: return self._rules
     @rules.setter
     def rules(self, rules: [Rule]): self._rules = RuleManager(weakref.ref(self), rules)
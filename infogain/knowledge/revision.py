@@ -0,0 +1,16 @@
+import itertools
+
+class Revision:
+    """ A global record of modifications made to the knowledge structures. Components that change the concept hierarchy
+    or the membership of relations increment the revision. Compiled views of knowledge record the revision they were
+    compiled at and are rebuilt when the revision has since moved on.
+    """
+
+    _counter = itertools.count(1)
+    current = 0
+
+    @classmethod
+    def increment(cls) -> int:
+        """ Record that a modification has been made to the knowledge and return the new revision """
+        cls.current = next(cls._counter)
+        return cls.current
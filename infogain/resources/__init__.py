@@ -6,6 +6,7 @@ ROOT = os.path.dirname(os.path.realpath(__file__))
 TEXT_COLLECTIONS = [os.path.join(ROOT,"TextCollections", name) 
     for name in os.listdir(os.path.join(ROOT,"TextCollections"))]
 DICTIONARY = os.path.join(os.path.dirname(os.path.realpath(__file__)), "Dictionary.txt")
+VECTORS = os.path.join(ROOT, "WikipediaVectors")
 
 class TEXT(object):
     def __init__(self):
@@ -20,6 +21,9 @@ class TEXT(object):
 def hasEmbedder():
     return os.path.exists(os.path.join(ROOT,"WikipediaWord2Vec"))
         
+def hasVectors():
+    return os.path.exists(os.path.join(VECTORS, "vectors.npy"))
+
 def loadEmbedder():
     from gensim.models import Word2Vec
     return Word2Vec.load(os.path.join(ROOT,"WikipediaWord2Vec"))
\ No newline at end of file
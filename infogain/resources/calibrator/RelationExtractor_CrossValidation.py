@@ -1,76 +1,157 @@
-from numpy import logspace
+import os
+import math
+import tempfile
+import itertools
+import concurrent.futures
+
+import numpy as np
 from sklearn.model_selection import KFold
-from gensim.models import Word2Vec
+from sklearn.neural_network import MLPClassifier
 import logging
 
 from ...knowledge import Ontology
-from ...artefact import Annotation, Document, score
-from ...extraction import RelationExtractor
-
-from multiprocessing import Process, Queue
+from ...artefact import Annotation, Document
+from ...extraction import ExtractionRelation, FeatureStore, Embedder
 
-def RETune(ont: Ontology, training: [Annotation]):
-    """ Tune the relation extraction class over a range of various values and return the correct
-    parameters
+log = logging.getLogger(__name__)
 
-    Params:
-        ont (RelationExtractor/Ontology) - The ontology of information needed to form the base
-        training ([Datapoint]) - A collection of data points to be able to perform cross
-            validation
-
-    Returns:
-        scores - A data structure that holds all of the metric scores for the extractor against
-            the structures then against the alphas
-        structures - The network sizes and shapes
-        alphas - The neural network
-    """
+# The state of a tuning worker - the feature store of the training data and the folds of its rows
+_WORKER = {}
 
+def _initialise(path: str, folds: [(np.ndarray, np.ndarray)], relations: {str: (list, list)}) -> None:
+    """ Prepare a worker process of the tuner - the feature store is memory mapped such that the workers share it """
     logging.getLogger().setLevel(logging.ERROR)  # Ensure that logging output is captured
+    _WORKER.update(store=FeatureStore.load(path), folds=folds, relations=relations)
 
-    # The structures to validate
-    structures = [(3,1), (4,2), (6,3), (8,4), (12,6), (20,10), (50,20)]
-    alphas = logspace(-16,1,20)
-
-    scores = []
-    for layers in structures:
-        layer_scores = []
-        for alpha in alphas:
-            def run(queue, tr, val):
-                tr, val = [training[i] for i in tr], [training[i] for i in val]
-
-                # Create a new extractor model
-                ext = RelationExtractor(ontology=ont, hidden_layers=layers, alpha=alpha)
-
-                # Generate the training and validation documents
-                Xtr, Xtv = Document(), Document()
-                Xtr.datapoints(tr)
-                Xtv.datapoints(val)
+def _evaluate(layers: tuple, alpha: float, iterations: int, fold: int, seed: int) -> np.ndarray:
+    """ Train the relations on the training rows of a fold with a configuration and classify the validation rows
 
-                # Fit, predict and score
-                ext.fit(Xtr)
-                ext.predict(Xtv)
-
-                results = score(ont, [Xtv])
-
-                queue.put(results[0])
-
-            queue = Queue()
-            processors = [Process(target=run, args=(queue, tr, val))
-                for tr, val in KFold(n_splits=5, shuffle=True).split(training)]
-            [p.start() for p in processors]
-            [p.join() for p in processors]
-
-            alpha_scores = [queue.get() for _ in range(5)]
+    Returns:
+        np.ndarray: The true positive, false positive and false negative counts of the positive class
+    """
 
-            compressed = {"precision":[],"recall":[],"f1":[]}
-            for r in alpha_scores:
-                for k, v in r.items():
-                    compressed[k].append(v)
+    store, relations = _WORKER["store"], _WORKER["relations"]
+    training, validation = (store.subset(rows) for rows in _WORKER["folds"][fold])
+
+    counts = np.zeros(3, dtype=int)
+    for name, (domains, targets) in relations.items():
+        embeddings, classifications = validation.relation(name)
+        if not len(embeddings) or not np.any(training.relations == name): continue
+
+        relation = ExtractionRelation(
+            domains,
+            name,
+            targets,
+            classifier=MLPClassifier(hidden_layer_sizes=layers, alpha=alpha, max_iter=iterations, random_state=seed)
+        )
+        relation.fit(training)
+
+        predicted, _ = relation.classify(embeddings)
+        positive, expected = predicted == Annotation.POSITIVE, classifications == Annotation.POSITIVE
+        counts += [np.sum(positive & expected), np.sum(positive & ~expected), np.sum(~positive & expected)]
+
+    return counts
+
+def _metrics(counts: np.ndarray) -> {str: float}:
+    """ The precision, recall and F1 score of true positive, false positive and false negative counts """
+    tp, fp, fn = counts
+    precision = tp/(tp + fp) if tp + fp else 0.
+    recall = tp/(tp + fn) if tp + fn else 0.
+    f1 = 2*precision*recall/(precision + recall) if precision + recall else 0.
+    return {"precision": precision, "recall": recall, "f1": f1}
+
+def RETune(
+    ont: Ontology,
+    training: [Document],
+    *,
+    structures: [tuple] = ((3,1), (4,2), (6,3), (8,4), (12,6), (20,10), (50,20)),
+    alphas: [float] = tuple(np.logspace(-16,1,20)),
+    folds: int = 5,
+    eta: int = 3,
+    min_iter: int = 10,
+    max_iter: int = 200,
+    workers: int = None,
+    embedder: Embedder = None,
+    feature_store: str = None,
+    seed: int = 1):
+    """ Tune the network structure and regularisation of the relation extraction models with cross validation. The
+    training annotations are embedded once into a feature store that the workers of a single process pool memory map,
+    such that each trial only trains and classifies. Trials are cut early with successive halving - every surviving
+    configuration is trained for a budget of iterations, the best 1/eta of the configurations survive and the budget is
+    multiplied by eta, until a single configuration remains or the budget reaches max_iter.
 
-            for k, v in compressed.items():
-                compressed[k] = sum(v)/len(v)
+    Params:
+        ont (Ontology) - The ontology of information needed to form the base
+        training ([Document]) - The annotated documents to perform the cross validation with
+        *,
+        structures ([tuple]) - The hidden layer sizes of the networks to validate
+        alphas ([float]) - The regularisation terms to validate
+        folds (int) - The number of cross validation folds
+        eta (int) - The reduction factor of the successive halving
+        min_iter (int) - The training iterations given to every configuration in the first round
+        max_iter (int) - The maximum training iterations given to a configuration
+        workers (int) - The number of worker processes, the number of processors when None
+        embedder (Embedder) - The embedder of the annotations, the shared embedder when None
+        feature_store (str) - Location of the feature store of the training annotations, a temporary store when None
+        seed (int) - The seed of the folds and the networks
 
-            layer_scores.append(compressed)
-        scores.append(layer_scores)
+    Returns:
+        scores ({(tuple, float): dict}) - The precision, recall and F1 score of each configuration, keyed by its
+            (structure, alpha), alongside the iterations it was last evaluated with
+        best (dict) - The parameters of the best configuration - hidden_layer_sizes, alpha and max_iter
+    """
 
-    return scores, structures, alphas
\ No newline at end of file
+    embedder = embedder if embedder is not None else Embedder.shared()
+    relations = {
+        relation.name: (
+            [[getattr(concept, "name", concept) for concept in group] for group in relation.domains],
+            [[getattr(concept, "name", concept) for concept in group] for group in relation.targets]
+        )
+        for relation in ont.relations()
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = feature_store if feature_store is not None else os.path.join(directory, "features")
+
+        # Compute the features of the training annotations once, the folds are selections of the store rows
+        store = FeatureStore.open(path, embedder, training, relations=set(relations))
+        if not len(store): raise ValueError("No training annotations were provided for the relations of the ontology")
+        splits = list(KFold(n_splits=folds, shuffle=True, random_state=seed).split(np.arange(len(store))))
+        del store
+
+        configurations = list(itertools.product(structures, alphas))
+        scores = {}
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_initialise,
+                initargs=(path, splits, relations)) as pool:
+
+            iterations = min_iter
+            while True:
+                log.info("Evaluating {} configurations with {} iterations".format(len(configurations), iterations))
+
+                futures = {
+                    configuration: [
+                        pool.submit(_evaluate, *configuration, iterations, fold, seed) for fold in range(folds)
+                    ]
+                    for configuration in configurations
+                }
+
+                for configuration, results in futures.items():
+                    counts = sum(future.result() for future in results)
+                    scores[configuration] = dict(_metrics(counts), iterations=iterations)
+
+                if len(configurations) == 1 or iterations >= max_iter: break
+
+                # Keep the best configurations and increase their budget
+                configurations.sort(key=lambda configuration: scores[configuration]["f1"], reverse=True)
+                configurations = configurations[:max(1, math.ceil(len(configurations)/eta))]
+                iterations = min(iterations*eta, max_iter)
+
+    (layers, alpha), result = max(
+        ((configuration, scores[configuration]) for configuration in configurations),
+        key=lambda item: item[1]["f1"]
+    )
+
+    return scores, {"hidden_layer_sizes": layers, "alpha": alpha, "max_iter": result["iterations"]}
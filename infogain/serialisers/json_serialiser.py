@@ -77,8 +77,10 @@ class JsonSerialiser(AbstractSerialiser):
             if concept.properties._elements:
                 minimised_concept["properties"] = concept.properties._elements.copy()
 
-            if concept.aliases:
-                minimised_concept["alias"] = sorted(concept.aliases)
+            # Inherited aliases are restored by the concept hierarchy
+            aliases = concept.aliases.specific()
+            if aliases:
+                minimised_concept["aliases"] = sorted(aliases)
 
             if concept.category is not Concept.DYNAMIC:
                 minimised_concept["category"] = concept.category